@@ -0,0 +1,37 @@
+"""add hnsw index for open opportunity embeddings
+
+Revision ID: 20261017_000015
+Revises: 20260728_000014
+Create Date: 2026-10-17 00:00:15
+"""
+
+from alembic import op
+
+
+revision = "20261017_000015"
+down_revision = "20260728_000014"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+
+    # HNSW rather than IVFFlat: IVFFlat picks its list centroids from the rows
+    # present at build time, so an index built on an empty or young catalog
+    # recalls badly until it is rebuilt. HNSW keeps quality as rows arrive.
+    # The predicate must stay identical to the WHERE clause of
+    # `PgvectorRecall.recall` in app/services/vector_recall.py, otherwise the
+    # planner cannot use this partial index.
+    op.execute(
+        """
+        CREATE INDEX IF NOT EXISTS ix_opportunities_embedding_hnsw
+        ON opportunities USING hnsw (embedding vector_cosine_ops)
+        WITH (m = 16, ef_construction = 64)
+        WHERE is_open IS true AND embedding IS NOT NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_opportunities_embedding_hnsw")
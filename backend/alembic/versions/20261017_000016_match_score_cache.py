@@ -0,0 +1,52 @@
+"""add llm match score cache
+
+Revision ID: 20261017_000016
+Revises: 20261017_000015
+Create Date: 2026-10-17 00:00:16
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261017_000016"
+down_revision = "20261017_000015"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if "match_score_cache" in inspector.get_table_names():
+        return
+
+    op.create_table(
+        "match_score_cache",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("resume_hash", sa.String(), nullable=False),
+        sa.Column("profile_hash", sa.String(), nullable=False),
+        sa.Column("opportunity_hash", sa.String(), nullable=False),
+        sa.Column("prompt_version", sa.String(), nullable=False),
+        sa.Column("score", sa.Integer(), nullable=False),
+        sa.Column("reason", sa.Text(), nullable=True),
+        sa.Column("matched_skills", sa.JSON(), nullable=True),
+        sa.Column("missing_skills", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("last_used_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        # Column order matches the lookup: one resume/profile/version, many postings.
+        sa.UniqueConstraint(
+            "resume_hash",
+            "profile_hash",
+            "prompt_version",
+            "opportunity_hash",
+            name="uq_match_score_cache_key",
+        ),
+    )
+    op.create_index("ix_match_score_cache_last_used_at", "match_score_cache", ["last_used_at"])
+
+
+def downgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if "match_score_cache" not in inspector.get_table_names():
+        return
+    op.drop_table("match_score_cache")
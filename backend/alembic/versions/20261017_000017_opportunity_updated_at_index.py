@@ -0,0 +1,26 @@
+"""index opportunities.updated_at for incremental matching
+
+Revision ID: 20261017_000017
+Revises: 20261017_000016
+Create Date: 2026-10-17 00:00:17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261017_000017"
+down_revision = "20261017_000016"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    indexes = {index["name"] for index in inspector.get_indexes("opportunities")}
+    if "ix_opportunities_updated_at" not in indexes:
+        op.create_index("ix_opportunities_updated_at", "opportunities", ["updated_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_opportunities_updated_at", table_name="opportunities")
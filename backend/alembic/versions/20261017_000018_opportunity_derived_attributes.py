@@ -0,0 +1,90 @@
+"""derived opportunity attributes for the sql prefilter
+
+Revision ID: 20261017_000018
+Revises: 20261017_000017
+Create Date: 2026-10-17 00:00:18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "20261017_000018"
+down_revision = "20261017_000017"
+branch_labels = None
+depends_on = None
+
+SEARCH_VECTOR_EXPRESSION = "to_tsvector('english', coalesce(title, '') || ' ' || coalesce(description, ''))"
+
+INDEXES = (
+    ("ix_opportunities_company_normalized", ["company_normalized"], None),
+    ("ix_opportunities_is_intern", ["is_intern"], None),
+    ("ix_opportunities_is_remote", ["is_remote"], None),
+    ("ix_opportunities_location_tokens", ["location_tokens"], "gin"),
+    ("ix_opportunities_search_vector", ["search_vector"], "gin"),
+)
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    existing = {column["name"] for column in inspector.get_columns("opportunities")}
+
+    if "company_normalized" not in existing:
+        op.add_column("opportunities", sa.Column("company_normalized", sa.String(), nullable=True))
+    if "is_intern" not in existing:
+        op.add_column(
+            "opportunities",
+            sa.Column("is_intern", sa.Boolean(), nullable=False, server_default=sa.text("false")),
+        )
+    if "is_remote" not in existing:
+        op.add_column(
+            "opportunities",
+            sa.Column("is_remote", sa.Boolean(), nullable=False, server_default=sa.text("false")),
+        )
+    if "location_tokens" not in existing:
+        op.add_column("opportunities", sa.Column("location_tokens", postgresql.ARRAY(sa.String()), nullable=True))
+    if "search_vector" not in existing:
+        op.add_column(
+            "opportunities",
+            sa.Column(
+                "search_vector",
+                postgresql.TSVECTOR(),
+                sa.Computed(SEARCH_VECTOR_EXPRESSION, persisted=True),
+                nullable=True,
+            ),
+        )
+
+    # SQL twins of app.core.text.opportunity_attributes. New syncs write the
+    # Python values; this only covers rows that existed before the columns.
+    op.execute(
+        r"""
+        UPDATE opportunities
+        SET company_normalized = lower(btrim(regexp_replace(company, '\s+', ' ', 'g'))),
+            is_intern = coalesce(title ~* '\mintern(s|ship|ships)?\M', false),
+            is_remote = coalesce(location ILIKE '%remote%', false),
+            -- Words without repeats, in first-seen order, like location_tokens().
+            location_tokens = ARRAY(
+                SELECT token
+                FROM unnest(regexp_split_to_array(lower(coalesce(location, '')), '\W+'))
+                    WITH ORDINALITY AS words(token, position)
+                WHERE token <> ''
+                GROUP BY token
+                ORDER BY min(position)
+            )
+        WHERE company_normalized IS NULL
+        """
+    )
+
+    indexes = {index["name"] for index in sa.inspect(op.get_bind()).get_indexes("opportunities")}
+    for name, columns, using in INDEXES:
+        if name not in indexes:
+            kwargs = {"postgresql_using": using} if using else {}
+            op.create_index(name, "opportunities", columns, unique=False, **kwargs)
+
+
+def downgrade() -> None:
+    for name, _, _ in reversed(INDEXES):
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+    for column in ("search_vector", "location_tokens", "is_remote", "is_intern", "company_normalized"):
+        op.drop_column("opportunities", column)
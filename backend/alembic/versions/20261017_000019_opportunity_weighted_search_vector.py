@@ -0,0 +1,60 @@
+"""weighted opportunity search vector over title, company, location, description
+
+Revision ID: 20261017_000019
+Revises: 20261017_000018
+Create Date: 2026-10-17 00:00:19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "20261017_000019"
+down_revision = "20261017_000018"
+branch_labels = None
+depends_on = None
+
+WEIGHTED_EXPRESSION = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(company, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(location, '')), 'C') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'D')"
+)
+PREVIOUS_EXPRESSION = "to_tsvector('english', coalesce(title, '') || ' ' || coalesce(description, ''))"
+
+
+def _rebuild_search_vector(expression: str) -> None:
+    # A generated column's expression cannot be altered in place before
+    # Postgres 17, so the column and its GIN index are recreated.
+    op.execute("DROP INDEX IF EXISTS ix_opportunities_search_vector")
+    op.execute("ALTER TABLE opportunities DROP COLUMN IF EXISTS search_vector")
+    op.add_column(
+        "opportunities",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(expression, persisted=True),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "ix_opportunities_search_vector",
+        "opportunities",
+        ["search_vector"],
+        unique=False,
+        postgresql_using="gin",
+    )
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    columns = {column["name"]: column for column in inspector.get_columns("opportunities")}
+    computed = (columns.get("search_vector") or {}).get("computed") or {}
+    if "setweight" in str(computed.get("sqltext", "")):
+        return
+    _rebuild_search_vector(WEIGHTED_EXPRESSION)
+
+
+def downgrade() -> None:
+    _rebuild_search_vector(PREVIOUS_EXPRESSION)
@@ -0,0 +1,59 @@
+"""add match run records
+
+Revision ID: 20261017_000020
+Revises: 20261017_000019
+Create Date: 2026-10-17 00:00:20
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261017_000020"
+down_revision = "20261017_000019"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if "match_runs" in inspector.get_table_names():
+        return
+
+    op.create_table(
+        "match_runs",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column(
+            "user_id",
+            sa.String(),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("trigger", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("error_message", sa.Text(), nullable=True),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("duration_ms", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("db_ms", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("db_queries", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("stage_timings", sa.JSON(), nullable=True),
+        sa.Column("llm_requests", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("prompt_tokens", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("completion_tokens", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("llm_cache_hits", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("open_opportunities", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("scored_candidates", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("llm_scored_candidates", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("jobs_found", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("candidate_stats", sa.JSON(), nullable=True),
+    )
+    op.create_index("ix_match_runs_user_id", "match_runs", ["user_id"])
+    op.create_index("ix_match_runs_started_at", "match_runs", ["started_at"])
+
+
+def downgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if "match_runs" not in inspector.get_table_names():
+        return
+    op.drop_table("match_runs")
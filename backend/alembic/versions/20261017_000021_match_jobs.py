@@ -0,0 +1,53 @@
+"""add leased match job queue
+
+Revision ID: 20261017_000021
+Revises: 20261017_000020
+Create Date: 2026-10-17 00:00:21
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261017_000021"
+down_revision = "20261017_000020"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if "match_jobs" in inspector.get_table_names():
+        return
+
+    op.create_table(
+        "match_jobs",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column(
+            "user_id",
+            sa.String(),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("batch_key", sa.String(), nullable=False),
+        sa.Column("scored_since", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("available_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column("leased_by", sa.String(), nullable=True),
+        sa.Column("lease_expires_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        # Every process may enqueue the same push; the second insert is a no-op.
+        sa.UniqueConstraint("user_id", "batch_key", name="uq_match_jobs_user_batch"),
+    )
+    op.create_index("ix_match_jobs_user_id", "match_jobs", ["user_id"])
+    op.create_index("ix_match_jobs_status_available_at", "match_jobs", ["status", "available_at"])
+
+
+def downgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if "match_jobs" not in inspector.get_table_names():
+        return
+    op.drop_table("match_jobs")
@@ -1,21 +1,30 @@
 from __future__ import annotations
 
-from datetime import date, datetime, timezone
+from datetime import date, datetime, timedelta, timezone
 from typing import Optional
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel, ConfigDict, Field
-from sqlalchemy import select
+from sqlalchemy import Float, cast, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.api.auth import CurrentUserResponse
 from app.api.deps import require_admin
 from app.core.database import get_db
-from app.core.enums import REVIEW_STATUSES, SOURCE_TYPES, SourceType, ReviewStatus, USER_ROLES, UserRole
+from app.core.enums import (
+    MATCH_RUN_STATUSES,
+    REVIEW_STATUSES,
+    SOURCE_TYPES,
+    MatchRunStatus,
+    SourceType,
+    ReviewStatus,
+    USER_ROLES,
+    UserRole,
+)
 from app.core.text import normalize_company
-from app.models.models import CompanySource, InterviewExperience, NotificationLog, SourceSyncRun, User
+from app.models.models import CompanySource, InterviewExperience, MatchRun, NotificationLog, SourceSyncRun, User
 from app.services.notification_service import notification_service
 from app.services.source_sync_service import CompanySourceSyncService
 
@@ -88,6 +97,63 @@ class NotificationLogResponse(BaseModel):
     created_at: Optional[datetime]
 
 
+class MatchRunResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    user_id: str
+    trigger: str
+    status: str
+    error_message: Optional[str]
+    started_at: datetime
+    finished_at: Optional[datetime]
+    duration_ms: int
+    db_ms: int
+    db_queries: int
+    stage_timings: Optional[dict]
+    llm_requests: int
+    prompt_tokens: int
+    completion_tokens: int
+    llm_cache_hits: int
+    open_opportunities: int
+    scored_candidates: int
+    llm_scored_candidates: int
+    jobs_found: int
+    candidate_stats: Optional[dict]
+
+
+class MatchRunTriggerSummary(BaseModel):
+    trigger: str
+    runs: int
+    failed: int
+    avg_duration_ms: float
+    p95_duration_ms: float
+    avg_db_ms: float
+    avg_db_queries: float
+    llm_requests: int
+    prompt_tokens: int
+    completion_tokens: int
+    llm_cache_hits: int
+    avg_open_opportunities: float
+    avg_llm_scored_candidates: float
+    avg_jobs_found: float
+
+
+class MatchRunStageSummary(BaseModel):
+    stage: str
+    runs: int
+    avg_ms: float
+    p95_ms: float
+    avg_db_ms: float
+    avg_db_queries: float
+
+
+class MatchRunSummaryResponse(BaseModel):
+    since: datetime
+    triggers: list[MatchRunTriggerSummary]
+    stages: list[MatchRunStageSummary]
+
+
 class TestNotificationRequest(BaseModel):
     email: Optional[str] = Field(default=None, min_length=5, max_length=320)
 
@@ -357,6 +423,96 @@ async def list_source_sync_runs(
     return [_build_sync_run_response(run) for run in result.scalars().all()]
 
 
+@router.get("/match-runs", response_model=list[MatchRunResponse])
+async def list_match_runs(
+    limit: int = 20,
+    user_id: Optional[str] = None,
+    run_status: Optional[str] = Query(default=None, alias="status"),
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(require_admin),
+):
+    filters = []
+    if user_id:
+        filters.append(MatchRun.user_id == user_id)
+    if run_status:
+        if run_status not in MATCH_RUN_STATUSES:
+            allowed = ", ".join(sorted(MATCH_RUN_STATUSES))
+            raise HTTPException(status_code=400, detail=f"status must be one of: {allowed}.")
+        filters.append(MatchRun.status == run_status)
+
+    capped_limit = min(max(limit, 1), 100)
+    result = await db.execute(
+        select(MatchRun)
+        .where(*filters)
+        .order_by(MatchRun.started_at.desc())
+        .limit(capped_limit)
+    )
+    return [MatchRunResponse.model_validate(run) for run in result.scalars().all()]
+
+
+@router.get("/match-runs/summary", response_model=MatchRunSummaryResponse)
+async def summarize_match_runs(
+    hours: int = Query(default=24, ge=1, le=24 * 30),
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(require_admin),
+):
+    """Per-trigger totals and per-node timings over the last `hours`."""
+    since = datetime.now(timezone.utc) - timedelta(hours=hours)
+    in_window = MatchRun.started_at >= since
+
+    trigger_rows = await db.execute(
+        select(
+            MatchRun.trigger,
+            func.count().label("runs"),
+            func.count().filter(MatchRun.status == MatchRunStatus.FAILED).label("failed"),
+            func.avg(MatchRun.duration_ms).label("avg_duration_ms"),
+            func.percentile_cont(0.95).within_group(MatchRun.duration_ms).label("p95_duration_ms"),
+            func.avg(MatchRun.db_ms).label("avg_db_ms"),
+            func.avg(MatchRun.db_queries).label("avg_db_queries"),
+            func.sum(MatchRun.llm_requests).label("llm_requests"),
+            func.sum(MatchRun.prompt_tokens).label("prompt_tokens"),
+            func.sum(MatchRun.completion_tokens).label("completion_tokens"),
+            func.sum(MatchRun.llm_cache_hits).label("llm_cache_hits"),
+            func.avg(MatchRun.open_opportunities).label("avg_open_opportunities"),
+            func.avg(MatchRun.llm_scored_candidates).label("avg_llm_scored_candidates"),
+            func.avg(MatchRun.jobs_found).label("avg_jobs_found"),
+        )
+        .where(in_window)
+        .group_by(MatchRun.trigger)
+        .order_by(MatchRun.trigger)
+    )
+
+    # stage_timings is {node: {"ms", "db_ms", "db_queries", ...}}; unnest it.
+    stage = func.json_each(MatchRun.stage_timings).table_valued("key", "value", joins_implicitly=True)
+    stage_ms = cast(stage.c.value.op("->>")("ms"), Float)
+    stage_rows = await db.execute(
+        select(
+            stage.c.key.label("stage"),
+            func.count().label("runs"),
+            func.avg(stage_ms).label("avg_ms"),
+            func.percentile_cont(0.95).within_group(stage_ms).label("p95_ms"),
+            func.avg(cast(stage.c.value.op("->>")("db_ms"), Float)).label("avg_db_ms"),
+            func.avg(cast(stage.c.value.op("->>")("db_queries"), Float)).label("avg_db_queries"),
+        )
+        .select_from(MatchRun)
+        .where(in_window)
+        .group_by(stage.c.key)
+        .order_by(func.avg(stage_ms).desc())
+    )
+
+    return MatchRunSummaryResponse(
+        since=since,
+        triggers=[
+            MatchRunTriggerSummary(**{key: value or 0 for key, value in row._mapping.items()})
+            for row in trigger_rows.all()
+        ],
+        stages=[
+            MatchRunStageSummary(**{key: value or 0 for key, value in row._mapping.items()})
+            for row in stage_rows.all()
+        ],
+    )
+
+
 @router.get("/notifications", response_model=list[NotificationLogResponse])
 async def list_notification_logs(
     limit: int = 20,
@@ -1,21 +1,25 @@
 import asyncio
 from datetime import datetime, timezone
+import json
 import logging
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, ConfigDict, Field
-from sqlalchemy import func, select
+from sqlalchemy import func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.api.deps import get_current_user
-from app.core.database import get_db
-from app.core.enums import APPLIED_STATUSES, ApplicationStatus, ReviewStatus
+from app.core.database import async_session_maker, get_db
+from app.core.enums import APPLIED_STATUSES, ApplicationStatus, RefreshJobStatus, ReviewStatus
 from app.core.text import normalize_company
 from app.models.models import InterviewExperience, JobPreference, Opportunity, Resume, User, UserJobMatch
 from app.services.application_service import ApplicationInput, application_service
 from app.services.agent_service import JobMatchingAgent
+from app.services.opportunity_search import search_opportunities
+from app.services.refresh_job_service import ProgressCallback, RefreshJob, refresh_job_service
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -61,9 +65,29 @@ class JobListResponse(BaseModel):
     last_search: Optional[str]
 
 
+class OpportunitySearchResult(BaseModel):
+    id: str
+    source_type: Optional[str] = None
+    title: str
+    company: str
+    location: Optional[str]
+    salary: Optional[str]
+    url: Optional[str]
+    posted_at: Optional[str]
+    relevance: float
+
+
+class OpportunitySearchResponse(BaseModel):
+    results: List[OpportunitySearchResult]
+    limit: int
+    offset: int
+
+
 class JobRefreshResponse(BaseModel):
     message: str
     status: str
+    refresh_id: Optional[str] = None
+    error: Optional[str] = None
     jobs_found: int = 0
     final_threshold: Optional[int] = None
     used_synced_opportunities: bool = False
@@ -228,6 +252,36 @@ async def get_matched_jobs(
     )
 
 
+@router.get("/search", response_model=OpportunitySearchResponse)
+async def search_open_opportunities(
+    q: str = Query(min_length=2, max_length=200),
+    limit: int = Query(default=20, ge=1, le=50),
+    offset: int = Query(default=0, ge=0),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Full-text search over every open opportunity, not just the user's matches."""
+    hits = await search_opportunities(db, q, limit=limit, offset=offset)
+    return OpportunitySearchResponse(
+        results=[
+            OpportunitySearchResult(
+                id=opportunity.id,
+                source_type=opportunity.source_type,
+                title=opportunity.title,
+                company=opportunity.company,
+                location=opportunity.location,
+                salary=opportunity.salary,
+                url=opportunity.url,
+                posted_at=opportunity.posted_at.isoformat() if opportunity.posted_at else None,
+                relevance=relevance,
+            )
+            for opportunity, relevance in hits
+        ],
+        limit=limit,
+        offset=offset,
+    )
+
+
 @router.get("/{job_id}", response_model=JobResponse)
 async def get_job_detail(
     job_id: str,
@@ -252,12 +306,38 @@ async def get_job_detail(
     return _build_job_response(user_match, related_interviews=related_interviews)
 
 
-@router.post("/refresh", response_model=JobRefreshResponse)
+def _build_refresh_response(job: RefreshJob, message: Optional[str] = None) -> JobRefreshResponse:
+    result = job.result
+    if message is None:
+        if job.status == RefreshJobStatus.COMPLETED:
+            message = f"Job search completed with {result.get('jobs_found', 0)} matched jobs."
+        elif job.status == RefreshJobStatus.FAILED:
+            message = "Job search failed."
+        else:
+            message = f"Job search is {job.status}."
+    return JobRefreshResponse(
+        message=message,
+        status=job.status,
+        refresh_id=job.id,
+        error=job.error,
+        jobs_found=result.get("jobs_found", 0),
+        final_threshold=result.get("final_threshold"),
+        used_synced_opportunities=result.get("used_synced_opportunities", False),
+        source_counts=result.get("source_counts", {}),
+        candidate_stats=result.get("candidate_stats", {}),
+    )
+
+
+@router.post("/refresh", response_model=JobRefreshResponse, status_code=202)
 async def refresh_jobs(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """Run a job search synchronously for the current user."""
+    """Start a background job search for the current user and return its refresh id.
+
+    While one is queued or running, further requests join it instead of
+    starting another. Poll `GET /refresh/{refresh_id}` for the outcome.
+    """
     resume_res, pref_res = await asyncio.gather(
         db.execute(select(Resume.id).where(Resume.user_id == current_user.id).limit(1)),
         db.execute(select(JobPreference.id).where(JobPreference.user_id == current_user.id).limit(1)),
@@ -267,25 +347,66 @@ async def refresh_jobs(
     if pref_res.scalar_one_or_none() is None:
         raise HTTPException(status_code=400, detail="Please set job preferences first")
 
-    result = await run_job_search(current_user.id)
-    if not result.get("success"):
-        raise HTTPException(status_code=500, detail=result.get("error", "Job search failed"))
+    job, created = refresh_job_service.submit(current_user.id, run_job_search)
+    message = "Job search started." if created else "A job search is already in progress."
+    return _build_refresh_response(job, message)
 
-    return JobRefreshResponse(
-        message=f"Job search completed with {result.get('jobs_found', 0)} matched jobs.",
-        status="completed",
-        jobs_found=result.get("jobs_found", 0),
-        final_threshold=result.get("final_threshold"),
-        used_synced_opportunities=result.get("used_synced_opportunities", False),
-        source_counts=result.get("source_counts", {}),
-        candidate_stats=result.get("candidate_stats", {}),
+
+@router.get("/refresh/{refresh_id}", response_model=JobRefreshResponse)
+async def get_refresh_status(
+    refresh_id: str,
+    current_user: User = Depends(get_current_user),
+):
+    """Status of a background job search, with results once completed."""
+    job = refresh_job_service.get(refresh_id)
+    if job is None or job.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Refresh not found")
+    return _build_refresh_response(job)
+
+
+def _sse_message(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@router.get("/refresh/{refresh_id}/events")
+async def stream_refresh_events(
+    refresh_id: str,
+    current_user: User = Depends(get_current_user),
+):
+    """Server-sent events for a background job search.
+
+    Replays what already happened, then streams live: `status` on queue/run/
+    finish, `stage` after each workflow step with the current candidate_stats,
+    and `batch` with each rerank batch's scored jobs as soon as it returns.
+    The stream closes after the final `status` event.
+    """
+    job = refresh_job_service.get(refresh_id)
+    if job is None or job.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Refresh not found")
+
+    async def event_stream():
+        async for item in refresh_job_service.follow(job):
+            if item is None:
+                yield ": keep-alive\n\n"
+                continue
+            event, data = item
+            yield _sse_message(event, data)
+
+    return _event_stream_response(event_stream())
+
+
+def _event_stream_response(events) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
-async def run_job_search(user_id: str):
+async def run_job_search(user_id: str, progress: Optional[ProgressCallback] = None):
     """Run the job matching agent and return its result."""
     try:
-        agent = JobMatchingAgent(user_id=user_id)
+        agent = JobMatchingAgent(user_id=user_id, progress=progress)
         return await agent.run()
     except Exception as e:
         logger.exception("Job search error for user %s", user_id)
@@ -299,34 +420,95 @@ async def generate_cover_letter(
     current_user: User = Depends(get_current_user),
 ):
     """Generate and persist a cover letter for a matched job on demand."""
+    user_match = await _get_cover_letter_match(db, job_id, current_user.id)
+    if user_match.cover_letter:
+        return CoverLetterResponse(job_id=user_match.id, cover_letter=user_match.cover_letter)
+
+    resume = await _latest_resume(db, current_user.id)
+    agent = JobMatchingAgent(user_id=current_user.id)
+    cover_letter = await agent.generate_cover_letter_for_job(resume.content or "", user_match)
+    user_match.cover_letter = cover_letter
+    await db.commit()
+
+    return CoverLetterResponse(job_id=user_match.id, cover_letter=cover_letter)
+
+
+@router.post("/{job_id}/cover-letter/stream")
+async def stream_cover_letter(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Server-sent events for a cover letter as the model writes it.
+
+    `token` events carry each piece of text, then `done` carries the whole
+    letter once it is saved to the match, or the one a concurrent request
+    saved first. A letter saved earlier comes back as a single `done`. On
+    failure the stream ends with `error` and nothing is saved; a client that
+    disconnects early stops generation the same way.
+    """
+    user_match = await _get_cover_letter_match(db, job_id, current_user.id)
+    if user_match.cover_letter:
+        stored = _sse_message("done", {"job_id": user_match.id, "cover_letter": user_match.cover_letter})
+        return _event_stream_response(iter([stored]))
+
+    resume = await _latest_resume(db, current_user.id)
+    resume_text = resume.content or ""
+    agent = JobMatchingAgent(user_id=current_user.id)
+
+    async def event_stream():
+        parts: list[str] = []
+        try:
+            async for text in agent.stream_cover_letter_for_job(resume_text, user_match):
+                parts.append(text)
+                yield _sse_message("token", {"text": text})
+            cover_letter = "".join(parts)
+            async with async_session_maker() as stream_db:
+                # A concurrent request may have saved its letter first; keep it.
+                result = await stream_db.execute(
+                    update(UserJobMatch)
+                    .where(UserJobMatch.id == user_match.id, UserJobMatch.cover_letter.is_(None))
+                    .values(cover_letter=cover_letter)
+                )
+                if result.rowcount == 0:
+                    # Send the letter that was kept, so every client shows the same one.
+                    stored = await stream_db.execute(
+                        select(UserJobMatch.cover_letter).where(UserJobMatch.id == user_match.id)
+                    )
+                    cover_letter = stored.scalar_one_or_none() or cover_letter
+                await stream_db.commit()
+        except Exception:
+            logger.exception("Cover letter stream failed for match %s", user_match.id)
+            yield _sse_message("error", {"detail": "Unable to generate cover letter"})
+            return
+        yield _sse_message("done", {"job_id": user_match.id, "cover_letter": cover_letter})
+
+    return _event_stream_response(event_stream())
+
+
+async def _get_cover_letter_match(db: AsyncSession, job_id: str, user_id: str) -> UserJobMatch:
     match_result = await db.execute(
         select(UserJobMatch)
         .options(selectinload(UserJobMatch.opportunity))
-        .where(UserJobMatch.id == job_id, UserJobMatch.user_id == current_user.id)
+        .where(UserJobMatch.id == job_id, UserJobMatch.user_id == user_id)
     )
     user_match = match_result.scalar_one_or_none()
     if not user_match:
         raise HTTPException(status_code=404, detail="Job not found")
+    return user_match
 
-    if user_match.cover_letter:
-        return CoverLetterResponse(job_id=user_match.id, cover_letter=user_match.cover_letter)
 
+async def _latest_resume(db: AsyncSession, user_id: str) -> Resume:
     resume_result = await db.execute(
         select(Resume)
-        .where(Resume.user_id == current_user.id)
+        .where(Resume.user_id == user_id)
         .order_by(Resume.uploaded_at.desc())
         .limit(1)
     )
     resume = resume_result.scalar_one_or_none()
     if not resume:
         raise HTTPException(status_code=400, detail="Please upload a resume first")
-
-    agent = JobMatchingAgent(user_id=current_user.id)
-    cover_letter = await agent.generate_cover_letter_for_job(resume.content or "", user_match)
-    user_match.cover_letter = cover_letter
-    await db.commit()
-
-    return CoverLetterResponse(job_id=user_match.id, cover_letter=cover_letter)
+    return resume
 
 
 @router.put("/{job_id}/apply")
@@ -71,6 +71,48 @@ class Settings(BaseSettings):
     TARGET_JOBS: int = 10
     MATCH_LLM_RERANK_LIMIT: int = 20
     MATCH_LLM_BATCH_SIZE: int = 10
+    # Estimated prompt + completion tokens per ranking batch; batches close
+    # early when the next job would exceed it. 0 packs by batch size only.
+    MATCH_LLM_BATCH_TOKEN_BUDGET: int = 4000
+    # HNSW search breadth for vector recall. Raised to the recall limit when
+    # smaller, since the index never returns more than ef_search rows.
+    MATCH_VECTOR_EF_SEARCH: int = 100
+    # "pgvector" asks Postgres; "numpy" searches an in-process embedding matrix.
+    MATCH_RECALL_BACKEND: str = "pgvector"
+    MATCH_RECALL_REFRESH_SECONDS: int = 300
+    MATCH_RECALL_SNAPSHOT_DIR: Optional[str] = None
+    # Reorder prefiltered candidates by BM25 (resume + profile terms) blended
+    # with vector similarity before the LLM rerank limit is applied.
+    MATCH_LEXICAL_PRERANK: bool = True
+    MATCH_LEXICAL_WEIGHT: float = 0.5
+    # Reciprocal-rank fusion of the retrieval lists: vector recall, full-text
+    # keyword recall, the SQL preference rank, and the recency pool. A weight
+    # of 0 drops that list; 0 for recent also skips its query.
+    MATCH_RRF_K: int = 60
+    MATCH_RRF_VECTOR_WEIGHT: float = 1.0
+    MATCH_RRF_LEXICAL_WEIGHT: float = 1.0
+    MATCH_RRF_PREFERENCE_WEIGHT: float = 1.0
+    MATCH_RRF_RECENT_WEIGHT: float = 0.25
+    # Late interaction: rank hard-filtered candidates by their best cosine
+    # similarity to any resume chunk (resume_chunks), not the averaged resume
+    # embedding. 0 skips loading chunks and candidate vectors.
+    MATCH_RRF_CHUNK_WEIGHT: float = 1.0
+    # Candidates at one company with the same title and at least this cosine
+    # similarity are scored once; siblings take the representative's score.
+    # 0 disables.
+    MATCH_DEDUP_SIMILARITY: float = 0.97
+    # Rerank only opportunities changed since the user's last run and merge
+    # them into that run's ranked set. Resume or preference edits force a full run.
+    MATCH_INCREMENTAL: bool = True
+    # Background refreshes running at once per process; more wait as queued.
+    MATCH_REFRESH_MAX_CONCURRENCY: int = 4
+    # Write a match_runs row (stage timings, DB time, tokens, funnel) per run.
+    MATCH_RUN_RECORDING: bool = True
+
+    # LLM scheduler (per process). 0 disables a limit.
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_TOKENS_PER_MINUTE: int = 150000
+    LLM_REQUESTS_PER_MINUTE: int = 450
 
     # Data Retention
     DATA_RETENTION_DAYS: int = 7
@@ -81,6 +123,17 @@ class Settings(BaseSettings):
     PUSH_MINUTE: int = 0
     TIMEZONE: str = "America/New_York"
 
+    # Daily push work queue (match_jobs). Any process with the scheduler or
+    # `python -m app.worker` drains it; a lease not renewed within
+    # MATCH_QUEUE_LEASE_SECONDS is handed to another worker.
+    MATCH_QUEUE_LEASE_SECONDS: int = 300
+    MATCH_QUEUE_MAX_ATTEMPTS: int = 3
+    MATCH_QUEUE_RETRY_SECONDS: int = 60
+    MATCH_QUEUE_POLL_SECONDS: int = 60
+    # Users whose push pipelines run at once per process. LLM calls across
+    # them still share LLM_MAX_CONCURRENCY.
+    MATCH_PUSH_CONCURRENCY: int = 4
+
     @property
     def cors_origins(self) -> list[str]:
         return _split_csv(self.BACKEND_CORS_ORIGINS)
@@ -175,3 +175,39 @@ SOURCE_SYNC_STATUSES: Final = frozenset({
     SourceSyncStatus.SUCCESS,
     SourceSyncStatus.FAILED,
 })
+
+
+class LLMPriority:
+    """Admission order for `llm_scheduler`; lower runs first."""
+    INTERACTIVE: Final = 0
+    BATCH: Final = 1
+
+
+class RefreshJobStatus:
+    QUEUED: Final = "queued"
+    RUNNING: Final = "running"
+    COMPLETED: Final = "completed"
+    FAILED: Final = "failed"
+
+
+class MatchRunTrigger:
+    REFRESH: Final = "refresh"
+    DAILY_PUSH: Final = "daily_push"
+
+
+class MatchRunStatus:
+    SUCCESS: Final = "success"
+    FAILED: Final = "failed"
+
+
+MATCH_RUN_STATUSES: Final = frozenset({
+    MatchRunStatus.SUCCESS,
+    MatchRunStatus.FAILED,
+})
+
+
+class MatchJobStatus:
+    QUEUED: Final = "queued"
+    LEASED: Final = "leased"
+    DONE: Final = "done"
+    FAILED: Final = "failed"
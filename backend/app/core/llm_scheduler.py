@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+import heapq
+from itertools import count
+import logging
+from time import monotonic
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, TypeVar
+
+from app.core.config import settings
+from app.core.enums import LLMPriority
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_WINDOW_SECONDS = 60.0
+# Rough English average; only used to reserve budget before the call.
+_CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(*texts: Optional[str], completion_tokens: int = 0) -> int:
+    """Cheap upper-ish estimate of a request's total tokens."""
+    prompt_chars = sum(len(text or "") for text in texts)
+    return prompt_chars // _CHARS_PER_TOKEN + completion_tokens
+
+
+def _usage_tokens(response: Any) -> Optional[int]:
+    usage = getattr(response, "usage_metadata", None)
+    if isinstance(usage, dict) and isinstance(usage.get("total_tokens"), int):
+        return usage["total_tokens"]
+    return None
+
+
+class LLMScheduler:
+    """Per-process admission control for chat model calls.
+
+    Every OpenAI call in the backend goes through `run()`, which waits for a
+    concurrency slot and for room in the sliding one-minute request and token
+    budgets. Waiters are admitted strictly by priority, then arrival order, so
+    interactive calls overtake queued batch scoring. Token budgets reserve the
+    caller's estimate up front and are corrected to the reported usage after
+    the call.
+
+    Like `rate_limiter`, limits apply per worker; N workers share N budgets.
+    A limit of 0 disables that limit.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        requests_per_minute: Optional[int] = None,
+    ) -> None:
+        self._max_concurrency = max_concurrency
+        self._tokens_per_minute = tokens_per_minute
+        self._requests_per_minute = requests_per_minute
+        self._waiters: list[tuple[int, int, int, asyncio.Future]] = []
+        self._sequence = count()
+        # [started_at, tokens] per admitted request within the last minute.
+        self._window: deque[list] = deque()
+        self._window_tokens = 0
+        self._active = 0
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+        self._wakeup_at: Optional[float] = None
+
+    @property
+    def max_concurrency(self) -> int:
+        return self._max_concurrency if self._max_concurrency is not None else settings.LLM_MAX_CONCURRENCY
+
+    @property
+    def tokens_per_minute(self) -> int:
+        return self._tokens_per_minute if self._tokens_per_minute is not None else settings.LLM_TOKENS_PER_MINUTE
+
+    @property
+    def requests_per_minute(self) -> int:
+        return (
+            self._requests_per_minute
+            if self._requests_per_minute is not None
+            else settings.LLM_REQUESTS_PER_MINUTE
+        )
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for *_, future in self._waiters if not future.done())
+
+    async def run(
+        self,
+        call: Callable[[], Awaitable[T]],
+        *,
+        estimated_tokens: int,
+        priority: int = LLMPriority.BATCH,
+    ) -> T:
+        """Run `call` once admitted. Exceptions from `call` propagate unchanged."""
+        reservation = await self._acquire(max(0, estimated_tokens), priority)
+        try:
+            response = await call()
+        finally:
+            self._active -= 1
+            self._dispatch()
+
+        self._settle(reservation, _usage_tokens(response))
+        return response
+
+    async def stream(
+        self,
+        call: Callable[[], AsyncIterator[T]],
+        *,
+        estimated_tokens: int,
+        priority: int = LLMPriority.BATCH,
+    ) -> AsyncIterator[T]:
+        """Like `run()` for a streamed call, yielding its chunks as they arrive.
+
+        The concurrency slot is held until the stream ends or the consumer
+        stops reading. Usage reported on the chunks corrects the reservation.
+        """
+        reservation = await self._acquire(max(0, estimated_tokens), priority)
+        actual_tokens: Optional[int] = None
+        try:
+            async for chunk in call():
+                chunk_tokens = _usage_tokens(chunk)
+                if chunk_tokens is not None:
+                    actual_tokens = (actual_tokens or 0) + chunk_tokens
+                yield chunk
+        finally:
+            self._active -= 1
+            self._dispatch()
+            self._settle(reservation, actual_tokens)
+
+    def _settle(self, reservation: list, actual_tokens: Optional[int]) -> None:
+        if actual_tokens is not None and any(entry is reservation for entry in self._window):
+            self._window_tokens += actual_tokens - reservation[1]
+            reservation[1] = actual_tokens
+
+    def reset(self) -> None:
+        for *_, future in self._waiters:
+            if not future.done():
+                future.cancel()
+        self._waiters.clear()
+        self._window.clear()
+        self._window_tokens = 0
+        self._active = 0
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+        self._wakeup = None
+        self._wakeup_at = None
+
+    async def _acquire(self, tokens: int, priority: int) -> list:
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), tokens, future))
+        self._dispatch()
+        try:
+            return await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Admitted and cancelled in the same tick: hand the slot back.
+                self._active -= 1
+                self._dispatch()
+            raise
+
+    def _expire(self, now: float) -> None:
+        cutoff = now - _WINDOW_SECONDS
+        while self._window and self._window[0][0] <= cutoff:
+            _, tokens = self._window.popleft()
+            self._window_tokens -= tokens
+
+    def _budget_wait(self, tokens: int, now: float) -> float:
+        """Seconds until a request of `tokens` fits both minute budgets."""
+        wait = 0.0
+        if self.requests_per_minute > 0 and len(self._window) >= self.requests_per_minute:
+            oldest = self._window[len(self._window) - self.requests_per_minute][0]
+            wait = max(wait, oldest + _WINDOW_SECONDS - now)
+
+        tokens_per_minute = self.tokens_per_minute
+        if tokens_per_minute > 0 and self._window and self._window_tokens + tokens > tokens_per_minute:
+            # A request larger than the whole budget still runs, alone.
+            needed = self._window_tokens + min(tokens, tokens_per_minute) - tokens_per_minute
+            freed = 0
+            for started_at, window_tokens in self._window:
+                freed += window_tokens
+                if freed >= needed:
+                    wait = max(wait, started_at + _WINDOW_SECONDS - now)
+                    break
+        return wait
+
+    def _dispatch(self) -> None:
+        now = monotonic()
+        self._expire(now)
+        while self._waiters:
+            _, _, tokens, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if self.max_concurrency > 0 and self._active >= self.max_concurrency:
+                return
+            wait = self._budget_wait(tokens, now)
+            if wait > 0:
+                self._schedule_wakeup(wait)
+                return
+
+            heapq.heappop(self._waiters)
+            reservation = [now, tokens]
+            self._window.append(reservation)
+            self._window_tokens += tokens
+            self._active += 1
+            future.set_result(reservation)
+
+    def _schedule_wakeup(self, delay: float) -> None:
+        loop = asyncio.get_running_loop()
+        wake_at = loop.time() + delay
+        if self._wakeup is not None and self._wakeup_at is not None and self._wakeup_at <= wake_at:
+            return
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+        logger.debug("LLM budget exhausted; next admission in %.2fs", delay)
+        self._wakeup_at = wake_at
+        self._wakeup = loop.call_later(delay, self._on_wakeup)
+
+    def _on_wakeup(self) -> None:
+        self._wakeup = None
+        self._wakeup_at = None
+        self._dispatch()
+
+
+# Process-wide singleton. Import this instead of instantiating new schedulers.
+llm_scheduler = LLMScheduler()
@@ -1,4 +1,44 @@
+import re
+
+_INTERN_TITLE = re.compile(r"\bintern(?:s|ship|ships)?\b")
+_WORD = re.compile(r"\w+")
+# Too common in resumes and postings to tell one job from another.
+_STOP_WORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or our that the this "
+    "to we will with you your".split()
+)
+
+
 def normalize_company(value: str | None) -> str:
     """Canonical form for `Opportunity.company` / `InterviewExperience.company_name_normalized`
     matching. Writers and readers must share this function or matches silently break."""
     return " ".join((value or "").strip().lower().split())
+
+
+def location_tokens(value: str | None) -> list[str]:
+    """Lowercased words of a location, in order, without repeats.
+
+    `Opportunity.location_tokens` stores these and preference locations are
+    tokenized the same way, so "new york" matches "New York, NY". Migration
+    20261017_000018 backfills with the SQL equivalent; keep the two in step.
+    """
+    return list(dict.fromkeys(_WORD.findall((value or "").lower())))
+
+
+def opportunity_attributes(title: str | None, company: str | None, location: str | None) -> dict:
+    """Derived `Opportunity` columns the matching prefilter reads instead of raw text."""
+    return {
+        "company_normalized": normalize_company(company),
+        "is_intern": bool(_INTERN_TITLE.search((title or "").lower())),
+        "is_remote": "remote" in (location or "").lower(),
+        "location_tokens": location_tokens(location),
+    }
+
+
+def search_terms(value: str | None) -> list[str]:
+    """Lowercased words for lexical scoring, stop words and 1-char tokens dropped."""
+    return [
+        term
+        for term in _WORD.findall((value or "").lower())
+        if len(term) > 1 and term not in _STOP_WORDS
+    ]
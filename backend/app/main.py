@@ -5,6 +5,7 @@ from contextlib import asynccontextmanager
 from app.core.config import settings
 from app.core.database import init_db
 from app.api import admin, applications, auth, interview_experiences, jobs, preferences, resume, tasks
+from app.services.lexical_index import opportunity_lexical_index
 from app.services.scheduler_service import scheduler_service
 
 
@@ -15,6 +16,9 @@ async def lifespan(app: FastAPI):
     if not settings.DEBUG and settings.JWT_SECRET_KEY == "dev-only-change-me":
         raise RuntimeError("JWT_SECRET_KEY must be set in non-debug environments.")
     await init_db()
+    if settings.MATCH_LEXICAL_PRERANK:
+        # Build the BM25 index off the request path before the first refresh.
+        opportunity_lexical_index.refresh_in_background()
     if settings.ENABLE_SCHEDULER:
         scheduler_service.start()
     print(f"🚀 {settings.APP_NAME} started!")
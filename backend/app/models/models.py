@@ -1,4 +1,5 @@
 from sqlalchemy import (
+    Computed,
     Column,
     String,
     Integer,
@@ -12,6 +13,7 @@ from sqlalchemy import (
     UniqueConstraint,
     text,
 )
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from pgvector.sqlalchemy import Vector
@@ -130,6 +132,18 @@ class Opportunity(Base):
     __tablename__ = "opportunities"
     __table_args__ = (
         UniqueConstraint("source_type", "source_job_id", name="uq_opportunities_source_job"),
+        # Approximate recall index. Only open rows with an embedding are ever
+        # ranked, so they are the only ones worth keeping in the graph.
+        Index(
+            "ix_opportunities_embedding_hnsw",
+            "embedding",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+            postgresql_where=text("is_open IS true AND embedding IS NOT NULL"),
+        ),
+        Index("ix_opportunities_location_tokens", "location_tokens", postgresql_using="gin"),
+        Index("ix_opportunities_search_vector", "search_vector", postgresql_using="gin"),
     )
 
     id = Column(String, primary_key=True, default=generate_uuid)
@@ -146,12 +160,33 @@ class Opportunity(Base):
     raw_payload = Column(JSON, nullable=True)
     embedding = Column(VECTOR_TYPE, nullable=True)
 
+    # Derived at sync time by `app.core.text.opportunity_attributes` so the
+    # matching prefilter can run in SQL.
+    company_normalized = Column(String, nullable=True, index=True)
+    is_intern = Column(Boolean, nullable=False, default=False, server_default=text("false"), index=True)
+    is_remote = Column(Boolean, nullable=False, default=False, server_default=text("false"), index=True)
+    location_tokens = Column(ARRAY(String), nullable=True)
+    # Weighted A-D so title hits outrank company, location and body hits.
+    # Migration 20261017_000019 holds the same expression.
+    search_vector = Column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(company, '')), 'B') || "
+            "setweight(to_tsvector('english', coalesce(location, '')), 'C') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'D')",
+            persisted=True,
+        ),
+        nullable=True,
+    )
+
     is_open = Column(Boolean, nullable=False, default=True)
     posted_at = Column(DateTime(timezone=True), nullable=True)
     first_seen_at = Column(DateTime(timezone=True), server_default=func.now())
     last_seen_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Only moves when synced content changes; incremental matching reads it as the delta.
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)
 
     company_source = relationship("CompanySource", back_populates="opportunities")
     user_job_matches = relationship("UserJobMatch", back_populates="opportunity", cascade="all, delete-orphan")
@@ -185,6 +220,105 @@ class UserJobMatch(Base):
     application = relationship("Application", back_populates="user_job_match", uselist=False)
 
 
+class MatchScoreCacheEntry(Base):
+    """LLM rerank result for one resume, profile and opportunity content.
+
+    Keyed by content hashes rather than ids, so a re-run over unchanged text is
+    answered without calling the model, and any edit to the resume, profile,
+    posting, prompt or model naturally misses.
+    """
+    __tablename__ = "match_score_cache"
+    __table_args__ = (
+        UniqueConstraint(
+            "resume_hash",
+            "profile_hash",
+            "prompt_version",
+            "opportunity_hash",
+            name="uq_match_score_cache_key",
+        ),
+    )
+
+    id = Column(String, primary_key=True, default=generate_uuid)
+    resume_hash = Column(String, nullable=False)
+    profile_hash = Column(String, nullable=False)
+    opportunity_hash = Column(String, nullable=False)
+    prompt_version = Column(String, nullable=False)
+
+    score = Column(Integer, nullable=False)
+    reason = Column(Text, nullable=True)
+    matched_skills = Column(JSON, nullable=True)
+    missing_skills = Column(JSON, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+
+class MatchRun(Base):
+    """Timings, token usage and candidate funnel of one `JobMatchingAgent.run()`.
+
+    Written once when the run ends, successful or not. `stage_timings` maps
+    each LangGraph node to its wall and DB time; nodes that repeat (threshold
+    retries) are summed.
+    """
+    __tablename__ = "match_runs"
+
+    id = Column(String, primary_key=True, default=generate_uuid)
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    trigger = Column(String, nullable=False)
+    status = Column(String, nullable=False)
+    error_message = Column(Text, nullable=True)
+
+    started_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    duration_ms = Column(Integer, nullable=False, default=0)
+    db_ms = Column(Integer, nullable=False, default=0)
+    db_queries = Column(Integer, nullable=False, default=0)
+    stage_timings = Column(JSON, nullable=True)
+
+    llm_requests = Column(Integer, nullable=False, default=0)
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    llm_cache_hits = Column(Integer, nullable=False, default=0)
+
+    open_opportunities = Column(Integer, nullable=False, default=0)
+    scored_candidates = Column(Integer, nullable=False, default=0)
+    llm_scored_candidates = Column(Integer, nullable=False, default=0)
+    jobs_found = Column(Integer, nullable=False, default=0)
+    candidate_stats = Column(JSON, nullable=True)
+
+
+class MatchJob(Base):
+    """One user's share of a daily push, claimed by whichever worker gets it.
+
+    Workers claim rows with `FOR UPDATE SKIP LOCKED` and hold them under a
+    lease they keep extending while the run is in progress. A lease that runs
+    out (crashed or stalled worker) makes the row claimable again, so a user is
+    never lost, only retried. `(user_id, batch_key)` is unique, so every
+    process may enqueue the same push.
+    """
+    __tablename__ = "match_jobs"
+    __table_args__ = (
+        UniqueConstraint("user_id", "batch_key", name="uq_match_jobs_user_batch"),
+        Index("ix_match_jobs_status_available_at", "status", "available_at"),
+    )
+
+    id = Column(String, primary_key=True, default=generate_uuid)
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    batch_key = Column(String, nullable=False)
+    # Matches scored after this are the ones the digest reports.
+    scored_since = Column(DateTime(timezone=True), nullable=False)
+
+    status = Column(String, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    leased_by = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+
 class Application(Base):
     """Persistent application lifecycle state for a user and opportunity."""
     __tablename__ = "applications"
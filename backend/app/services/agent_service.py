@@ -1,22 +1,162 @@
 from langgraph.graph import StateGraph, END
 from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
-from typing import TypedDict, List, Optional
-from sqlalchemy import select, func, tuple_
-from datetime import datetime, timezone
+from langchain_core.runnables import Runnable, RunnableConfig
+from typing import AsyncIterator, Callable, TypedDict, List, Optional
+from sqlalchemy import (
+    JSON,
+    Integer,
+    String,
+    and_,
+    case,
+    cast,
+    column,
+    delete,
+    exists,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    tuple_,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
+from sqlalchemy.orm import load_only
+from datetime import datetime, timedelta, timezone
 import asyncio
 import json
 import logging
+import re
+from dataclasses import dataclass
+from uuid import uuid4
+
+import numpy as np
 
 from app.core.config import settings
 from app.core.database import async_session_maker
-from app.models.models import Resume, JobPreference, Opportunity, UserJobMatch, DailyTask
+from app.core.enums import LLMPriority, MatchRunTrigger
+from app.core.llm_scheduler import estimate_tokens, llm_scheduler
+from app.core.text import location_tokens, normalize_company, opportunity_attributes
+from app.models.models import Resume, ResumeChunk, JobPreference, Opportunity, UserJobMatch, DailyTask
+from app.services.candidate_pool import (
+    RECENT_POOL_SIZE,
+    CandidatePool,
+    candidate_limit,
+    fusion_weights,
+    rank_positions,
+    reciprocal_rank_fusion,
+    vector_recall_limit,
+)
+from app.services.lexical_index import opportunity_lexical_index, prerank
 from app.services.linkedin_service import LinkedInService
+from app.services.match_run_service import RunMetrics, match_run_service, track_db
+from app.services.match_score_cache import content_hash, match_score_cache, opportunity_content_hash
+from app.services.opportunity_search import keyword_recall, keyword_tsquery, matches
 from app.services.preference_extractor import PreferenceStructuredFields
-from app.services.rag_service import RAGService
+from app.services.vector_recall import get_recall_backend, max_chunk_similarity, near_duplicate_representatives
 
 logger = logging.getLogger(__name__)
 
+MATCH_LLM_MODEL = "gpt-4o-mini"
+# Bump when the scoring prompts change so cached scores from the old prompt miss.
+MATCH_PROMPT_VERSION = "match-rerank-v1"
+SCORE_CACHE_VERSION = f"{MATCH_PROMPT_VERSION}:{MATCH_LLM_MODEL}"
+RESUME_PROMPT_CHARS = 3000
+PROFILE_PROMPT_CHARS = 1500
+# Completion budgets reserved with the LLM scheduler before each call.
+BATCH_COMPLETION_TOKENS_PER_JOB = 120
+SINGLE_COMPLETION_TOKENS = 200
+COVER_LETTER_COMPLETION_TOKENS = 450
+# Placeholder reason for jobs the model did not actually score; never cached.
+UNANALYZED_REASON = "Unable to analyze"
+# Incremental runs treat rows updated this long before the previous run as
+# changed too: `updated_at` is the sync transaction's start time, so a sync
+# still committing while that run read the catalog can carry an older stamp.
+INCREMENTAL_OVERLAP = timedelta(minutes=15)
+# A legacy opportunity saved again with unchanged content is left alone unless
+# its `last_seen_at` is older than this.
+LAST_SEEN_RESOLUTION = timedelta(hours=1)
+# Content columns compared before a legacy opportunity upsert rewrites a row.
+LEGACY_OPPORTUNITY_COLUMNS = (
+    "title", "company", "location", "salary", "url", "description", "raw_payload",
+    "company_normalized", "is_intern", "is_remote", "location_tokens",
+)
+MATCH_SCORE_COLUMNS = ("match_score", "match_reason", "matched_skills", "missing_skills")
+_TITLE_WORD = re.compile(r"\w+")
+
+
+# Built once at import; every run formats the same templates.
+BATCH_SCORE_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are a career advisor ranking job-resume fit. Be objective and precise."),
+    ("human", """
+Analyze the match between this resume and each job posting.
+
+RESUME:
+{resume}
+
+JOB SEARCH PROFILE:
+{profile_text}
+
+JOBS JSON:
+{jobs_json}
+
+Return a JSON array. Each item must include:
+- index: original job index from JOBS JSON
+- score: 0-100 match score
+- reason: 1-2 sentence explanation
+- matched_skills: list of matching skills
+- missing_skills: list of required but missing skills
+
+JSON array only, no markdown:
+""")
+])
+
+SINGLE_SCORE_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are a career advisor analyzing job-resume fit. Be objective and precise."),
+    ("human", """
+Analyze the match between this resume and job posting.
+
+RESUME:
+{resume}
+
+JOB SEARCH PROFILE:
+{profile_text}
+
+JOB:
+Title: {title}
+Company: {company}
+Description: {description}
+
+Return a JSON object with:
+- score: 0-100 match score
+- reason: 2-3 sentence explanation
+- matched_skills: list of matching skills
+- missing_skills: list of required but missing skills
+
+JSON only, no markdown:
+""")
+])
+
+COVER_LETTER_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are a professional career advisor writing compelling cover letters."),
+    ("human", """
+Write a concise cover letter (250 words max) for this job application.
+
+RESUME HIGHLIGHTS:
+{resume}
+
+JOB:
+Title: {title}
+Company: {company}
+Why I'm a good fit: {reason}
+
+Write a professional, enthusiastic cover letter. Be specific about skills and experience.
+Do not include placeholders like [Your Name] - write it ready to use.
+""")
+])
+
 
 def _parse_posted_at(value):
     """Best-effort parse for external provider timestamps."""
@@ -59,6 +199,165 @@ def _build_preference_context(pref: JobPreference) -> dict:
     }
 
 
+def _rerank_limit() -> int:
+    return max(settings.TARGET_JOBS, settings.MATCH_LLM_RERANK_LIMIT)
+
+
+# Everything a job dict needs. Hydration loads only these, never `raw_payload`,
+# which carries the whole provider payload and is only kept for the catalog.
+OPPORTUNITY_JOB_COLUMNS = (
+    Opportunity.id,
+    Opportunity.source_type,
+    Opportunity.source_job_id,
+    Opportunity.title,
+    Opportunity.company,
+    Opportunity.location,
+    Opportunity.salary,
+    Opportunity.url,
+    Opportunity.description,
+    Opportunity.posted_at,
+)
+
+
+def _opportunity_job(opportunity: Opportunity) -> dict:
+    return {
+        "opportunity_id": opportunity.id,
+        "source_type": opportunity.source_type,
+        "source_job_id": opportunity.source_job_id,
+        "title": opportunity.title,
+        "company": opportunity.company,
+        "location": opportunity.location,
+        "salary": opportunity.salary,
+        "url": opportunity.url,
+        "description": opportunity.description,
+        "posted_at": opportunity.posted_at,
+    }
+
+
+def _cover_letter_job(user_match: UserJobMatch) -> dict:
+    opportunity = user_match.opportunity
+    return {
+        "title": opportunity.title,
+        "company": opportunity.company,
+        "match_reason": user_match.match_reason or "",
+    }
+
+
+def _cover_letter_inputs(resume: str, job: dict) -> dict:
+    return {
+        "resume": resume[:2000],
+        "title": job.get("title", ""),
+        "company": job.get("company", ""),
+        "reason": job.get("match_reason", ""),
+    }
+
+
+def _title_key(title: Optional[str]) -> str:
+    """Title with case and punctuation dropped, for near-duplicate matching."""
+    return " ".join(_TITLE_WORD.findall((title or "").lower()))
+
+
+def _preference_keywords(prefs: dict) -> list[str]:
+    return [keyword.strip() for keyword in prefs.get("keywords", "").split(",") if keyword.strip()]
+
+
+def _structured_prefilter(prefs: dict):
+    """Hard filters and the preference rank as SQL over the derived opportunity columns.
+
+    Returns `(filters, rank, has_keywords)`. Rank bonuses: keyword +3, location
+    +2, remote +1, Greenhouse +1. Retrieval fuses this rank with the recall
+    lists, so it only orders by preference fit.
+    """
+    excluded = {normalize_company(company) for company in prefs.get("excluded_companies", []) if company.strip()}
+    keywords = _preference_keywords(prefs)
+    location_token_sets = [tokens for location in prefs.get("locations", []) if (tokens := location_tokens(location))]
+
+    company = func.coalesce(Opportunity.company_normalized, "")
+    filters = [~company.contains(excluded_company, autoescape=True) for excluded_company in sorted(excluded)]
+    if prefs.get("is_intern", False):
+        filters.append(Opportunity.is_intern.is_(True))
+
+    rank = literal(0)
+    if keywords:
+        rank = rank + case((matches(keyword_tsquery(keywords)), 3), else_=0)
+    if location_token_sets:
+        location_match = or_(*(Opportunity.location_tokens.contains(tokens) for tokens in location_token_sets))
+        rank = rank + case((location_match, 2), else_=0)
+    if prefs.get("remote_preference") == "remote":
+        rank = rank + case((Opportunity.is_remote.is_(True), 1), else_=0)
+    rank = rank + case((Opportunity.source_type == "greenhouse", 1), else_=0)
+    return filters, rank.label("prefilter_rank"), bool(keywords)
+
+
+def _scored_job(job: dict, score_data: dict) -> dict:
+    return {
+        **job,
+        "match_score": score_data.get("score", 0),
+        "match_reason": score_data.get("reason", ""),
+        "matched_skills": json.dumps(score_data.get("matched_skills", [])),
+        "missing_skills": json.dumps(score_data.get("missing_skills", [])),
+    }
+
+
+def _progress_job(job: dict) -> dict:
+    """JSON-safe summary of a scored job for progress listeners."""
+    return {
+        "opportunity_id": job.get("opportunity_id"),
+        "title": job.get("title"),
+        "company": job.get("company"),
+        "location": job.get("location"),
+        "url": job.get("url"),
+        "match_score": job.get("match_score"),
+        "match_reason": job.get("match_reason"),
+    }
+
+
+def _batch_job_card(index: int, job: dict) -> dict:
+    """What the batch prompt shows the model for one job."""
+    return {
+        "index": index,
+        "title": job.get("title", ""),
+        "company": job.get("company", ""),
+        "location": job.get("location", ""),
+        "description": (job.get("description") or "")[:1200],
+    }
+
+
+# Template text sent with every batch, on top of the resume, profile and cards.
+BATCH_PROMPT_OVERHEAD_TOKENS = estimate_tokens(
+    *(message.prompt.template for message in BATCH_SCORE_PROMPT.messages)
+)
+
+
+def _pack_batches(
+    job_tokens: list[int],
+    shared_tokens: int,
+    token_budget: int,
+    max_jobs: int,
+) -> list[tuple[list[int], int]]:
+    """Group jobs, in order, into batches that fit `token_budget`.
+
+    `job_tokens` are each job's card plus completion estimate and
+    `shared_tokens` is what every batch repeats (template, resume, profile).
+    Returns (indexes into job_tokens, estimated batch tokens) per batch. A job
+    that alone exceeds the budget gets a batch of its own. A budget of 0 packs
+    by `max_jobs` only.
+    """
+    batches: list[tuple[list[int], int]] = []
+    current: list[int] = []
+    current_tokens = shared_tokens
+    for index, tokens in enumerate(job_tokens):
+        over_budget = token_budget > 0 and current_tokens + tokens > token_budget
+        if current and (len(current) >= max_jobs or over_budget):
+            batches.append((current, current_tokens))
+            current, current_tokens = [], shared_tokens
+        current.append(index)
+        current_tokens += tokens
+    if current:
+        batches.append((current, current_tokens))
+    return batches
+
+
 def _extract_json_payload(content: str):
     try:
         return json.loads(content)
@@ -84,6 +383,58 @@ def _extract_json_payload(content: str):
     raise json.JSONDecodeError("No JSON payload found", content, 0)
 
 
+def _distinct_from(current, incoming):
+    """`current IS DISTINCT FROM incoming`; json has no equality operator, so
+    JSON columns compare as jsonb."""
+    if isinstance(current.type, JSON):
+        current, incoming = cast(current, JSONB), cast(incoming, JSONB)
+    return current.is_distinct_from(incoming)
+
+
+def _any_changed(model, excluded, columns: tuple[str, ...]):
+    return or_(*(_distinct_from(getattr(model, name), excluded[name]) for name in columns))
+
+
+def _salvage_score_items(content: str) -> list[dict]:
+    """Every complete `{..., "index": ...}` object in a reply that is not valid
+    JSON as a whole, such as an array cut off by the completion limit."""
+    decoder = json.JSONDecoder()
+    items = []
+    position = content.find("{")
+    while position != -1:
+        try:
+            item, end = decoder.raw_decode(content, position)
+        except json.JSONDecodeError:
+            position = content.find("{", position + 1)
+            continue
+        if isinstance(item, dict) and "index" in item:
+            items.append(item)
+        position = content.find("{", end)
+    return items
+
+
+@dataclass
+class _BatchRecovery:
+    """What it took to score jobs whose first batch call came back incomplete."""
+    failed_batches: int = 0
+    retry_batches: int = 0
+    single_calls: int = 0
+    affected_jobs: int = 0
+    salvaged_jobs: int = 0
+    recovered_jobs: int = 0
+
+    def stats(self) -> dict:
+        return {
+            "llm_failed_batches": self.failed_batches,
+            "llm_retry_batches": self.retry_batches,
+            "llm_single_fallbacks": self.single_calls,
+            "llm_salvaged_jobs": self.salvaged_jobs,
+            "llm_recovered_fraction": (
+                round(self.recovered_jobs / self.affected_jobs, 3) if self.affected_jobs else None
+            ),
+        }
+
+
 def _normalize_score_item(item: dict) -> dict:
     return {
         "score": int(item.get("score", 0) or 0),
@@ -97,59 +448,59 @@ class AgentState(TypedDict):
     """State for the job matching agent."""
     resume_text: str
     resume_embedding: Optional[List[float]]
+    resume_chunk_embeddings: List[List[float]]
     preferences: dict
     raw_jobs: List[dict]
     scored_jobs: List[dict]
     matched_jobs: List[dict]
     threshold: int
     candidate_stats: dict
+    previous_run_at: Optional[datetime]
+    incremental_since: Optional[datetime]
     error: Optional[str]
 
 
+ProgressCallback = Callable[[str, dict], None]
+
+
 class JobMatchingAgent:
     """LangGraph agent for job matching workflow."""
 
-    def __init__(self, user_id: str):
-        self.user_id = user_id
-        self.llm = ChatOpenAI(
-            model="gpt-4o-mini",
-            openai_api_key=settings.OPENAI_API_KEY,
-            temperature=0.3
-        )
-        self.linkedin_service = LinkedInService()
-        self.rag_service = RAGService()
-
-    def _create_workflow(self) -> StateGraph:
-        """Create the LangGraph workflow."""
-        workflow = StateGraph(AgentState)
-
-        # Add nodes
-        workflow.add_node("fetch_context", self._fetch_context)
-        workflow.add_node("search_jobs", self._search_jobs)
-        workflow.add_node("analyze_matches", self._analyze_matches)
-        workflow.add_node("filter_and_adjust", self._filter_and_adjust)
-        workflow.add_node("save_results", self._save_results)
-
-        # Define edges
-        workflow.set_entry_point("fetch_context")
-        workflow.add_edge("fetch_context", "search_jobs")
-        workflow.add_edge("search_jobs", "analyze_matches")
-        workflow.add_edge("analyze_matches", "filter_and_adjust")
-
-        # Conditional edge: check if we have enough matches
-        workflow.add_conditional_edges(
-            "filter_and_adjust",
-            self._should_continue,
-            {
-                "save": "save_results",
-                "retry": "filter_and_adjust",
-                "end": END
-            }
-        )
+    # Receives ("stage", ...) after each workflow node and ("batch", ...)
+    # as each rerank batch finishes. Must not block.
+    progress: Optional[ProgressCallback] = None
+    # Set for the length of `run()`; LLM usage and DB time accumulate here.
+    metrics: Optional[RunMetrics] = None
+    trigger: str = MatchRunTrigger.REFRESH
 
-        workflow.add_edge("save_results", END)
+    def __init__(
+        self,
+        user_id: str,
+        candidate_pool: Optional[CandidatePool] = None,
+        priority: int = LLMPriority.INTERACTIVE,
+        progress: Optional[ProgressCallback] = None,
+        trigger: str = MatchRunTrigger.REFRESH,
+    ):
+        self.user_id = user_id
+        self.candidate_pool = candidate_pool
+        self.progress = progress
+        self.trigger = trigger
+        # Rerank calls queue behind interactive ones when this is BATCH.
+        self.priority = priority
+        self.recall_backend = get_recall_backend()
+        self.score_cache = match_score_cache
+
+    def _emit(self, event: str, data: dict) -> None:
+        if self.progress is None:
+            return
+        try:
+            self.progress(event, data)
+        except Exception:
+            logger.exception("Progress listener failed on %s event", event)
 
-        return workflow.compile()
+    def _track_usage(self, response) -> None:
+        if self.metrics is not None:
+            self.metrics.add_usage(response)
 
     async def _fetch_context(self, state: AgentState) -> AgentState:
         """Fetch resume and preferences from database."""
@@ -175,14 +526,52 @@ class JobMatchingAgent:
             if not resume or not pref:
                 return {**state, "error": "Missing resume or preferences"}
 
+            previous_run_at = None
+            if settings.MATCH_INCREMENTAL:
+                previous_run_at = await self._previous_run_at(db, resume, pref)
+
+            chunk_embeddings = []
+            if settings.MATCH_RRF_CHUNK_WEIGHT > 0:
+                chunk_result = await db.execute(
+                    select(ResumeChunk.embedding)
+                    .where(ResumeChunk.resume_id == resume.id, ResumeChunk.embedding.is_not(None))
+                    .order_by(ResumeChunk.chunk_index)
+                )
+                chunk_embeddings = [list(embedding) for embedding in chunk_result.scalars().all()]
+
             return {
                 **state,
                 "resume_text": resume.content or "",
                 "resume_embedding": resume.embedding,
+                "resume_chunk_embeddings": chunk_embeddings,
                 "preferences": _build_preference_context(pref),
-                "threshold": settings.MATCH_THRESHOLD
+                "threshold": settings.MATCH_THRESHOLD,
+                "previous_run_at": previous_run_at,
+                "incremental_since": previous_run_at - INCREMENTAL_OVERLAP if previous_run_at else None,
             }
 
+    async def _previous_run_at(self, db, resume: Resume, pref: JobPreference) -> Optional[datetime]:
+        """When the last ranked set over synced opportunities was saved.
+
+        None when there is none or when the resume or preferences changed after
+        it, since every saved score is then stale and the run must start over.
+        """
+        result = await db.execute(
+            select(func.max(UserJobMatch.last_scored_at))
+            .join(UserJobMatch.opportunity)
+            .where(
+                UserJobMatch.user_id == self.user_id,
+                Opportunity.company_source_id.is_not(None),
+            )
+        )
+        previous_run_at = result.scalar_one_or_none()
+        if previous_run_at is None:
+            return None
+        context_changed_at = (resume.uploaded_at, resume.updated_at, pref.created_at, pref.updated_at)
+        if any(changed_at is not None and changed_at > previous_run_at for changed_at in context_changed_at):
+            return None
+        return previous_run_at
+
     async def _search_jobs(self, state: AgentState) -> AgentState:
         """Load open synced opportunities, with legacy public API fallback."""
         if state.get("error"):
@@ -196,17 +585,29 @@ class JobMatchingAgent:
             prefs.get("is_intern"),
         )
 
+        since = state.get("incremental_since")
         jobs, candidate_stats = await self._load_synced_opportunities(
             prefs,
             state.get("resume_embedding"),
-            limit=max(settings.TARGET_JOBS * 3, 20),
+            limit=candidate_limit(),
+            since=since,
+            chunk_embeddings=state.get("resume_chunk_embeddings"),
+            query_text="\n".join((
+                prefs.get("keywords") or "",
+                prefs.get("profile_text") or "",
+                (state.get("resume_text") or "")[:RESUME_PROMPT_CHARS],
+            )),
         )
         if jobs:
             logger.info("Loaded %s synced opportunities for scoring", len(jobs))
             return {**state, "raw_jobs": jobs, "candidate_stats": candidate_stats}
+        if since is not None:
+            # Nothing changed; the previous ranked set is merged back unchanged.
+            logger.info("No synced opportunities changed since %s", since.isoformat())
+            return {**state, "raw_jobs": [], "candidate_stats": candidate_stats}
 
         logger.info("No synced opportunities available; falling back to legacy public job APIs")
-        legacy_jobs = await self.linkedin_service.search_jobs(
+        legacy_jobs = await agent_runtime.linkedin_service.search_jobs(
             keywords=prefs["keywords"],
             location=prefs.get("location"),
             limit=20,
@@ -233,114 +634,255 @@ class JobMatchingAgent:
         prefs: dict,
         query_embedding: list[float] | None,
         limit: int,
+        since: Optional[datetime] = None,
+        query_text: str = "",
+        chunk_embeddings: Optional[list[list[float]]] = None,
     ) -> tuple[list[dict], dict]:
+        """Prefiltered candidates; only those changed after `since` when given.
+
+        Vector top-k, full-text keyword top-k and the recency pool are unioned,
+        hard-filtered in SQL, and ordered by reciprocal-rank fusion of those
+        lists with the SQL preference rank and, given resume `chunk_embeddings`,
+        each survivor's best similarity to any chunk. With
+        `MATCH_LEXICAL_PRERANK`, the kept candidates are reordered by BM25
+        against `query_text` blended with vector similarity, so the LLM rerank
+        limit takes the best of them rather than the prefilter's top rows.
+        """
         query_vector = list(query_embedding) if query_embedding is not None else None
+        keywords = _preference_keywords(prefs)
+        recall_limit = vector_recall_limit(limit)
+        weights = fusion_weights()
+        recall_backend_name = "batch" if self.candidate_pool is not None else self.recall_backend.name
+
+        async def recall_vector() -> list[tuple[str, float]]:
+            if self.candidate_pool is not None:
+                return self.candidate_pool.hits_for(self.user_id)
+            if query_vector is None:
+                return []
+            async with async_session_maker() as vector_db:
+                return await self.recall_backend.recall(vector_db, query_vector, recall_limit)
+
+        async def recall_lexical() -> list[str]:
+            # Answered by the full-text index over the whole catalog.
+            if not keywords or weights["lexical"] <= 0:
+                return []
+            async with async_session_maker() as lexical_db:
+                return await keyword_recall(lexical_db, keywords, recall_limit, since=since)
+
+        # Vector and lexical top-k run at the same time on their own sessions.
+        hits, keyword_ids = await asyncio.gather(recall_vector(), recall_lexical())
+
         async with async_session_maker() as db:
-            result = await db.execute(
-                select(Opportunity)
-                .where(Opportunity.is_open.is_(True))
-                .order_by(Opportunity.last_seen_at.desc(), Opportunity.updated_at.desc())
-                .limit(200)
-            )
-            recent_opportunities = result.scalars().all()
-
-            vector_distances: dict[str, float] = {}
-            vector_opportunities: list[Opportunity] = []
-            if query_vector is not None:
-                distance = Opportunity.embedding.cosine_distance(query_vector).label("vector_distance")
-                vector_result = await db.execute(
-                    select(Opportunity, distance)
-                    .where(
-                        Opportunity.is_open.is_(True),
-                        Opportunity.embedding.is_not(None),
+            if since is not None:
+                # The delta replaces the shared recency pool, which is ordered
+                # by `last_seen_at` and so says nothing about what changed.
+                recent_result = await db.execute(
+                    select(Opportunity.id)
+                    .where(Opportunity.is_open.is_(True), Opportunity.updated_at > since)
+                    .order_by(Opportunity.updated_at.desc())
+                    .limit(RECENT_POOL_SIZE)
+                )
+                recent_ids = list(recent_result.scalars().all())
+            elif weights["recent"] <= 0:
+                recent_ids = []
+            elif self.candidate_pool is not None:
+                recent_ids = self.candidate_pool.recent_ids
+            else:
+                recent_result = await db.execute(
+                    select(Opportunity.id)
+                    .where(Opportunity.is_open.is_(True))
+                    .order_by(Opportunity.last_seen_at.desc(), Opportunity.updated_at.desc())
+                    .limit(RECENT_POOL_SIZE)
+                )
+                recent_ids = list(recent_result.scalars().all())
+
+            vector_distances: dict[str, float] = dict(hits)
+            candidate_ids = list(dict.fromkeys([*vector_distances, *keyword_ids, *recent_ids]))
+            hard_filters, rank, has_keywords = _structured_prefilter(prefs)
+            ranked: list[tuple[int, str]] = []
+            if candidate_ids:
+                # Phase one ranks ids only; wide columns stay in Postgres until
+                # the survivors are known.
+                filters = [Opportunity.id.in_(candidate_ids), Opportunity.is_open.is_(True), *hard_filters]
+                if since is not None:
+                    filters.append(Opportunity.updated_at > since)
+                result = await db.execute(
+                    select(Opportunity.id, rank)
+                    .where(*filters)
+                    .order_by(
+                        rank.desc(),
+                        func.coalesce(
+                            Opportunity.last_seen_at,
+                            Opportunity.updated_at,
+                            Opportunity.created_at,
+                        ).desc().nulls_last(),
                     )
-                    .order_by(distance, Opportunity.last_seen_at.desc(), Opportunity.updated_at.desc())
-                    .limit(max(limit * 4, 80))
                 )
-                for opportunity, vector_distance in vector_result.all():
-                    vector_opportunities.append(opportunity)
-                    if vector_distance is not None:
-                        vector_distances[opportunity.id] = float(vector_distance)
-
-        opportunities_by_id = {opportunity.id: opportunity for opportunity in vector_opportunities}
-        for opportunity in recent_opportunities:
-            opportunities_by_id.setdefault(opportunity.id, opportunity)
-        opportunities = list(opportunities_by_id.values())
+                ranked = [(prefilter_rank, opportunity_id) for opportunity_id, prefilter_rank in result.all()]
+
+            after_hard_filters = len(ranked)
+            if has_keywords and ranked and ranked[0][0] > 0:
+                ranked = [item for item in ranked if item[0] > 0]
+
+            # Equal preference ranks share a position in the preference list.
+            preference_ranks: dict[str, int] = {}
+            previous_rank = None
+            for position, (prefilter_rank, opportunity_id) in enumerate(ranked, start=1):
+                if prefilter_rank != previous_rank:
+                    rank_position, previous_rank = position, prefilter_rank
+                preference_ranks[opportunity_id] = rank_position
+
+            chunk_similarities: dict[str, float] = {}
+            if chunk_embeddings and weights["chunk"] > 0 and preference_ranks:
+                chunk_similarities = await self._chunk_similarities(db, chunk_embeddings, list(preference_ranks))
+            chunk_ids = sorted(chunk_similarities, key=chunk_similarities.__getitem__, reverse=True)
+
+            fused = reciprocal_rank_fusion(
+                {
+                    "vector": rank_positions(list(vector_distances)),
+                    "lexical": rank_positions(keyword_ids),
+                    "preference": preference_ranks,
+                    "recent": rank_positions(recent_ids),
+                    "chunk": rank_positions(chunk_ids),
+                },
+                weights,
+                settings.MATCH_RRF_K,
+            )
+            fused_ids = sorted(preference_ranks, key=lambda opportunity_id: fused.get(opportunity_id, 0.0), reverse=True)
+            selected_ids = fused_ids[:limit]
+
+            prerank_backend = None
+            lexical_prerank = settings.MATCH_LEXICAL_PRERANK and len(selected_ids) > 1 and query_text.strip()
+            if lexical_prerank and opportunity_lexical_index.needs_refresh():
+                # Indexing never runs on the request path; until the first
+                # build lands this run keeps the fused order.
+                opportunity_lexical_index.refresh_in_background()
+            if lexical_prerank and opportunity_lexical_index.is_warm:
+                # The chunk similarity, where known, is the sharper semantic signal.
+                semantic_distances = {
+                    **vector_distances,
+                    **{opportunity_id: 1.0 - similarity for opportunity_id, similarity in chunk_similarities.items()},
+                }
+                selected_ids = prerank(
+                    selected_ids,
+                    opportunity_lexical_index.score(query_text, selected_ids),
+                    semantic_distances,
+                    settings.MATCH_LEXICAL_WEIGHT,
+                )
+                prerank_backend = "bm25"
+
+            opportunities_by_id: dict[str, Opportunity] = {}
+            if selected_ids:
+                hydrate_result = await db.execute(
+                    select(Opportunity)
+                    .options(load_only(*OPPORTUNITY_JOB_COLUMNS))
+                    .where(Opportunity.id.in_(selected_ids))
+                )
+                opportunities_by_id = {opportunity.id: opportunity for opportunity in hydrate_result.scalars().all()}
 
+        # Closed or deleted ids and hard-filtered rows never come back from the
+        # query; `open_opportunities` counts what recall handed over.
         stats = {
             "source": "synced_opportunities",
-            "open_opportunities": len(opportunities),
-            "vector_candidates": len(vector_opportunities),
-            "after_hard_filters": 0,
-            "after_structured_prefilter": 0,
-            "scored_candidates": 0,
+            "open_opportunities": len(candidate_ids),
+            "vector_candidates": len(vector_distances),
+            "keyword_candidates": len(keyword_ids),
+            "recent_candidates": len(recent_ids),
+            "resume_chunks": len(chunk_embeddings or []),
+            "chunk_scored_candidates": len(chunk_similarities),
+            "fusion": "rrf",
+            "recall_backend": recall_backend_name,
+            "incremental": since is not None,
+            "after_hard_filters": after_hard_filters,
+            "after_structured_prefilter": len(ranked),
+            "scored_candidates": len(selected_ids),
             "candidate_limit": limit,
+            "prerank": prerank_backend or "none",
             "used_fallback": False,
         }
-        excluded = {company.strip().lower() for company in prefs.get("excluded_companies", []) if company.strip()}
-        keywords = [keyword.strip().lower() for keyword in prefs.get("keywords", "").split(",") if keyword.strip()]
-        locations = [location.strip().lower() for location in prefs.get("locations", []) if location.strip()]
-        remote_preference = prefs.get("remote_preference")
-        is_intern = prefs.get("is_intern", False)
-
-        ranked: list[tuple[int, Opportunity]] = []
-        for opportunity in opportunities:
-            company_lower = (opportunity.company or "").lower()
-            if company_lower in excluded or any(excluded_company in company_lower for excluded_company in excluded):
-                continue
-
-            title_lower = (opportunity.title or "").lower()
-            description_lower = (opportunity.description or "").lower()
-            location_lower = (opportunity.location or "").lower()
-            searchable_text = f"{title_lower} {description_lower}"
-
-            if is_intern and "intern" not in title_lower and "internship" not in title_lower:
-                continue
-
-            rank = 0
-            if keywords and any(keyword in searchable_text for keyword in keywords):
-                rank += 3
-            if locations and any(location in location_lower for location in locations):
-                rank += 2
-            if remote_preference == "remote" and "remote" in location_lower:
-                rank += 1
-            if opportunity.id in vector_distances:
-                similarity = max(0.0, 1.0 - vector_distances[opportunity.id])
-                rank += 2 + min(5, int(similarity * 5))
-            if opportunity.source_type == "greenhouse":
-                rank += 1
-
-            ranked.append((rank, opportunity))
-
-        stats["after_hard_filters"] = len(ranked)
-        if keywords and ranked and max(rank for rank, _ in ranked) > 0:
-            ranked = [item for item in ranked if item[0] > 0]
-        stats["after_structured_prefilter"] = len(ranked)
-
-        def sort_timestamp(opportunity: Opportunity) -> float:
-            value = opportunity.last_seen_at or opportunity.updated_at or opportunity.created_at
-            return value.timestamp() if value else 0.0
-
-        ranked.sort(key=lambda item: (item[0], sort_timestamp(item[1])), reverse=True)
-        selected = ranked[:limit]
-        stats["scored_candidates"] = len(selected)
-
         return [
-            {
-                "source_type": opportunity.source_type,
-                "source_job_id": opportunity.source_job_id,
-                "title": opportunity.title,
-                "company": opportunity.company,
-                "location": opportunity.location,
-                "salary": opportunity.salary,
-                "url": opportunity.url,
-                "description": opportunity.description,
-                "posted_at": opportunity.posted_at,
-                "raw_payload": opportunity.raw_payload,
-            }
-            for _, opportunity in selected
+            _opportunity_job(opportunities_by_id[opportunity_id])
+            for opportunity_id in selected_ids
+            if opportunity_id in opportunities_by_id
         ], stats
 
+    async def _chunk_similarities(
+        self,
+        db,
+        chunk_embeddings: list[list[float]],
+        opportunity_ids: list[str],
+    ) -> dict[str, float]:
+        """Late-interaction score per candidate: best cosine to any resume chunk.
+
+        Computed in process when an index is warm (the batch pool's, or the
+        numpy recall backend's). Otherwise pgvector computes it and only one
+        float per candidate crosses the wire, not every candidate's embedding.
+        """
+        index = self._warm_index()
+        if index is not None:
+            found_ids, matrix = index.vectors(opportunity_ids)
+            similarities = max_chunk_similarity(chunk_embeddings, matrix)
+            return {opportunity_id: float(similarity) for opportunity_id, similarity in zip(found_ids, similarities)}
+        nearest_chunk = func.least(*(Opportunity.embedding.cosine_distance(list(chunk)) for chunk in chunk_embeddings))
+        result = await db.execute(
+            select(Opportunity.id, (1 - nearest_chunk).label("chunk_similarity"))
+            .where(Opportunity.id.in_(opportunity_ids), Opportunity.embedding.is_not(None))
+        )
+        return {opportunity_id: float(similarity) for opportunity_id, similarity in result.all()}
+
+    def _warm_index(self):
+        index = self.candidate_pool.index if self.candidate_pool is not None else None
+        if index is None:
+            index = getattr(self.recall_backend, "index", None)
+        return index
+
+    async def _candidate_vectors(self, opportunity_ids: list[str], db=None) -> tuple[list[str], np.ndarray]:
+        """Embeddings of the given opportunities that have one, in request order.
+
+        Served by an in-process index when one is warm (the batch pool's, or
+        the numpy recall backend's), else by one query.
+        """
+        index = self._warm_index()
+        if index is not None:
+            return index.vectors(opportunity_ids)
+        if db is None:
+            async with async_session_maker() as db:
+                return await self._candidate_vectors(opportunity_ids, db)
+        result = await db.execute(
+            select(Opportunity.id, Opportunity.embedding)
+            .where(Opportunity.id.in_(opportunity_ids), Opportunity.embedding.is_not(None))
+        )
+        embeddings = dict(result.all())
+        found_ids = [opportunity_id for opportunity_id in opportunity_ids if opportunity_id in embeddings]
+        return found_ids, np.asarray([embeddings[opportunity_id] for opportunity_id in found_ids], dtype=np.float32)
+
+    async def _near_duplicates(self, jobs: list[dict], positions: list[int]) -> dict[int, int]:
+        """Map each near-duplicate position to the position scored in its place.
+
+        Duplicates share a company and normalized title and have embeddings at
+        least `MATCH_DEDUP_SIMILARITY` alike, like one role posted per office.
+        The best-ranked copy represents the cluster.
+        """
+        by_id = {
+            jobs[position]["opportunity_id"]: position
+            for position in positions
+            if jobs[position].get("opportunity_id")
+        }
+        if len(by_id) < 2:
+            return {}
+        found_ids, matrix = await self._candidate_vectors(list(by_id))
+        found_positions = [by_id[opportunity_id] for opportunity_id in found_ids]
+        keys = [
+            (normalize_company(jobs[position].get("company")), _title_key(jobs[position].get("title")))
+            for position in found_positions
+        ]
+        representatives = near_duplicate_representatives(keys, matrix, settings.MATCH_DEDUP_SIMILARITY)
+        return {
+            found_positions[row]: found_positions[head]
+            for row, head in enumerate(representatives)
+            if head != row
+        }
+
     async def _analyze_matches(self, state: AgentState) -> AgentState:
         """Analyze job-resume match scores using LLM."""
         raw_jobs = state.get("raw_jobs", [])
@@ -352,103 +894,222 @@ class JobMatchingAgent:
 
         resume = state["resume_text"]
         profile_text = state.get("preferences", {}).get("profile_text", "")
-        rerank_limit = max(settings.TARGET_JOBS, settings.MATCH_LLM_RERANK_LIMIT)
+        rerank_limit = _rerank_limit()
         batch_size = max(1, settings.MATCH_LLM_BATCH_SIZE)
         candidate_jobs = raw_jobs[:rerank_limit]
-        batches = [
-            candidate_jobs[index:index + batch_size]
-            for index in range(0, len(candidate_jobs), batch_size)
-        ]
 
-        results_by_batch = await asyncio.gather(
-            *(self._score_job_batch(resume, profile_text, batch) for batch in batches),
-            return_exceptions=True,
+        # Hash exactly what the prompts show the model, so truncated-away edits
+        # do not needlessly miss.
+        resume_hash = content_hash(resume[:RESUME_PROMPT_CHARS])
+        profile_hash = content_hash(profile_text[:PROFILE_PROMPT_CHARS])
+        job_hashes = [opportunity_content_hash(job) for job in candidate_jobs]
+        cached_scores = await self.score_cache.lookup(resume_hash, profile_hash, SCORE_CACHE_VERSION, job_hashes)
+
+        positions_to_score = [
+            position
+            for position, job_hash in enumerate(job_hashes)
+            if job_hash not in cached_scores
+        ]
+        cache_hits = len(candidate_jobs) - len(positions_to_score)
+        # Near-duplicate postings are scored once; siblings reuse that score.
+        siblings: dict[int, int] = {}
+        if settings.MATCH_DEDUP_SIMILARITY > 0 and len(positions_to_score) > 1:
+            siblings = await self._near_duplicates(candidate_jobs, positions_to_score)
+            positions_to_score = [position for position in positions_to_score if position not in siblings]
+        siblings_of: dict[int, list[int]] = {}
+        for sibling, representative in siblings.items():
+            siblings_of.setdefault(representative, []).append(sibling)
+        token_budget = max(0, settings.MATCH_LLM_BATCH_TOKEN_BUDGET)
+        packed = _pack_batches(
+            [
+                estimate_tokens(
+                    json.dumps(_batch_job_card(0, candidate_jobs[position])),
+                    completion_tokens=BATCH_COMPLETION_TOKENS_PER_JOB,
+                )
+                for position in positions_to_score
+            ],
+            BATCH_PROMPT_OVERHEAD_TOKENS + estimate_tokens(
+                resume[:RESUME_PROMPT_CHARS],
+                profile_text[:PROFILE_PROMPT_CHARS],
+            ),
+            token_budget,
+            batch_size,
         )
+        position_batches = [[positions_to_score[index] for index in indexes] for indexes, _ in packed]
+        batch_tokens = [tokens for _, tokens in packed]
+        batches = [[candidate_jobs[position] for position in positions] for positions in position_batches]
+
+        cached_jobs = [
+            _scored_job(job, cached_scores[job_hash])
+            for job, job_hash in zip(candidate_jobs, job_hashes)
+            if job_hash in cached_scores
+        ]
+        if cached_jobs:
+            self._emit("batch", {"cached": True, "jobs": [_progress_job(job) for job in cached_jobs]})
+
+        # Batches are consumed as they finish so progress listeners see the
+        # first scores after one LLM round trip rather than after all of them.
+        fresh_scores: dict[int, dict] = {}
+        recovery = _BatchRecovery()
+        # Tasks are created in rank order; as_completed alone would start them
+        # in set order and let low-ranked batches take the first LLM slots.
+        for next_batch in asyncio.as_completed([
+            asyncio.create_task(self._score_positions(resume, profile_text, positions, batch, recovery))
+            for positions, batch in zip(position_batches, batches)
+        ]):
+            batch_scores = await next_batch
+            for position, score_data in list(batch_scores.items()):
+                for sibling in siblings_of.get(position, ()):
+                    batch_scores[sibling] = score_data
+            fresh_scores.update(batch_scores)
+            self._emit("batch", {
+                "cached": False,
+                "jobs": [
+                    _progress_job(_scored_job(candidate_jobs[position], score_data))
+                    for position, score_data in batch_scores.items()
+                ],
+            })
 
         scored_jobs = []
-        for batch, batch_result in zip(batches, results_by_batch):
-            if isinstance(batch_result, Exception):
-                logger.error("Error scoring job batch: %s", batch_result)
-                fallback_results = await asyncio.gather(
-                    *(self._score_job(resume, profile_text, job) for job in batch),
-                    return_exceptions=True,
-                )
-                batch_scores = []
-                for job, fallback_score in zip(batch, fallback_results):
-                    if isinstance(fallback_score, Exception):
-                        logger.error("Error scoring job %s: %s", job.get("title"), fallback_score)
-                        continue
-                    batch_scores.append((job, fallback_score))
-            else:
-                batch_scores = list(zip(batch, batch_result))
-
-            for job, score_data in batch_scores:
-                if isinstance(score_data, Exception):
-                    logger.error("Error scoring job %s: %s", job.get("title"), score_data)
-                    continue
-                scored_jobs.append({
-                    **job,
-                    "match_score": score_data.get("score", 0),
-                    "match_reason": score_data.get("reason", ""),
-                    "matched_skills": json.dumps(score_data.get("matched_skills", [])),
-                    "missing_skills": json.dumps(score_data.get("missing_skills", [])),
-                })
+        scores_to_cache: dict[str, dict] = {}
+        for position, (job, job_hash) in enumerate(zip(candidate_jobs, job_hashes)):
+            score_data = cached_scores.get(job_hash) or fresh_scores.get(position)
+            if score_data is None:
+                continue
+            # A sibling's copied score was never produced for its own content,
+            # and it may stop deduping to this representative later.
+            if (
+                job_hash not in cached_scores
+                and position not in siblings
+                and score_data.get("reason") != UNANALYZED_REASON
+            ):
+                scores_to_cache[job_hash] = score_data
+            scored_jobs.append(_scored_job(job, score_data))
+
+        await self.score_cache.store(resume_hash, profile_hash, SCORE_CACHE_VERSION, scores_to_cache)
 
         candidate_stats = {
             **state.get("candidate_stats", {}),
             "llm_rerank_limit": rerank_limit,
-            "llm_scored_candidates": len(candidate_jobs),
+            "llm_scored_candidates": len(positions_to_score),
+            "llm_cache_hits": cache_hits,
+            "dedup_similarity": settings.MATCH_DEDUP_SIMILARITY,
+            "dedup_clusters": len(siblings_of),
+            "dedup_collapsed_jobs": len(siblings),
             "llm_batch_size": batch_size,
             "llm_batches": len(batches),
+            "llm_batch_token_budget": token_budget,
+            "llm_batch_tokens_avg": sum(batch_tokens) // len(batch_tokens) if batch_tokens else 0,
+            "llm_batch_tokens_max": max(batch_tokens, default=0),
+            **recovery.stats(),
         }
         scored_jobs.sort(key=lambda x: x["match_score"], reverse=True)
         return {**state, "scored_jobs": scored_jobs, "candidate_stats": candidate_stats}
 
-    async def _score_job_batch(self, resume: str, profile_text: str, jobs: list[dict]) -> list[dict]:
-        """Score a batch of candidate jobs against the resume."""
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are a career advisor ranking job-resume fit. Be objective and precise."),
-            ("human", """
-Analyze the match between this resume and each job posting.
-
-RESUME:
-{resume}
-
-JOB SEARCH PROFILE:
-{profile_text}
-
-JOBS JSON:
-{jobs_json}
-
-Return a JSON array. Each item must include:
-- index: original job index from JOBS JSON
-- score: 0-100 match score
-- reason: 1-2 sentence explanation
-- matched_skills: list of matching skills
-- missing_skills: list of required but missing skills
-
-JSON array only, no markdown:
-""")
-        ])
-
-        jobs_for_prompt = [
-            {
-                "index": index,
-                "title": job.get("title", ""),
-                "company": job.get("company", ""),
-                "location": job.get("location", ""),
-                "description": (job.get("description") or "")[:1200],
-            }
-            for index, job in enumerate(jobs)
-        ]
-        chain = prompt | self.llm
-        response = await chain.ainvoke({
-            "resume": resume[:3000],
-            "profile_text": profile_text[:1500],
+    async def _score_positions(
+        self,
+        resume: str,
+        profile_text: str,
+        positions: list[int],
+        batch: list[dict],
+        recovery: Optional[_BatchRecovery] = None,
+    ) -> dict[int, dict]:
+        """Score one batch, bisecting whatever the batch call did not score.
+
+        Jobs the reply did score are kept; the rest are split in half and
+        retried as two smaller batches, down to single-job calls. A one-off
+        failure is usually recovered by two half-size calls instead of n
+        single-job ones.
+        """
+        recovery = recovery if recovery is not None else _BatchRecovery()
+        scores = await self._bisect_score(resume, profile_text, positions, batch, recovery)
+        return {position: scores[position] for position in positions if position in scores}
+
+    async def _bisect_score(
+        self,
+        resume: str,
+        profile_text: str,
+        positions: list[int],
+        batch: list[dict],
+        recovery: _BatchRecovery,
+        is_retry: bool = False,
+    ) -> dict[int, dict]:
+        if len(batch) == 1 and is_retry:
+            recovery.single_calls += 1
+            try:
+                score = await self._score_job(resume, profile_text, batch[0])
+            except Exception as exc:
+                logger.error("Error scoring job %s: %s", batch[0].get("title"), exc)
+                return {}
+            recovery.recovered_jobs += 1
+            return {positions[0]: score}
+
+        if is_retry:
+            recovery.retry_batches += 1
+        try:
+            results = await self._score_job_batch(resume, profile_text, batch)
+        except Exception as exc:
+            logger.error("Error scoring job batch of %s: %s", len(batch), exc)
+            results = [None] * len(batch)
+
+        scores = {position: result for position, result in zip(positions, results) if result is not None}
+        missing = [index for index, result in enumerate(results) if result is None]
+        if is_retry:
+            recovery.recovered_jobs += len(scores)
+        if not missing:
+            return scores
+
+        if not is_retry:
+            recovery.failed_batches += 1
+            recovery.affected_jobs += len(batch)
+            recovery.salvaged_jobs += len(scores)
+            recovery.recovered_jobs += len(scores)
+        logger.warning("Batch of %s returned %s scores; retrying the rest in halves", len(batch), len(scores))
+        middle = (len(missing) + 1) // 2
+        halves = [half for half in (missing[:middle], missing[middle:]) if half]
+        for half_scores in await asyncio.gather(*(
+            self._bisect_score(
+                resume,
+                profile_text,
+                [positions[index] for index in half],
+                [batch[index] for index in half],
+                recovery,
+                is_retry=True,
+            )
+            for half in halves
+        )):
+            scores.update(half_scores)
+        return scores
+
+    async def _score_job_batch(self, resume: str, profile_text: str, jobs: list[dict]) -> list[Optional[dict]]:
+        """Score a batch of candidate jobs against the resume.
+
+        Jobs missing from the reply, or whose entry could not be read, come
+        back as None. Raises only when nothing in the reply is usable.
+        """
+        jobs_for_prompt = [_batch_job_card(index, job) for index, job in enumerate(jobs)]
+        chain = agent_runtime.chain(BATCH_SCORE_PROMPT)
+        inputs = {
+            "resume": resume[:RESUME_PROMPT_CHARS],
+            "profile_text": profile_text[:PROFILE_PROMPT_CHARS],
             "jobs_json": json.dumps(jobs_for_prompt),
-        })
+        }
+        response = await llm_scheduler.run(
+            lambda: chain.ainvoke(inputs),
+            estimated_tokens=estimate_tokens(
+                *inputs.values(),
+                completion_tokens=BATCH_COMPLETION_TOKENS_PER_JOB * len(jobs),
+            ),
+            priority=self.priority,
+        )
+        self._track_usage(response)
 
-        parsed = _extract_json_payload(response.content)
+        try:
+            parsed = _extract_json_payload(response.content)
+        except (json.JSONDecodeError, ValueError):
+            parsed = _salvage_score_items(response.content)
+            if not parsed:
+                raise
         if isinstance(parsed, dict):
             parsed = parsed.get("results") or parsed.get("jobs") or []
         if not isinstance(parsed, list):
@@ -460,59 +1121,81 @@ JSON array only, no markdown:
                 continue
             index = item.get("index")
             if isinstance(index, int) and 0 <= index < len(jobs):
-                score_by_index[index] = _normalize_score_item(item)
+                try:
+                    score_by_index[index] = _normalize_score_item(item)
+                except (TypeError, ValueError):
+                    continue
 
-        return [
-            score_by_index.get(
-                index,
-                {"score": 0, "reason": "Unable to analyze", "matched_skills": [], "missing_skills": []},
-            )
-            for index in range(len(jobs))
-        ]
+        return [score_by_index.get(index) for index in range(len(jobs))]
 
     async def _score_job(self, resume: str, profile_text: str, job: dict) -> dict:
         """Score a single job against the resume."""
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are a career advisor analyzing job-resume fit. Be objective and precise."),
-            ("human", """
-Analyze the match between this resume and job posting.
-
-RESUME:
-{resume}
-
-JOB SEARCH PROFILE:
-{profile_text}
-
-JOB:
-Title: {title}
-Company: {company}
-Description: {description}
-
-Return a JSON object with:
-- score: 0-100 match score
-- reason: 2-3 sentence explanation
-- matched_skills: list of matching skills
-- missing_skills: list of required but missing skills
 
-JSON only, no markdown:
-""")
-        ])
+        chain = agent_runtime.chain(SINGLE_SCORE_PROMPT)
 
-        chain = prompt | self.llm
-
-        response = await chain.ainvoke({
-            "resume": resume[:3000],  # Limit for token efficiency
-            "profile_text": profile_text[:1500],
+        inputs = {
+            "resume": resume[:RESUME_PROMPT_CHARS],  # Limit for token efficiency
+            "profile_text": profile_text[:PROFILE_PROMPT_CHARS],
             "title": job.get("title", ""),
             "company": job.get("company", ""),
-            "description": job.get("description", "")[:2000]
-        })
+            "description": (job.get("description") or "")[:2000]
+        }
+        response = await llm_scheduler.run(
+            lambda: chain.ainvoke(inputs),
+            estimated_tokens=estimate_tokens(*inputs.values(), completion_tokens=SINGLE_COMPLETION_TOKENS),
+            priority=self.priority,
+        )
+        self._track_usage(response)
 
         # Parse JSON response
         try:
             return _normalize_score_item(_extract_json_payload(response.content))
         except (json.JSONDecodeError, ValueError):
-            return {"score": 50, "reason": "Unable to analyze", "matched_skills": [], "missing_skills": []}
+            return {"score": 50, "reason": UNANALYZED_REASON, "matched_skills": [], "missing_skills": []}
+
+    async def _merge_previous_matches(self, state: AgentState) -> AgentState:
+        """Fold the previous run's still-valid scores in next to the fresh delta."""
+        since = state.get("incremental_since")
+        if state.get("error") or since is None:
+            return state
+
+        scored_jobs = state.get("scored_jobs", [])
+        fresh_ids = {job["opportunity_id"] for job in scored_jobs if job.get("opportunity_id")}
+        rerank_limit = _rerank_limit()
+        async with async_session_maker() as db:
+            result = await db.execute(
+                select(UserJobMatch, Opportunity)
+                .join(UserJobMatch.opportunity)
+                .options(load_only(*OPPORTUNITY_JOB_COLUMNS))
+                .where(
+                    UserJobMatch.user_id == self.user_id,
+                    UserJobMatch.last_scored_at >= state["previous_run_at"],
+                    Opportunity.company_source_id.is_not(None),
+                    Opportunity.is_open.is_(True),
+                    Opportunity.updated_at <= since,
+                )
+                .order_by(UserJobMatch.match_score.desc())
+                .limit(rerank_limit)
+            )
+            previous_jobs = [
+                {
+                    **_opportunity_job(opportunity),
+                    "match_score": user_match.match_score,
+                    "match_reason": user_match.match_reason or "",
+                    "matched_skills": user_match.matched_skills,
+                    "missing_skills": user_match.missing_skills,
+                }
+                for user_match, opportunity in result.all()
+                if opportunity.id not in fresh_ids
+            ]
+
+        merged = sorted(scored_jobs + previous_jobs, key=lambda job: job["match_score"], reverse=True)[:rerank_limit]
+        candidate_stats = {
+            **state.get("candidate_stats", {}),
+            "previous_matches_merged": sum(1 for job in merged if job.get("opportunity_id") not in fresh_ids),
+        }
+        logger.info("Merged %s previous matches with %s fresh scores", len(previous_jobs), len(scored_jobs))
+        return {**state, "scored_jobs": merged, "candidate_stats": candidate_stats}
 
     async def _filter_and_adjust(self, state: AgentState) -> AgentState:
         """Filter jobs by threshold, adjust threshold if needed for next iteration."""
@@ -559,203 +1242,283 @@ JSON only, no markdown:
 
     async def generate_cover_letter_for_job(self, resume: str, user_match: UserJobMatch) -> str:
         """Generate a cover letter for a persisted match."""
-        opportunity = user_match.opportunity
-        return await self._generate_cover_letter(
-            resume,
-            {
-                "title": opportunity.title,
-                "company": opportunity.company,
-                "match_reason": user_match.match_reason or "",
-            },
-        )
+        return await self._generate_cover_letter(resume, _cover_letter_job(user_match))
+
+    async def stream_cover_letter_for_job(self, resume: str, user_match: UserJobMatch) -> AsyncIterator[str]:
+        """Cover letter text for a persisted match, piece by piece as the model writes it."""
+        job = _cover_letter_job(user_match)
+        chain = agent_runtime.chain(COVER_LETTER_PROMPT)
+        inputs = _cover_letter_inputs(resume, job)
+        letter = None
+        async for chunk in llm_scheduler.stream(
+            lambda: chain.astream(inputs),
+            estimated_tokens=estimate_tokens(*inputs.values(), completion_tokens=COVER_LETTER_COMPLETION_TOKENS),
+            priority=LLMPriority.INTERACTIVE,
+        ):
+            # Chunks add up to the whole message, usage included.
+            letter = chunk if letter is None else letter + chunk
+            if chunk.content:
+                yield chunk.content
+        if letter is not None:
+            self._track_usage(letter)
 
     async def _generate_cover_letter(self, resume: str, job: dict) -> str:
         """Generate a cover letter for a job."""
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are a professional career advisor writing compelling cover letters."),
-            ("human", """
-Write a concise cover letter (250 words max) for this job application.
 
-RESUME HIGHLIGHTS:
-{resume}
-
-JOB:
-Title: {title}
-Company: {company}
-Why I'm a good fit: {reason}
-
-Write a professional, enthusiastic cover letter. Be specific about skills and experience.
-Do not include placeholders like [Your Name] - write it ready to use.
-""")
-        ])
-
-        chain = prompt | self.llm
-
-        response = await chain.ainvoke({
-            "resume": resume[:2000],
-            "title": job.get("title", ""),
-            "company": job.get("company", ""),
-            "reason": job.get("match_reason", "")
-        })
+        chain = agent_runtime.chain(COVER_LETTER_PROMPT)
+        inputs = _cover_letter_inputs(resume, job)
+        # A user is waiting on the cover letter whatever run created the match.
+        response = await llm_scheduler.run(
+            lambda: chain.ainvoke(inputs),
+            estimated_tokens=estimate_tokens(*inputs.values(), completion_tokens=COVER_LETTER_COMPLETION_TOKENS),
+            priority=LLMPriority.INTERACTIVE,
+        )
+        self._track_usage(response)
 
         return response.content
 
     async def _save_results(self, state: AgentState) -> AgentState:
-        """Save matched jobs to database and create daily tasks."""
+        """Save matched jobs to database and create daily tasks.
+
+        Runs a fixed number of set-based statements however many jobs matched:
+        one opportunity upsert (legacy results only), one match upsert, a task
+        update and insert, and one delete of stale open tasks.
+
+        Writes that would not change anything are skipped in SQL: an unchanged
+        legacy opportunity is not rewritten (one extra lookup then fetches its
+        id), an unchanged match only gets the run's `last_scored_at` (the same
+        statement returns its id), and tasks already in the right order are
+        not updated.
+        """
         matched = state.get("matched_jobs", [])
         now = datetime.now(timezone.utc)
         today = now.date()
-        current_match_ids: set[str] = set()
 
-        async with async_session_maker() as db:
-            prepared_jobs = []
-            for i, job_data in enumerate(matched):
-                source_type = job_data.get("source_type") or "legacy"
-                source_job_id = str(
-                    job_data.get("source_job_id")
-                    or job_data.get("linkedin_job_id")
-                    or job_data.get("url")
-                    or f"generated-{i}"
-                )
-                prepared_jobs.append((i, job_data, source_type, source_job_id))
-
-            source_keys = [(source_type, source_job_id) for _, _, source_type, source_job_id in prepared_jobs]
-            existing_opportunities: dict[tuple[str, str], Opportunity] = {}
-            if source_keys:
-                opportunity_result = await db.execute(
-                    select(Opportunity).where(
-                        tuple_(Opportunity.source_type, Opportunity.source_job_id).in_(source_keys)
-                    )
-                )
-                existing_opportunities = {
-                    (opportunity.source_type, opportunity.source_job_id): opportunity
-                    for opportunity in opportunity_result.scalars().all()
-                }
+        # Synced opportunities are owned by the source sync; rewriting them here
+        # would bump `updated_at` and make every saved match look changed to
+        # the next incremental run. Only legacy results are upserted.
+        synced_rows: list[tuple[int, dict, str]] = []
+        legacy_rows: dict[tuple[str, str], tuple[int, dict]] = {}
+        for i, job_data in enumerate(matched):
+            if job_data.get("opportunity_id"):
+                synced_rows.append((i, job_data, job_data["opportunity_id"]))
+                continue
+            source_type = job_data.get("source_type") or "legacy"
+            source_job_id = str(
+                job_data.get("source_job_id")
+                or job_data.get("linkedin_job_id")
+                or job_data.get("url")
+                or f"generated-{i}"
+            )
+            # One row per key: ON CONFLICT cannot touch the same row twice.
+            legacy_rows.setdefault((source_type, source_job_id), (i, job_data))
 
-            opportunity_rows: list[tuple[int, dict, Opportunity]] = []
-            for i, job_data, source_type, source_job_id in prepared_jobs:
-                opportunity = existing_opportunities.get((source_type, source_job_id))
-                if opportunity is None:
-                    opportunity = Opportunity(
-                        source_type=source_type,
-                        source_job_id=source_job_id,
-                        title=job_data["title"],
-                        company=job_data["company"],
-                        location=job_data.get("location"),
-                        salary=job_data.get("salary"),
-                        url=job_data.get("url"),
-                        description=job_data.get("description"),
-                        raw_payload=job_data.get("raw_payload"),
-                        posted_at=_parse_posted_at(job_data.get("posted_at")),
-                        is_open=True,
-                    )
-                    db.add(opportunity)
-                else:
-                    opportunity.title = job_data["title"]
-                    opportunity.company = job_data["company"]
-                    opportunity.location = job_data.get("location")
-                    opportunity.salary = job_data.get("salary")
-                    opportunity.url = job_data.get("url")
-                    opportunity.description = job_data.get("description")
-                    opportunity.raw_payload = job_data.get("raw_payload")
-                    opportunity.posted_at = _parse_posted_at(job_data.get("posted_at")) or opportunity.posted_at
-                    opportunity.is_open = True
-                    opportunity.last_seen_at = now
-                opportunity_rows.append((i, job_data, opportunity))
-
-            if opportunity_rows:
-                await db.flush()
-
-            opportunity_ids = [opportunity.id for _, _, opportunity in opportunity_rows]
-            existing_matches: dict[str, UserJobMatch] = {}
-            if opportunity_ids:
-                match_result = await db.execute(
-                    select(UserJobMatch).where(
-                        UserJobMatch.user_id == self.user_id,
-                        UserJobMatch.opportunity_id.in_(opportunity_ids),
-                    )
+        opportunities_skipped = 0
+        matches_unchanged = 0
+        matches_skipped = 0
+        async with async_session_maker() as db:
+            opportunity_rows = list(synced_rows)
+            if legacy_rows:
+                statement = pg_insert(Opportunity).values([
+                    {
+                        "id": str(uuid4()),
+                        "source_type": source_type,
+                        "source_job_id": source_job_id,
+                        "title": job_data["title"],
+                        "company": job_data["company"],
+                        "location": job_data.get("location"),
+                        "salary": job_data.get("salary"),
+                        "url": job_data.get("url"),
+                        "description": job_data.get("description"),
+                        "raw_payload": job_data.get("raw_payload"),
+                        "posted_at": _parse_posted_at(job_data.get("posted_at")),
+                        "is_open": True,
+                        "last_seen_at": now,
+                        **opportunity_attributes(job_data["title"], job_data["company"], job_data.get("location")),
+                    }
+                    for (source_type, source_job_id), (_, job_data) in legacy_rows.items()
+                ])
+                excluded = statement.excluded
+                posted_at = func.coalesce(excluded.posted_at, Opportunity.posted_at)
+                content_changed = or_(
+                    _any_changed(Opportunity, excluded, LEGACY_OPPORTUNITY_COLUMNS),
+                    posted_at.is_distinct_from(Opportunity.posted_at),
                 )
-                existing_matches = {
-                    user_match.opportunity_id: user_match
-                    for user_match in match_result.scalars().all()
+                statement = statement.on_conflict_do_update(
+                    constraint="uq_opportunities_source_job",
+                    set_={
+                        **{column: excluded[column] for column in LEGACY_OPPORTUNITY_COLUMNS},
+                        "posted_at": posted_at,
+                        "is_open": True,
+                        "last_seen_at": now,
+                        # ON CONFLICT skips Python-side onupdate hooks.
+                        "updated_at": case((content_changed, func.now()), else_=Opportunity.updated_at),
+                    },
+                    # Shared rows: no new row version unless something moved.
+                    where=or_(
+                        content_changed,
+                        Opportunity.is_open.is_not(True),
+                        Opportunity.last_seen_at.is_(None),
+                        Opportunity.last_seen_at < now - LAST_SEEN_RESOLUTION,
+                    ),
+                ).returning(Opportunity.id, Opportunity.source_type, Opportunity.source_job_id)
+                result = await db.execute(statement)
+                legacy_ids = {
+                    (source_type, source_job_id): opportunity_id
+                    for opportunity_id, source_type, source_job_id in result.all()
                 }
-
-            match_rows: list[tuple[int, UserJobMatch]] = []
-            for i, job_data, opportunity in opportunity_rows:
-                user_match = existing_matches.get(opportunity.id)
-                if user_match is None:
-                    user_match = UserJobMatch(
-                        user_id=self.user_id,
-                        opportunity_id=opportunity.id,
-                        match_score=job_data["match_score"],
-                        match_reason=job_data.get("match_reason"),
-                        matched_skills=job_data.get("matched_skills"),
-                        missing_skills=job_data.get("missing_skills"),
-                        cover_letter=job_data.get("cover_letter"),
+                # Rows the WHERE skipped are missing from RETURNING.
+                skipped_keys = [key for key in legacy_rows if key not in legacy_ids]
+                opportunities_skipped = len(skipped_keys)
+                if skipped_keys:
+                    result = await db.execute(
+                        select(Opportunity.id, Opportunity.source_type, Opportunity.source_job_id)
+                        .where(tuple_(Opportunity.source_type, Opportunity.source_job_id).in_(skipped_keys))
                     )
-                    db.add(user_match)
-                else:
-                    user_match.match_score = job_data["match_score"]
-                    user_match.match_reason = job_data.get("match_reason")
-                    user_match.matched_skills = job_data.get("matched_skills")
-                    user_match.missing_skills = job_data.get("missing_skills")
-                    if "cover_letter" in job_data:
-                        user_match.cover_letter = job_data.get("cover_letter")
-                    user_match.last_scored_at = now
-                match_rows.append((i, user_match))
-
+                    legacy_ids.update({
+                        (source_type, source_job_id): opportunity_id
+                        for opportunity_id, source_type, source_job_id in result.all()
+                    })
+                for key, opportunity_id in legacy_ids.items():
+                    i, job_data = legacy_rows[key]
+                    opportunity_rows.append((i, job_data, opportunity_id))
+                opportunity_rows.sort(key=lambda row: row[0])
+
+            match_rows: dict[str, tuple[int, dict]] = {}
+            for i, job_data, opportunity_id in opportunity_rows:
+                match_rows.setdefault(opportunity_id, (i, job_data))
+
+            task_orders: dict[str, int] = {}
             if match_rows:
-                await db.flush()
-
-            match_ids = [user_match.id for _, user_match in match_rows]
-            existing_tasks: dict[str, DailyTask] = {}
-            if match_ids:
-                task_result = await db.execute(
-                    select(DailyTask).where(
-                        DailyTask.user_job_match_id.in_(match_ids),
-                        func.date(DailyTask.date) == today,
+                statement = pg_insert(UserJobMatch).values([
+                    {
+                        "id": str(uuid4()),
+                        "user_id": self.user_id,
+                        "opportunity_id": opportunity_id,
+                        "match_score": job_data["match_score"],
+                        "match_reason": job_data.get("match_reason"),
+                        "matched_skills": job_data.get("matched_skills"),
+                        "missing_skills": job_data.get("missing_skills"),
+                        "cover_letter": job_data.get("cover_letter"),
+                        # Same stamp for every row: the next incremental run
+                        # finds this run's ranked set by it.
+                        "last_scored_at": now,
+                    }
+                    for opportunity_id, (_, job_data) in match_rows.items()
+                ])
+                excluded = statement.excluded
+                score_changed = _any_changed(UserJobMatch, excluded, MATCH_SCORE_COLUMNS)
+                statement = statement.on_conflict_do_update(
+                    constraint="uq_user_job_matches_user_opportunity",
+                    set_={
+                        **{column: excluded[column] for column in MATCH_SCORE_COLUMNS},
+                        # Rescoring keeps a letter the user already generated.
+                        "cover_letter": func.coalesce(excluded.cover_letter, UserJobMatch.cover_letter),
+                        "last_scored_at": now,
+                        "updated_at": case((score_changed, func.now()), else_=UserJobMatch.updated_at),
+                    },
+                    # Unchanged rows are left to the restamp below.
+                    where=or_(
+                        score_changed,
+                        and_(
+                            excluded.cover_letter.is_not(None),
+                            _distinct_from(UserJobMatch.cover_letter, excluded.cover_letter),
+                        ),
+                    ),
+                ).returning(
+                    UserJobMatch.id,
+                    UserJobMatch.opportunity_id,
+                    (UserJobMatch.updated_at == func.now()).label("written"),
+                )
+                result = await db.execute(statement)
+                returned = set()
+                for match_id, opportunity_id, written in result.all():
+                    returned.add(opportunity_id)
+                    task_orders[match_id] = match_rows[opportunity_id][0]
+                    matches_unchanged += not written
+                # Rows the WHERE skipped are missing from RETURNING.
+                skipped_ids = [opportunity_id for opportunity_id in match_rows if opportunity_id not in returned]
+                matches_skipped = len(skipped_ids)
+                matches_unchanged += matches_skipped
+                if skipped_ids:
+                    # Incremental runs and the digest find this run's ranked
+                    # set by its exact `last_scored_at`, so unchanged rows still
+                    # get the stamp. The column is not indexed, so Postgres can
+                    # do it as a heap-only update.
+                    result = await db.execute(
+                        update(UserJobMatch)
+                        .where(
+                            UserJobMatch.user_id == self.user_id,
+                            UserJobMatch.opportunity_id.in_(skipped_ids),
+                        )
+                        .values(last_scored_at=now)
+                        .returning(UserJobMatch.id, UserJobMatch.opportunity_id)
+                        .execution_options(synchronize_session=False)
                     )
+                    for match_id, opportunity_id in result.all():
+                        task_orders[match_id] = match_rows[opportunity_id][0]
+
+            if task_orders:
+                current = values(
+                    column("task_id", String),
+                    column("match_id", String),
+                    column("task_order", Integer),
+                    name="current_tasks",
+                ).data([(str(uuid4()), match_id, order) for match_id, order in task_orders.items()])
+                todays_task = and_(
+                    DailyTask.user_job_match_id == current.c.match_id,
+                    func.date(DailyTask.date) == today,
                 )
-                existing_tasks = {
-                    task.user_job_match_id: task
-                    for task in task_result.scalars().all()
-                    if task.user_job_match_id
-                }
-
-            for i, user_match in match_rows:
-                current_match_ids.add(user_match.id)
-                existing_task = existing_tasks.get(user_match.id)
-
-                if existing_task is None:
-                    task = DailyTask(
-                        user_job_match_id=user_match.id,
-                        task_order=i,
+                await db.execute(
+                    update(DailyTask)
+                    .where(todays_task, DailyTask.task_order.is_distinct_from(current.c.task_order))
+                    .values(task_order=current.c.task_order)
+                    .execution_options(synchronize_session=False)
+                )
+                await db.execute(
+                    insert(DailyTask).from_select(
+                        ["id", "user_job_match_id", "task_order", "is_completed"],
+                        select(current.c.task_id, current.c.match_id, current.c.task_order, literal(False))
+                        .where(~exists().where(todays_task)),
                     )
-                    db.add(task)
-                else:
-                    existing_task.task_order = i
-
-            if current_match_ids:
-                stale_tasks_result = await db.execute(
-                    select(DailyTask)
-                    .join(DailyTask.user_job_match)
+                )
+                await db.execute(
+                    delete(DailyTask)
                     .where(
-                        UserJobMatch.user_id == self.user_id,
                         func.date(DailyTask.date) == today,
+                        DailyTask.is_completed.is_not(True),
+                        DailyTask.user_job_match_id.in_(
+                            select(UserJobMatch.id).where(UserJobMatch.user_id == self.user_id)
+                        ),
+                        DailyTask.user_job_match_id.not_in(list(task_orders)),
                     )
+                    .execution_options(synchronize_session=False)
                 )
-                for task in stale_tasks_result.scalars().all():
-                    if task.user_job_match_id not in current_match_ids and not task.is_completed:
-                        await db.delete(task)
 
             await db.commit()
 
-        return state
+        candidate_stats = {
+            **state.get("candidate_stats", {}),
+            "saved_opportunities_skipped": opportunities_skipped,
+            "saved_matches_unchanged": matches_unchanged,
+            "saved_matches_skipped": matches_skipped,
+        }
+        return {**state, "candidate_stats": candidate_stats}
 
     async def run(self) -> dict:
-        """Execute the job matching workflow."""
-        workflow = self._create_workflow()
+        """Execute the job matching workflow and record it in `match_runs`."""
+        self.metrics = RunMetrics()
+        with track_db(self.metrics):
+            result = await self._run_workflow()
+        await match_run_service.record(
+            user_id=self.user_id,
+            trigger=self.trigger,
+            metrics=self.metrics,
+            result=result,
+        )
+        return result
 
+    async def _run_workflow(self) -> dict:
         initial_state: AgentState = {
             "resume_text": "",
             "preferences": {},
@@ -764,16 +1527,30 @@ Do not include placeholders like [Your Name] - write it ready to use.
             "matched_jobs": [],
             "threshold": settings.MATCH_THRESHOLD,
             "resume_embedding": None,
+            "resume_chunk_embeddings": [],
             "candidate_stats": {},
+            "previous_run_at": None,
+            "incremental_since": None,
             "error": None
         }
 
         # Configure with higher recursion limit for adaptive threshold iterations
-        config = {"recursion_limit": 50}
+        config = {"recursion_limit": 50, "configurable": {"agent": self}}
 
         try:
             logger.info("Starting job matching workflow...")
-            final_state = await workflow.ainvoke(initial_state, config=config)
+            final_state = dict(initial_state)
+            async for node_update in agent_runtime.workflow.astream(initial_state, config=config, stream_mode="updates"):
+                for node, node_state in node_update.items():
+                    self.metrics.end_stage(node)
+                    final_state.update(node_state or {})
+                    self._emit("stage", {
+                        "stage": node,
+                        "candidate_stats": final_state.get("candidate_stats", {}),
+                        "scored": len(final_state.get("scored_jobs", [])),
+                        "matched": len(final_state.get("matched_jobs", [])),
+                        "threshold": final_state.get("threshold"),
+                    })
             matched_jobs = final_state.get("matched_jobs", [])
             source_counts: dict[str, int] = {}
             for job in matched_jobs:
@@ -790,3 +1567,113 @@ Do not include placeholders like [Your Name] - write it ready to use.
         except Exception as e:
             logger.error(f"Agent workflow error: {e}")
             return {"success": False, "error": str(e)}
+
+
+def _agent_node(method: str):
+    """Graph node that runs `method` on the agent passed in the run config.
+
+    The compiled graph is shared across runs and users, so the per-run agent
+    (user id, candidate pool, priority, progress listener) travels in
+    `config["configurable"]["agent"]` rather than being bound at compile time.
+    """
+    async def node(state: AgentState, config: RunnableConfig) -> AgentState:
+        return await getattr(config["configurable"]["agent"], method)(state)
+
+    return node
+
+
+def _route_after_filter(state: AgentState, config: RunnableConfig) -> str:
+    return config["configurable"]["agent"]._should_continue(state)
+
+
+def _build_workflow():
+    """Compile the job matching graph."""
+    workflow = StateGraph(AgentState)
+
+    # Add nodes
+    workflow.add_node("fetch_context", _agent_node("_fetch_context"))
+    workflow.add_node("search_jobs", _agent_node("_search_jobs"))
+    workflow.add_node("analyze_matches", _agent_node("_analyze_matches"))
+    workflow.add_node("merge_previous_matches", _agent_node("_merge_previous_matches"))
+    workflow.add_node("filter_and_adjust", _agent_node("_filter_and_adjust"))
+    workflow.add_node("save_results", _agent_node("_save_results"))
+
+    # Define edges
+    workflow.set_entry_point("fetch_context")
+    workflow.add_edge("fetch_context", "search_jobs")
+    workflow.add_edge("search_jobs", "analyze_matches")
+    workflow.add_edge("analyze_matches", "merge_previous_matches")
+    workflow.add_edge("merge_previous_matches", "filter_and_adjust")
+
+    # Conditional edge: check if we have enough matches
+    workflow.add_conditional_edges(
+        "filter_and_adjust",
+        _route_after_filter,
+        {
+            "save": "save_results",
+            "retry": "filter_and_adjust",
+            "end": END
+        }
+    )
+
+    workflow.add_edge("save_results", END)
+
+    return workflow.compile()
+
+
+class AgentRuntime:
+    """Process-wide pieces shared by every `JobMatchingAgent` run.
+
+    Holds the compiled workflow, one pooled chat model client, and the
+    prompt | model chains, all built on first use. `JobMatchingAgent` itself
+    only carries per-run state, so the nightly push and each refresh skip
+    graph compilation and client setup.
+
+    Changing `OPENAI_API_KEY` at runtime needs `reset()`.
+    """
+
+    def __init__(self) -> None:
+        self._llm: Optional[ChatOpenAI] = None
+        self._linkedin_service: Optional[LinkedInService] = None
+        self._workflow = None
+        self._chains: dict[int, Runnable] = {}
+
+    @property
+    def llm(self) -> ChatOpenAI:
+        if self._llm is None:
+            self._llm = ChatOpenAI(
+                model=MATCH_LLM_MODEL,
+                openai_api_key=settings.OPENAI_API_KEY,
+                temperature=0.3,
+                # Streamed cover letters report usage on their last chunk.
+                stream_usage=True,
+            )
+        return self._llm
+
+    @property
+    def linkedin_service(self) -> LinkedInService:
+        if self._linkedin_service is None:
+            self._linkedin_service = LinkedInService()
+        return self._linkedin_service
+
+    @property
+    def workflow(self):
+        if self._workflow is None:
+            self._workflow = _build_workflow()
+        return self._workflow
+
+    def chain(self, prompt: ChatPromptTemplate) -> Runnable:
+        chain = self._chains.get(id(prompt))
+        if chain is None:
+            chain = self._chains[id(prompt)] = prompt | self.llm
+        return chain
+
+    def reset(self) -> None:
+        self._llm = None
+        self._linkedin_service = None
+        self._workflow = None
+        self._chains.clear()
+
+
+# Process-wide singleton. Import this instead of instantiating new runtimes.
+agent_runtime = AgentRuntime()
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import logging
+from typing import Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.models.models import Opportunity, Resume
+from app.services.vector_recall import OpportunityVectorIndex, PgvectorRecall, opportunity_vector_index
+
+logger = logging.getLogger(__name__)
+
+RECENT_POOL_SIZE = 200
+
+
+def candidate_limit() -> int:
+    """How many prefiltered candidates one matching run keeps."""
+    return max(settings.TARGET_JOBS * 3, 20)
+
+
+def vector_recall_limit(limit: int) -> int:
+    """How many nearest opportunities vector recall fetches for `limit` candidates."""
+    return max(limit * 4, 80)
+
+
+def rank_positions(ids: Sequence[str]) -> dict[str, int]:
+    """1-based rank of each id in an ordered list; repeats keep their first rank."""
+    positions: dict[str, int] = {}
+    for opportunity_id in ids:
+        positions.setdefault(opportunity_id, len(positions) + 1)
+    return positions
+
+
+def reciprocal_rank_fusion(
+    rankings: dict[str, dict[str, int]],
+    weights: dict[str, float],
+    k: int,
+) -> dict[str, float]:
+    """Weighted RRF: each source adds `weight / (k + rank)` for the ids it ranked.
+
+    Only ranks matter, so scores on different scales (cosine distance,
+    ts_rank, recency) fuse without normalization. Sources with weight 0 or
+    missing from `weights` are ignored.
+    """
+    fused: dict[str, float] = {}
+    for source, ranks in rankings.items():
+        weight = weights.get(source, 0.0)
+        if weight <= 0:
+            continue
+        for opportunity_id, rank in ranks.items():
+            fused[opportunity_id] = fused.get(opportunity_id, 0.0) + weight / (k + rank)
+    return fused
+
+
+def fusion_weights() -> dict[str, float]:
+    return {
+        "vector": settings.MATCH_RRF_VECTOR_WEIGHT,
+        "lexical": settings.MATCH_RRF_LEXICAL_WEIGHT,
+        "preference": settings.MATCH_RRF_PREFERENCE_WEIGHT,
+        "recent": settings.MATCH_RRF_RECENT_WEIGHT,
+        "chunk": settings.MATCH_RRF_CHUNK_WEIGHT,
+    }
+
+
+@dataclass
+class CandidatePool:
+    """Recall results computed once for many users.
+
+    `JobMatchingAgent` reads its candidate ids from here instead of querying
+    the catalog itself, so a batch push pays for one pool load and one
+    vectorized users x opportunities product rather than a vector query and a
+    recency query per user.
+    """
+
+    recent_ids: list[str] = field(default_factory=list)
+    vector_hits: dict[str, list[tuple[str, float]]] = field(default_factory=dict)
+    # Size of the in-process matrix; 0 when Postgres answered recall.
+    open_opportunities: int = 0
+    # The matrix the pool was recalled from, if any; agents read candidate
+    # vectors from it for chunk scoring instead of fetching embeddings again.
+    index: Optional[OpportunityVectorIndex] = None
+
+    def hits_for(self, user_id: str) -> list[tuple[str, float]]:
+        return self.vector_hits.get(user_id, [])
+
+
+async def _load_resume_embeddings(db: AsyncSession, user_ids: Sequence[str]) -> dict[str, list[float]]:
+    # Latest resume per user, matching what the agent's fetch_context step reads.
+    result = await db.execute(
+        select(Resume.user_id, Resume.embedding)
+        .where(Resume.user_id.in_(list(user_ids)))
+        .distinct(Resume.user_id)
+        .order_by(Resume.user_id, Resume.uploaded_at.desc())
+    )
+    return {
+        user_id: embedding
+        for user_id, embedding in result.all()
+        if embedding is not None
+    }
+
+
+async def build_candidate_pool(
+    user_ids: Sequence[str],
+    index: OpportunityVectorIndex | None = None,
+    session_factory=None,
+) -> CandidatePool:
+    """Recall for every user once, sharing the recency query between them.
+
+    With `MATCH_RECALL_BACKEND=numpy` the users are ranked in one pass over
+    the process-wide matrix, whose first build reads the whole catalog and
+    later pools (one per queue claim) pull just the rows changed since. With
+    pgvector each user gets one HNSW query and no embeddings are held here.
+    """
+    session_factory = session_factory or async_session_maker
+    if index is None and settings.MATCH_RECALL_BACKEND == "numpy":
+        index = opportunity_vector_index
+
+    async with session_factory() as db:
+        if index is not None:
+            await index.ensure_fresh(db)
+        recent_result = await db.execute(
+            select(Opportunity.id)
+            .where(Opportunity.is_open.is_(True))
+            .order_by(Opportunity.last_seen_at.desc(), Opportunity.updated_at.desc())
+            .limit(RECENT_POOL_SIZE)
+        )
+        recent_ids = list(recent_result.scalars().all())
+        embeddings_by_user = await _load_resume_embeddings(db, user_ids) if user_ids else {}
+        pool_users = list(embeddings_by_user)
+        recall_limit = vector_recall_limit(candidate_limit())
+        if index is None:
+            recall = PgvectorRecall()
+            hits = [await recall.recall(db, embeddings_by_user[user_id], recall_limit) for user_id in pool_users]
+
+    if index is not None:
+        hits = index.search_many([embeddings_by_user[user_id] for user_id in pool_users], recall_limit)
+    open_opportunities = len(index) if index is not None else 0
+    logger.info(
+        "Candidate pool ready: %s users with resume embeddings, %s recall",
+        len(pool_users),
+        "numpy" if index is not None else "pgvector",
+    )
+    return CandidatePool(
+        recent_ids=recent_ids,
+        vector_hits=dict(zip(pool_users, hits)),
+        open_opportunities=open_opportunities,
+        index=index,
+    )
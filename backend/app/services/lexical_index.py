@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from datetime import datetime, timedelta
+import logging
+import math
+from time import monotonic
+from typing import Iterable, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.core.text import search_terms
+from app.models.models import Opportunity
+
+logger = logging.getLogger(__name__)
+
+# Same reasoning as the vector index: `updated_at` is the writer's transaction
+# start time, so re-read a window behind the newest stamp already applied.
+_WATERMARK_OVERLAP = timedelta(minutes=15)
+
+# Okapi BM25 parameters.
+BM25_K1 = 1.2
+BM25_B = 0.75
+# A title word counts this many times as a description word.
+TITLE_WEIGHT = 3
+
+
+def document_terms(title: Optional[str], description: Optional[str]) -> Counter:
+    terms = Counter(search_terms(description))
+    for term in search_terms(title):
+        terms[term] += TITLE_WEIGHT
+    return terms
+
+
+def _tokenize_rows(rows: Iterable[Sequence]) -> list[tuple[str, Optional[Counter], Optional[datetime]]]:
+    return [
+        (opportunity_id, document_terms(title, description) if is_open else None, updated_at)
+        for opportunity_id, title, description, is_open, updated_at in rows
+    ]
+
+
+class OpportunityLexicalIndex:
+    """In-process BM25 inverted index over open opportunity titles and descriptions.
+
+    Postings map each term to `{opportunity_id: term frequency}`, so scoring a
+    query touches only the postings of its terms. Like
+    `OpportunityVectorIndex`, the index is refreshed incrementally from
+    `Opportunity.updated_at`; the sync service marks it stale after each run.
+
+    Matching runs never build it themselves: they call `refresh_in_background`
+    and skip the BM25 prerank until the first build is done. Tokenizing runs in
+    a worker thread so a cold build does not stall the event loop.
+    """
+
+    def __init__(self) -> None:
+        self._postings: dict[str, dict[str, int]] = {}
+        self._doc_terms: dict[str, tuple[str, ...]] = {}
+        self._doc_lengths: dict[str, int] = {}
+        self._total_length = 0
+        self._watermark: Optional[datetime] = None
+        self._refreshed_at: Optional[float] = None
+        self._stale = True
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    @property
+    def is_warm(self) -> bool:
+        """True once a first build finished; scores may then lag a sync briefly."""
+        return self._refreshed_at is not None
+
+    @property
+    def watermark(self) -> Optional[datetime]:
+        return self._watermark
+
+    def mark_stale(self) -> None:
+        """Force the next scoring run to pull recent changes first."""
+        self._stale = True
+
+    def needs_refresh(self) -> bool:
+        if self._stale or self._refreshed_at is None:
+            return True
+        return monotonic() - self._refreshed_at >= settings.MATCH_RECALL_REFRESH_SECONDS
+
+    async def ensure_fresh(self, db: AsyncSession) -> None:
+        if not self.needs_refresh():
+            return
+        async with self._lock:
+            if self.needs_refresh():
+                await self.refresh(db)
+
+    def refresh_in_background(self, session_factory=None) -> None:
+        """Start a refresh on its own session unless one is already running."""
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        self._refresh_task = asyncio.create_task(self._background_refresh(session_factory or async_session_maker))
+
+    async def _background_refresh(self, session_factory) -> None:
+        try:
+            async with session_factory() as db:
+                await self.ensure_fresh(db)
+        except Exception:
+            logger.exception("Lexical index refresh failed")
+
+    async def refresh(self, db: AsyncSession) -> int:
+        """Apply opportunities changed since the last refresh. Returns rows applied."""
+        query = select(
+            Opportunity.id,
+            Opportunity.title,
+            Opportunity.description,
+            Opportunity.is_open,
+            Opportunity.updated_at,
+        )
+        if self._watermark is None:
+            query = query.where(Opportunity.is_open.is_(True))
+        else:
+            query = query.where(Opportunity.updated_at > self._watermark - _WATERMARK_OVERLAP)
+
+        result = await db.execute(query)
+        rows = result.all()
+        self._merge(await asyncio.to_thread(_tokenize_rows, rows))
+        self._refreshed_at = monotonic()
+        self._stale = False
+        logger.info("Lexical index refreshed: %s rows applied, %s open documents", len(rows), len(self))
+        return len(rows)
+
+    def apply_rows(self, rows: Iterable[Sequence]) -> None:
+        """Merge `(id, title, description, is_open, updated_at)` rows into the index."""
+        self._merge(_tokenize_rows(rows))
+
+    def _merge(self, documents: Iterable[tuple[str, Optional[Counter], Optional[datetime]]]) -> None:
+        # Runs on the event loop, so `score` never sees a half-applied batch.
+        watermark = self._watermark
+        for opportunity_id, terms, updated_at in documents:
+            if updated_at is not None and (watermark is None or updated_at > watermark):
+                watermark = updated_at
+            self._remove(opportunity_id)
+            if terms is not None:
+                self._add(opportunity_id, terms)
+        self._watermark = watermark
+
+    def _add(self, opportunity_id: str, terms: Counter) -> None:
+        for term, frequency in terms.items():
+            self._postings.setdefault(term, {})[opportunity_id] = frequency
+        length = sum(terms.values())
+        self._doc_terms[opportunity_id] = tuple(terms)
+        self._doc_lengths[opportunity_id] = length
+        self._total_length += length
+
+    def _remove(self, opportunity_id: str) -> None:
+        terms = self._doc_terms.pop(opportunity_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(opportunity_id, None)
+            if not postings:
+                del self._postings[term]
+        self._total_length -= self._doc_lengths.pop(opportunity_id)
+
+    def score(self, query: str, opportunity_ids: Sequence[str]) -> dict[str, float]:
+        """BM25 score of `query` for each of `opportunity_ids`. Unknown ids score 0."""
+        scores = dict.fromkeys(opportunity_ids, 0.0)
+        document_count = len(self._doc_lengths)
+        if not scores or document_count == 0:
+            return scores
+
+        average_length = self._total_length / document_count or 1.0
+        candidates = set(scores)
+        for term in set(search_terms(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (document_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for opportunity_id in candidates & postings.keys():
+                frequency = postings[opportunity_id]
+                norm = 1 - BM25_B + BM25_B * self._doc_lengths[opportunity_id] / average_length
+                scores[opportunity_id] += idf * frequency * (BM25_K1 + 1) / (frequency + BM25_K1 * norm)
+        return scores
+
+
+def prerank(
+    opportunity_ids: Sequence[str],
+    lexical_scores: dict[str, float],
+    vector_distances: dict[str, float],
+    lexical_weight: float,
+) -> list[str]:
+    """Order ids by a blend of max-normalized BM25 and cosine similarity.
+
+    Ties, including every id when neither signal is available, keep the
+    incoming order, which is the structured prefilter's ranking.
+    """
+    top_lexical = max(lexical_scores.values(), default=0.0)
+    weight = min(1.0, max(0.0, lexical_weight))
+
+    def blended(opportunity_id: str) -> float:
+        lexical = lexical_scores.get(opportunity_id, 0.0) / top_lexical if top_lexical > 0 else 0.0
+        distance = vector_distances.get(opportunity_id)
+        similarity = 1.0 - distance if distance is not None else 0.0
+        return weight * lexical + (1 - weight) * similarity
+
+    return sorted(opportunity_ids, key=blended, reverse=True)
+
+
+# Process-wide singleton. The sync service marks it stale after each run.
+opportunity_lexical_index = OpportunityLexicalIndex()
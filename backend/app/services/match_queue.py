@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import logging
+import os
+import socket
+from typing import AsyncIterator, Optional, Sequence
+from uuid import uuid4
+
+from sqlalchemy import Interval, and_, case, literal, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.sql import func
+
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.core.enums import MatchJobStatus
+from app.models.models import MatchJob
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ClaimedJob:
+    id: str
+    user_id: str
+    scored_since: datetime
+    attempts: int
+
+
+def _seconds(value: int) -> timedelta:
+    return timedelta(seconds=max(1, value))
+
+
+class MatchJobQueue:
+    """Postgres work queue of per-user match jobs (`match_jobs`).
+
+    `claim` hands each queued row to exactly one worker (`FOR UPDATE SKIP
+    LOCKED`) under a lease. Workers renew their leases with `heartbeat` while
+    they run; a lease left to expire is claimable again, and a job that keeps
+    failing is parked as `failed` after `MATCH_QUEUE_MAX_ATTEMPTS`.
+
+    All times are the database's `now()`, so worker clocks may disagree.
+    """
+
+    def __init__(self, session_factory=None, worker_id: Optional[str] = None):
+        self._session_factory = session_factory or async_session_maker
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
+    async def enqueue(self, user_ids: Sequence[str], *, batch_key: str, scored_since: datetime) -> int:
+        """Queue one job per user. Users already queued under `batch_key` are
+        skipped, so every process may enqueue the same push."""
+        if not user_ids:
+            return 0
+        statement = (
+            pg_insert(MatchJob)
+            .values([
+                {
+                    "id": str(uuid4()),
+                    "user_id": user_id,
+                    "batch_key": batch_key,
+                    "scored_since": scored_since,
+                    "status": MatchJobStatus.QUEUED,
+                    "attempts": 0,
+                }
+                for user_id in dict.fromkeys(user_ids)
+            ])
+            .on_conflict_do_nothing(constraint="uq_match_jobs_user_batch")
+            .returning(MatchJob.id)
+        )
+        async with self._session_factory() as db:
+            result = await db.execute(statement)
+            inserted = len(result.scalars().all())
+            await db.commit()
+        return inserted
+
+    async def claim(self, limit: int) -> list[ClaimedJob]:
+        """Lease up to `limit` runnable jobs to this worker.
+
+        Claim only what can start now: a leased job waiting behind others in
+        this process is one another worker could be running.
+        """
+        limit = max(1, limit)
+        max_attempts = max(1, settings.MATCH_QUEUE_MAX_ATTEMPTS)
+        lease_expired = and_(
+            MatchJob.status == MatchJobStatus.LEASED,
+            MatchJob.lease_expires_at < func.now(),
+        )
+        runnable = (
+            select(MatchJob.id)
+            .where(
+                or_(
+                    and_(MatchJob.status == MatchJobStatus.QUEUED, MatchJob.available_at <= func.now()),
+                    lease_expired,
+                ),
+                MatchJob.attempts < max_attempts,
+            )
+            .order_by(MatchJob.available_at, MatchJob.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        statement = (
+            update(MatchJob)
+            .where(MatchJob.id.in_(runnable.scalar_subquery()))
+            .values(
+                status=MatchJobStatus.LEASED,
+                leased_by=self.worker_id,
+                lease_expires_at=func.now() + _seconds(settings.MATCH_QUEUE_LEASE_SECONDS),
+                attempts=MatchJob.attempts + 1,
+            )
+            .returning(MatchJob.id, MatchJob.user_id, MatchJob.scored_since, MatchJob.attempts)
+            .execution_options(synchronize_session=False)
+        )
+        async with self._session_factory() as db:
+            # A worker that died on its last attempt leaves a lease nobody may
+            # claim; park it so it stops looking in progress.
+            await db.execute(
+                update(MatchJob)
+                .where(lease_expired, MatchJob.attempts >= max_attempts)
+                .values(
+                    status=MatchJobStatus.FAILED,
+                    last_error=func.coalesce(MatchJob.last_error, "lease expired"),
+                    finished_at=func.now(),
+                )
+                .execution_options(synchronize_session=False)
+            )
+            result = await db.execute(statement)
+            rows = result.all()
+            await db.commit()
+        return [
+            ClaimedJob(id=row.id, user_id=row.user_id, scored_since=row.scored_since, attempts=row.attempts)
+            for row in rows
+        ]
+
+    async def heartbeat(self) -> int:
+        """Extend every lease this worker holds. Returns how many it still holds."""
+        statement = (
+            update(MatchJob)
+            .where(MatchJob.leased_by == self.worker_id, MatchJob.status == MatchJobStatus.LEASED)
+            .values(lease_expires_at=func.now() + _seconds(settings.MATCH_QUEUE_LEASE_SECONDS))
+            .returning(MatchJob.id)
+            .execution_options(synchronize_session=False)
+        )
+        async with self._session_factory() as db:
+            result = await db.execute(statement)
+            held = len(result.scalars().all())
+            await db.commit()
+        return held
+
+    async def complete(self, job_id: str) -> bool:
+        """Mark a job done. False when the lease was lost to another worker."""
+        statement = (
+            update(MatchJob)
+            .where(self._held(job_id))
+            .values(
+                status=MatchJobStatus.DONE,
+                lease_expires_at=None,
+                last_error=None,
+                finished_at=func.now(),
+            )
+            .returning(MatchJob.id)
+            .execution_options(synchronize_session=False)
+        )
+        async with self._session_factory() as db:
+            result = await db.execute(statement)
+            done = result.scalar_one_or_none() is not None
+            await db.commit()
+        return done
+
+    async def fail(self, job_id: str, error: str) -> bool:
+        """Requeue a job with linear backoff, or park it once out of attempts."""
+        exhausted = MatchJob.attempts >= max(1, settings.MATCH_QUEUE_MAX_ATTEMPTS)
+        backoff = literal(_seconds(settings.MATCH_QUEUE_RETRY_SECONDS), Interval) * MatchJob.attempts
+        statement = (
+            update(MatchJob)
+            .where(self._held(job_id))
+            .values(
+                status=case((exhausted, MatchJobStatus.FAILED), else_=MatchJobStatus.QUEUED),
+                available_at=func.now() + backoff,
+                leased_by=None,
+                lease_expires_at=None,
+                last_error=error[:2000],
+                finished_at=case((exhausted, func.now()), else_=None),
+            )
+            .returning(MatchJob.id)
+            .execution_options(synchronize_session=False)
+        )
+        async with self._session_factory() as db:
+            result = await db.execute(statement)
+            released = result.scalar_one_or_none() is not None
+            await db.commit()
+        return released
+
+    @asynccontextmanager
+    async def lease_heartbeat(self) -> AsyncIterator[None]:
+        """Renew this worker's leases in the background for the block's duration."""
+        interval = max(1, settings.MATCH_QUEUE_LEASE_SECONDS) / 3
+
+        async def beat() -> None:
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    await self.heartbeat()
+                except Exception:
+                    # The next beat may succeed before the lease runs out.
+                    logger.exception("Match queue heartbeat failed for %s", self.worker_id)
+
+        task = asyncio.create_task(beat())
+        try:
+            yield
+        finally:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def _held(self, job_id: str):
+        return and_(
+            MatchJob.id == job_id,
+            MatchJob.leased_by == self.worker_id,
+            MatchJob.status == MatchJobStatus.LEASED,
+        )
+
+
+# Process-wide singleton. Its worker id names this process in `leased_by`.
+match_job_queue = MatchJobQueue()
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+import logging
+from time import perf_counter
+from typing import Any, Iterator, Optional
+
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.core.database import async_session_maker, engine
+from app.core.enums import MatchRunStatus
+from app.models.models import MatchRun
+
+logger = logging.getLogger(__name__)
+
+# Statements executed while a run is tracked are charged to it, including
+# those from tasks it spawns (they inherit the context).
+_current_run: ContextVar[Optional["RunMetrics"]] = ContextVar("match_run_metrics", default=None)
+_QUERY_STARTS = "match_run_query_starts"
+
+
+@dataclass
+class RunMetrics:
+    """Counters for one agent run, filled in as the run goes.
+
+    DB time is summed per statement, so stages that query concurrently can
+    report more DB time than wall time.
+    """
+    started_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    db_seconds: float = 0.0
+    db_queries: int = 0
+    llm_requests: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    # node -> {"calls", "ms", "db_ms", "db_queries"}
+    stages: dict[str, dict[str, float]] = field(default_factory=dict)
+    _clock: float = field(default_factory=perf_counter, repr=False)
+    _stage_clock: float = field(default_factory=perf_counter, repr=False)
+    _stage_db: tuple[float, int] = (0.0, 0)
+
+    @property
+    def elapsed_ms(self) -> int:
+        return round((perf_counter() - self._clock) * 1000)
+
+    def add_usage(self, response: Any) -> None:
+        self.llm_requests += 1
+        usage = getattr(response, "usage_metadata", None)
+        if isinstance(usage, dict):
+            self.prompt_tokens += int(usage.get("input_tokens") or 0)
+            self.completion_tokens += int(usage.get("output_tokens") or 0)
+
+    def end_stage(self, node: str) -> None:
+        """Charge the time since the previous stage ended to `node`."""
+        now = perf_counter()
+        db_seconds, db_queries = self._stage_db
+        stage = self.stages.setdefault(node, {"calls": 0, "ms": 0.0, "db_ms": 0.0, "db_queries": 0})
+        stage["calls"] += 1
+        stage["ms"] = round(stage["ms"] + (now - self._stage_clock) * 1000, 1)
+        stage["db_ms"] = round(stage["db_ms"] + (self.db_seconds - db_seconds) * 1000, 1)
+        stage["db_queries"] += self.db_queries - db_queries
+        self._stage_clock = now
+        self._stage_db = (self.db_seconds, self.db_queries)
+
+
+@contextmanager
+def track_db(metrics: RunMetrics) -> Iterator[RunMetrics]:
+    token = _current_run.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current_run.reset(token)
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _current_run.get() is not None:
+        conn.info.setdefault(_QUERY_STARTS, []).append(perf_counter())
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    metrics = _current_run.get()
+    starts = conn.info.get(_QUERY_STARTS)
+    if metrics is None or not starts:
+        return
+    metrics.db_seconds += perf_counter() - starts.pop()
+    metrics.db_queries += 1
+
+
+def _stat(candidate_stats: dict[str, Any], key: str) -> int:
+    value = candidate_stats.get(key)
+    return int(value) if isinstance(value, (int, float)) else 0
+
+
+class MatchRunService:
+    """Persists one `match_runs` row per agent run.
+
+    Recording is best effort: a failed insert is logged and never fails the
+    run it describes.
+    """
+
+    def __init__(self, session_factory=None):
+        self._session_factory = session_factory or async_session_maker
+
+    async def record(
+        self,
+        *,
+        user_id: str,
+        trigger: str,
+        metrics: RunMetrics,
+        result: dict[str, Any],
+    ) -> Optional[MatchRun]:
+        if not settings.MATCH_RUN_RECORDING:
+            return None
+
+        candidate_stats = result.get("candidate_stats") or {}
+        run = MatchRun(
+            user_id=user_id,
+            trigger=trigger,
+            status=MatchRunStatus.SUCCESS if result.get("success") else MatchRunStatus.FAILED,
+            error_message=result.get("error"),
+            started_at=metrics.started_at,
+            finished_at=datetime.now(timezone.utc),
+            duration_ms=metrics.elapsed_ms,
+            db_ms=round(metrics.db_seconds * 1000),
+            db_queries=metrics.db_queries,
+            stage_timings=metrics.stages,
+            llm_requests=metrics.llm_requests,
+            prompt_tokens=metrics.prompt_tokens,
+            completion_tokens=metrics.completion_tokens,
+            llm_cache_hits=_stat(candidate_stats, "llm_cache_hits"),
+            open_opportunities=_stat(candidate_stats, "open_opportunities"),
+            scored_candidates=_stat(candidate_stats, "scored_candidates"),
+            llm_scored_candidates=_stat(candidate_stats, "llm_scored_candidates"),
+            jobs_found=int(result.get("jobs_found") or 0),
+            candidate_stats=candidate_stats,
+        )
+        try:
+            async with self._session_factory() as db:
+                db.add(run)
+                await db.commit()
+        except Exception:
+            logger.exception("Could not record match run for user %s", user_id)
+            return None
+        return run
+
+
+match_run_service = MatchRunService()
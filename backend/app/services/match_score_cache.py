@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+import hashlib
+import logging
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core.database import async_session_maker
+from app.models.models import MatchScoreCacheEntry
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(*parts: Optional[str]) -> str:
+    """Stable digest of prompt-visible text. Parts are length-prefixed so
+    ("ab", "c") and ("a", "bc") cannot collide."""
+    digest = hashlib.sha256()
+    for part in parts:
+        encoded = (part or "").encode("utf-8")
+        digest.update(f"{len(encoded)}:".encode("ascii"))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+
+def opportunity_content_hash(job: dict) -> str:
+    return content_hash(
+        job.get("title"),
+        job.get("company"),
+        job.get("location"),
+        job.get("description"),
+    )
+
+
+class MatchScoreCacheService:
+    """Read-through store for LLM match scores.
+
+    A cache outage must never fail a match run, so both operations log and
+    degrade to "everything missed" / "nothing stored" instead of raising.
+    """
+
+    def __init__(self, session_factory=None):
+        self._session_factory = session_factory or async_session_maker
+
+    async def lookup(
+        self,
+        resume_hash: str,
+        profile_hash: str,
+        prompt_version: str,
+        opportunity_hashes: list[str],
+    ) -> dict[str, dict]:
+        if not opportunity_hashes:
+            return {}
+        try:
+            async with self._session_factory() as db:
+                result = await db.execute(
+                    select(MatchScoreCacheEntry).where(
+                        MatchScoreCacheEntry.resume_hash == resume_hash,
+                        MatchScoreCacheEntry.profile_hash == profile_hash,
+                        MatchScoreCacheEntry.prompt_version == prompt_version,
+                        MatchScoreCacheEntry.opportunity_hash.in_(set(opportunity_hashes)),
+                    )
+                )
+                entries = result.scalars().all()
+                if entries:
+                    # Recency for retention only; one statement for all hits.
+                    await db.execute(
+                        update(MatchScoreCacheEntry)
+                        .where(MatchScoreCacheEntry.id.in_([entry.id for entry in entries]))
+                        .values(last_used_at=datetime.now(timezone.utc))
+                    )
+                    await db.commit()
+        except Exception:
+            logger.exception("Match score cache lookup failed; scoring without cache")
+            return {}
+
+        return {
+            entry.opportunity_hash: {
+                "score": entry.score,
+                "reason": entry.reason or "",
+                "matched_skills": entry.matched_skills or [],
+                "missing_skills": entry.missing_skills or [],
+            }
+            for entry in entries
+        }
+
+    async def store(
+        self,
+        resume_hash: str,
+        profile_hash: str,
+        prompt_version: str,
+        scores_by_hash: dict[str, dict],
+    ) -> None:
+        if not scores_by_hash:
+            return
+        now = datetime.now(timezone.utc)
+        rows = [
+            {
+                "id": content_hash(resume_hash, profile_hash, prompt_version, opportunity_hash),
+                "resume_hash": resume_hash,
+                "profile_hash": profile_hash,
+                "prompt_version": prompt_version,
+                "opportunity_hash": opportunity_hash,
+                "score": score_data["score"],
+                "reason": score_data.get("reason"),
+                "matched_skills": score_data.get("matched_skills") or [],
+                "missing_skills": score_data.get("missing_skills") or [],
+                "last_used_at": now,
+            }
+            for opportunity_hash, score_data in scores_by_hash.items()
+        ]
+        statement = pg_insert(MatchScoreCacheEntry).values(rows)
+        statement = statement.on_conflict_do_update(
+            constraint="uq_match_score_cache_key",
+            set_={
+                "score": statement.excluded.score,
+                "reason": statement.excluded.reason,
+                "matched_skills": statement.excluded.matched_skills,
+                "missing_skills": statement.excluded.missing_skills,
+                "last_used_at": statement.excluded.last_used_at,
+            },
+        )
+        try:
+            async with self._session_factory() as db:
+                await db.execute(statement)
+                await db.commit()
+        except Exception:
+            logger.exception("Match score cache write failed; results were still returned")
+
+
+match_score_cache = MatchScoreCacheService()
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional, Sequence
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+
+from app.models.models import Opportunity
+
+SEARCH_CONFIG = "english"
+
+
+def keyword_tsquery(keywords: Sequence[str]):
+    """OR of one `plainto_tsquery` per keyword phrase; None when there are none.
+
+    Each phrase still has to match all of its own words, so "machine learning"
+    does not match a posting that only says "machine".
+    """
+    queries = [func.plainto_tsquery(SEARCH_CONFIG, keyword) for keyword in keywords if keyword.strip()]
+    if not queries:
+        return None
+    combined = queries[0]
+    for query in queries[1:]:
+        combined = combined.op("||")(query)
+    return combined
+
+
+def matches(tsquery):
+    """`search_vector @@ tsquery`, answered by the GIN index."""
+    return Opportunity.search_vector.op("@@")(tsquery)
+
+
+async def keyword_recall(
+    db: AsyncSession,
+    keywords: Sequence[str],
+    limit: int,
+    since: Optional[datetime] = None,
+) -> list[str]:
+    """Ids of the open opportunities best matching any keyword, over the whole catalog."""
+    tsquery = keyword_tsquery(keywords)
+    if tsquery is None or limit <= 0:
+        return []
+    filters = [Opportunity.is_open.is_(True), matches(tsquery)]
+    if since is not None:
+        filters.append(Opportunity.updated_at > since)
+    result = await db.execute(
+        select(Opportunity.id)
+        .where(*filters)
+        .order_by(func.ts_rank_cd(Opportunity.search_vector, tsquery).desc(), Opportunity.id)
+        .limit(limit)
+    )
+    return list(result.scalars().all())
+
+
+async def search_opportunities(
+    db: AsyncSession,
+    query: str,
+    limit: int = 20,
+    offset: int = 0,
+    include_closed: bool = False,
+) -> list[tuple[Opportunity, float]]:
+    """Full-text search over title, company, location and description.
+
+    `query` uses web search syntax: quoted phrases, `or`, and `-excluded`.
+    Results come best match first, newest first among equal ranks.
+    """
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+    relevance = func.ts_rank_cd(Opportunity.search_vector, tsquery).label("relevance")
+    filters = [matches(tsquery)]
+    if not include_closed:
+        filters.append(Opportunity.is_open.is_(True))
+    result = await db.execute(
+        select(Opportunity, relevance)
+        .options(load_only(
+            Opportunity.id,
+            Opportunity.source_type,
+            Opportunity.title,
+            Opportunity.company,
+            Opportunity.location,
+            Opportunity.salary,
+            Opportunity.url,
+            Opportunity.is_open,
+            Opportunity.posted_at,
+        ))
+        .where(*filters)
+        .order_by(relevance.desc(), Opportunity.posted_at.desc().nulls_last(), Opportunity.id)
+        .offset(offset)
+        .limit(limit)
+    )
+    return [(opportunity, float(rank or 0.0)) for opportunity, rank in result.all()]
@@ -9,10 +9,13 @@ from pydantic import BaseModel, Field
 from langchain_openai import ChatOpenAI
 
 from app.core.config import settings
+from app.core.enums import LLMPriority
+from app.core.llm_scheduler import estimate_tokens, llm_scheduler
 
 logger = logging.getLogger(__name__)
 
 EXTRACTION_VERSION = "profile-extractor-v1"
+EXTRACTION_COMPLETION_TOKENS = 400
 
 KNOWN_KEYWORDS = [
     "backend", "frontend", "full stack", "fullstack", "react", "typescript",
@@ -126,7 +129,12 @@ class PreferenceExtractorService:
     async def _extract_fields(self, raw_text: str) -> tuple[PreferenceStructuredFields, bool]:
         if self.structured_llm:
             try:
-                response = await self.structured_llm.ainvoke(self._prompt(raw_text))
+                prompt = self._prompt(raw_text)
+                response = await llm_scheduler.run(
+                    lambda: self.structured_llm.ainvoke(prompt),
+                    estimated_tokens=estimate_tokens(prompt, completion_tokens=EXTRACTION_COMPLETION_TOKENS),
+                    priority=LLMPriority.INTERACTIVE,
+                )
                 return self._normalize_fields(response), False
             except Exception as exc:
                 logger.warning("Preference extraction fell back to heuristics: %s", exc)
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+from uuid import uuid4
+
+from app.core.config import settings
+from app.core.enums import RefreshJobStatus
+
+logger = logging.getLogger(__name__)
+
+# Finished jobs stay pollable this long after they end.
+FINISHED_JOB_TTL = timedelta(hours=1)
+
+# Progress events kept per job so late subscribers can replay the run.
+MAX_EVENTS_PER_JOB = 500
+
+ProgressCallback = Callable[[str, dict], None]
+Runner = Callable[[str, ProgressCallback], Awaitable[dict[str, Any]]]
+
+
+@dataclass
+class RefreshJob:
+    id: str
+    user_id: str
+    status: str = RefreshJobStatus.QUEUED
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    events: list[tuple[str, dict]] = field(default_factory=list)
+    _changed: Optional[asyncio.Event] = field(default=None, repr=False)
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in (RefreshJobStatus.QUEUED, RefreshJobStatus.RUNNING)
+
+
+class RefreshJobService:
+    """Runs match refreshes in the background, at most one per user.
+
+    A refresh requested while the user's previous one is still queued or
+    running joins that job instead of starting a second LLM run. At most
+    `MATCH_REFRESH_MAX_CONCURRENCY` refreshes run at once; the rest wait as
+    `queued`.
+
+    State lives in this process only. Jobs are lost on restart, and with N
+    workers a user's two requests can land on different workers. Move this to
+    a shared store before scaling out.
+    """
+
+    def __init__(self) -> None:
+        self._jobs: dict[str, RefreshJob] = {}
+        self._active_by_user: dict[str, str] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def submit(self, user_id: str, runner: Runner) -> tuple[RefreshJob, bool]:
+        """Return the user's active job, or start a new one. The flag is True when new."""
+        self._prune()
+        active_id = self._active_by_user.get(user_id)
+        if active_id is not None:
+            active = self._jobs.get(active_id)
+            if active is not None and active.is_active:
+                return active, False
+
+        job = RefreshJob(id=str(uuid4()), user_id=user_id)
+        self._jobs[job.id] = job
+        self._active_by_user[user_id] = job.id
+        self.publish(job, "status", {"status": job.status})
+        task = asyncio.create_task(self._run(job, runner))
+        # Keep a reference so the task is not garbage-collected mid-run.
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job, True
+
+    def get(self, job_id: str) -> Optional[RefreshJob]:
+        return self._jobs.get(job_id)
+
+    def publish(self, job: RefreshJob, event: str, data: dict) -> None:
+        if len(job.events) < MAX_EVENTS_PER_JOB:
+            job.events.append((event, data))
+        changed, job._changed = job._changed, None
+        if changed is not None:
+            changed.set()
+
+    async def follow(
+        self,
+        job: RefreshJob,
+        keepalive_seconds: float = 15.0,
+    ) -> AsyncIterator[Optional[tuple[str, dict]]]:
+        """Replay a job's events, then yield new ones until it finishes.
+
+        Yields None after `keepalive_seconds` without news so callers can keep
+        idle connections open.
+        """
+        index = 0
+        while True:
+            while index < len(job.events):
+                yield job.events[index]
+                index += 1
+            if not job.is_active:
+                return
+            if job._changed is None:
+                job._changed = asyncio.Event()
+            try:
+                await asyncio.wait_for(job._changed.wait(), timeout=keepalive_seconds)
+            except asyncio.TimeoutError:
+                yield None
+
+    def _set_status(self, job: RefreshJob, status: str) -> None:
+        job.status = status
+        data: dict[str, Any] = {"status": status}
+        if status == RefreshJobStatus.COMPLETED:
+            data["jobs_found"] = job.result.get("jobs_found", 0)
+        if job.error:
+            data["error"] = job.error
+        self.publish(job, "status", data)
+
+    def reset(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        self._tasks.clear()
+        self._jobs.clear()
+        self._active_by_user.clear()
+        self._slots = None
+
+    async def _run(self, job: RefreshJob, runner: Runner) -> None:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(max(1, settings.MATCH_REFRESH_MAX_CONCURRENCY))
+        try:
+            async with self._slots:
+                job.started_at = datetime.now(timezone.utc)
+                self._set_status(job, RefreshJobStatus.RUNNING)
+                result = await runner(job.user_id, lambda event, data: self.publish(job, event, data))
+            job.finished_at = datetime.now(timezone.utc)
+            if result.get("success"):
+                job.result = result
+                self._set_status(job, RefreshJobStatus.COMPLETED)
+            else:
+                job.error = result.get("error") or "Job search failed"
+                self._set_status(job, RefreshJobStatus.FAILED)
+        except Exception as exc:
+            logger.exception("Refresh job %s failed for user %s", job.id, job.user_id)
+            job.finished_at = datetime.now(timezone.utc)
+            job.error = str(exc)
+            self._set_status(job, RefreshJobStatus.FAILED)
+        finally:
+            if job.is_active:
+                # Cancelled before it could finish.
+                job.finished_at = datetime.now(timezone.utc)
+                job.error = job.error or "Job search was cancelled"
+                self._set_status(job, RefreshJobStatus.FAILED)
+            if self._active_by_user.get(job.user_id) == job.id:
+                del self._active_by_user[job.user_id]
+
+    def _prune(self) -> None:
+        cutoff = datetime.now(timezone.utc) - FINISHED_JOB_TTL
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+# Process-wide singleton. Import this instead of instantiating new services.
+refresh_job_service = RefreshJobService()
@@ -1,21 +1,32 @@
+import asyncio
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from sqlalchemy import exists, select, delete
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
+from time import perf_counter
+from typing import Optional
 import pytz
 import logging
 
 from app.core.config import settings
 from app.core.database import async_session_maker
+from app.core.enums import LLMPriority, MatchJobStatus, MatchRunTrigger
 from app.models.models import (
     DailyTask,
     JobPreference,
+    MatchJob,
+    MatchRun,
+    MatchScoreCacheEntry,
     Opportunity,
     Resume,
     User,
     UserJobMatch,
 )
 from app.services.agent_service import JobMatchingAgent
+from app.services.candidate_pool import build_candidate_pool
+from app.services.match_queue import ClaimedJob, match_job_queue
 from app.services.notification_service import notification_service
 
 logger = logging.getLogger(__name__)
@@ -23,12 +34,36 @@ logger = logging.getLogger(__name__)
 eastern = pytz.timezone(settings.TIMEZONE)
 
 
+@dataclass
+class _DrainProgress:
+    succeeded: int = 0
+    failed: int = 0
+    _clock: float = field(default_factory=perf_counter, repr=False)
+
+    @property
+    def processed(self) -> int:
+        return self.succeeded + self.failed
+
+    def record(self, succeeded: bool) -> None:
+        if succeeded:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+
+    def summary(self) -> str:
+        return f"{self.succeeded} succeeded, {self.failed} failed in {perf_counter() - self._clock:.1f}s"
+
+
 class SchedulerService:
     """Service for managing scheduled tasks."""
 
     def __init__(self):
         self.scheduler = AsyncIOScheduler()
         self._is_running = False
+        # Shared by every drain in this process: the interval drain and the
+        # daily push may overlap, and together still run at most this many users.
+        self._push_concurrency = max(1, settings.MATCH_PUSH_CONCURRENCY)
+        self._push_slots = asyncio.Semaphore(self._push_concurrency)
 
     def start(self):
         """Start the scheduler with all jobs."""
@@ -48,6 +83,18 @@ class SchedulerService:
             replace_existing=True
         )
 
+        # Pick up queued push jobs left by other processes, retries and
+        # expired leases.
+        self.scheduler.add_job(
+            self.drain_match_queue,
+            IntervalTrigger(seconds=max(1, settings.MATCH_QUEUE_POLL_SECONDS)),
+            id='match_queue_drain',
+            name='Match Queue Drain',
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True,
+        )
+
         # Daily cleanup at 3:00 AM EST
         self.scheduler.add_job(
             self.cleanup_old_data,
@@ -72,13 +119,19 @@ class SchedulerService:
             self._is_running = False
             logger.info("Scheduler stopped")
 
-    async def daily_job_push(self):
+    async def daily_job_push(self, batch_key: Optional[str] = None):
         """
         Daily job search and notification.
         Runs at 7:00 AM EST.
+
+        Queues one match job per eligible user, then helps drain the queue.
+        Every process running the scheduler or `app.worker` drains it too, and
+        they all enqueue the same `daily_push:<date>` batch, so each user is
+        matched once per day however many replicas fire.
         """
         logger.info("Starting daily job push...")
         run_started_at = datetime.now(timezone.utc)
+        batch_key = batch_key or f"daily_push:{datetime.now(eastern).date().isoformat()}"
 
         try:
             async with async_session_maker() as db:
@@ -91,19 +144,120 @@ class SchedulerService:
                 )
                 user_ids = user_result.scalars().all()
 
-            for user_id in user_ids:
-                agent = JobMatchingAgent(user_id=user_id)
-                result = await agent.run()
-                if not result.get("success"):
-                    logger.error(f"Daily push failed for user {user_id}: {result.get('error')}")
-                    continue
-
-                logger.info(f"Daily push complete for user {user_id}: {result.get('jobs_found')} jobs found")
-                await self._send_daily_digest(user_id, run_started_at)
+            queued = await match_job_queue.enqueue(
+                user_ids,
+                batch_key=batch_key,
+                scored_since=run_started_at,
+            )
+            logger.info(f"Queued {queued} of {len(user_ids)} users for {batch_key}")
+            await self.drain_match_queue()
 
         except Exception as e:
             logger.error(f"Daily job push error: {e}")
 
+    async def drain_match_queue(self) -> int:
+        """Claim and run queued match jobs until none are runnable.
+
+        Keeps up to `MATCH_PUSH_CONCURRENCY` users' pipelines in flight on the
+        event loop, counted across every drain in this process, so their
+        OpenAI and SendGrid waits overlap. Whenever slots
+        free up it claims exactly that many jobs and recalls for them in one
+        pass over the warm process index. In-flight LLM calls stay under the
+        process-wide scheduler's `LLM_MAX_CONCURRENCY` however many users run.
+
+        Returns how many jobs this process ran. Leases are renewed while it
+        works, so a slow run keeps its users; a crashed process stops renewing
+        and its users go to the next worker that claims.
+        """
+        progress = _DrainProgress()
+        concurrency = self._push_concurrency
+        slots = self._push_slots
+        running: set[asyncio.Task] = set()
+        try:
+            async with match_job_queue.lease_heartbeat():
+                try:
+                    while True:
+                        await slots.acquire()
+                        free = 1
+                        while free < concurrency and not slots.locked():
+                            await slots.acquire()
+                            free += 1
+                        jobs = await match_job_queue.claim(free)
+                        # Slots the queue could not fill go back.
+                        for _ in range(free - len(jobs)):
+                            slots.release()
+                        if not jobs:
+                            if not running:
+                                break
+                            await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                            continue
+
+                        candidate_pool = await self._build_candidate_pool(jobs)
+                        for job in jobs:
+                            task = asyncio.create_task(self._run_claimed_job(job, candidate_pool, progress, slots))
+                            running.add(task)
+                            task.add_done_callback(running.discard)
+                finally:
+                    # Users already started finish under the heartbeat.
+                    if running:
+                        await asyncio.gather(*running, return_exceptions=True)
+        except Exception as e:
+            logger.error(f"Match queue drain error: {e}")
+        if progress.processed:
+            logger.info(f"Match queue drained: {progress.summary()}")
+        return progress.processed
+
+    async def _build_candidate_pool(self, jobs: list[ClaimedJob]):
+        try:
+            return await build_candidate_pool([job.user_id for job in jobs])
+        except Exception as e:
+            # Per-user recall still works, just with one query set per user.
+            logger.error(f"Candidate pool build failed, recalling per user: {e}")
+            return None
+
+    async def _run_claimed_job(
+        self,
+        job: ClaimedJob,
+        candidate_pool,
+        progress: _DrainProgress,
+        slots: asyncio.Semaphore,
+    ) -> None:
+        try:
+            succeeded = await self._run_match_job(job, candidate_pool)
+        except Exception as e:
+            # Queue bookkeeping failed; the lease expires and another claim
+            # retries this user. The other users keep going.
+            logger.error(f"Match job {job.id} for user {job.user_id} errored: {e}")
+            succeeded = False
+        finally:
+            slots.release()
+        progress.record(succeeded)
+        logger.info(f"Match queue progress: {progress.summary()}")
+
+    async def _run_match_job(self, job: ClaimedJob, candidate_pool) -> bool:
+        try:
+            agent = JobMatchingAgent(
+                user_id=job.user_id,
+                candidate_pool=candidate_pool,
+                priority=LLMPriority.BATCH,
+                trigger=MatchRunTrigger.DAILY_PUSH,
+            )
+            result = await agent.run()
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+
+        if not result.get("success"):
+            error = result.get("error") or "Job search failed"
+            logger.error(f"Daily push failed for user {job.user_id} (attempt {job.attempts}): {error}")
+            await match_job_queue.fail(job.id, error)
+            return False
+
+        logger.info(f"Daily push complete for user {job.user_id}: {result.get('jobs_found')} jobs found")
+        # A lost lease means another worker reran this user and owns the digest.
+        if await match_job_queue.complete(job.id):
+            await self._send_daily_digest(job.user_id, job.scored_since)
+        return True
+
     async def _send_daily_digest(self, user_id: str, scored_since: datetime):
         """Email one user their fresh matches. A delivery failure must not stop
         the push for the remaining users."""
@@ -156,6 +310,21 @@ class SchedulerService:
                     )
                 )
 
+                await db.execute(
+                    delete(MatchScoreCacheEntry).where(MatchScoreCacheEntry.last_used_at < cutoff_date)
+                )
+
+                await db.execute(
+                    delete(MatchJob).where(
+                        MatchJob.status.in_((MatchJobStatus.DONE, MatchJobStatus.FAILED)),
+                        MatchJob.created_at < cutoff_date,
+                    )
+                )
+
+                await db.execute(
+                    delete(MatchRun).where(MatchRun.started_at < cutoff_date)
+                )
+
                 await db.commit()
                 logger.info(f"Cleaned up data older than {cutoff_date.date()}")
 
@@ -164,7 +333,8 @@ class SchedulerService:
 
     async def trigger_manual_push(self):
         """Manually trigger a job push (for testing/API)."""
-        await self.daily_job_push()
+        # Its own batch, so it runs even after today's push has.
+        await self.daily_job_push(batch_key=f"manual_push:{datetime.now(timezone.utc).isoformat()}")
 
 
 # Global scheduler instance
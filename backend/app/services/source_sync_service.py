@@ -10,12 +10,15 @@ from uuid import uuid4
 
 import httpx
 from langchain_openai import OpenAIEmbeddings
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
 from app.core.enums import SourceSyncStatus, SourceType
+from app.core.text import opportunity_attributes
 from app.models.models import CompanySource, Opportunity, SourceSyncRun
+from app.services.lexical_index import opportunity_lexical_index
+from app.services.vector_recall import opportunity_vector_index
 
 logger = logging.getLogger(__name__)
 
@@ -114,6 +117,7 @@ def normalize_greenhouse_job(job: dict[str, Any], source: CompanySource) -> dict
 
     source_job_id = f"{source.board_token}:{external_id}"
     description = _strip_html(job.get("content"))
+    location = _location_name(job)
 
     return {
         "company_source_id": source.id,
@@ -121,12 +125,13 @@ def normalize_greenhouse_job(job: dict[str, Any], source: CompanySource) -> dict
         "source_job_id": source_job_id,
         "title": title,
         "company": source.company_name,
-        "location": _location_name(job),
+        "location": location,
         "salary": _salary_text(job),
         "url": job.get("absolute_url"),
         "description": description,
         "raw_payload": job,
         "posted_at": _parse_datetime(job.get("updated_at")),
+        **opportunity_attributes(title, source.company_name, location),
     }
 
 
@@ -208,6 +213,36 @@ def _opportunity_needs_embedding(opportunity: Opportunity, job: dict[str, Any])
     )
 
 
+def _apply_synced_fields(opportunity: Opportunity, job: dict[str, Any], source_id: str) -> bool:
+    """Copy synced fields onto an existing row. Returns True if any of them differed.
+
+    Only differing fields are assigned so an unchanged posting leaves
+    `updated_at` alone; incremental matching relies on it as a change marker.
+    """
+    synced_fields = {
+        "company_source_id": source_id,
+        "title": job["title"],
+        "company": job["company"],
+        "location": job["location"],
+        "salary": job["salary"],
+        "url": job["url"],
+        "description": job["description"],
+        "raw_payload": job["raw_payload"],
+        "posted_at": job["posted_at"] or opportunity.posted_at,
+        "company_normalized": job["company_normalized"],
+        "is_intern": job["is_intern"],
+        "is_remote": job["is_remote"],
+        "location_tokens": job["location_tokens"],
+        "is_open": True,
+    }
+    changed = False
+    for field_name, value in synced_fields.items():
+        if getattr(opportunity, field_name) != value:
+            setattr(opportunity, field_name, value)
+            changed = True
+    return changed
+
+
 class CompanySourceSyncService:
     """Sync external company sources into the shared opportunities table."""
 
@@ -274,6 +309,7 @@ class CompanySourceSyncService:
                 except Exception:
                     logger.exception("Opportunity embedding generation failed; continuing sync without embeddings")
 
+            unchanged_ids: list[str] = []
             for job in normalized_jobs:
                 opportunity = existing_by_id.get(job["source_job_id"])
                 embedding = embeddings_by_source_job_id.get(job["source_job_id"])
@@ -288,19 +324,24 @@ class CompanySourceSyncService:
                         )
                     )
                 else:
-                    opportunity.company_source_id = source.id
-                    opportunity.title = job["title"]
-                    opportunity.company = job["company"]
-                    opportunity.location = job["location"]
-                    opportunity.salary = job["salary"]
-                    opportunity.url = job["url"]
-                    opportunity.description = job["description"]
-                    opportunity.raw_payload = job["raw_payload"]
-                    opportunity.posted_at = job["posted_at"] or opportunity.posted_at
+                    changed = _apply_synced_fields(opportunity, job, source.id)
                     if embedding is not None:
                         opportunity.embedding = embedding
-                    opportunity.is_open = True
-                    opportunity.last_seen_at = now
+                        changed = True
+                    if changed:
+                        opportunity.last_seen_at = now
+                    else:
+                        unchanged_ids.append(opportunity.id)
+
+            if unchanged_ids:
+                # Seen-but-unchanged rows only move `last_seen_at`. Assigning
+                # `updated_at` to itself suppresses its onupdate default.
+                await db.execute(
+                    update(Opportunity)
+                    .where(Opportunity.id.in_(unchanged_ids))
+                    .values(last_seen_at=now, updated_at=Opportunity.updated_at)
+                    .execution_options(synchronize_session=False)
+                )
 
             open_result = await db.execute(
                 select(Opportunity).where(
@@ -319,6 +360,8 @@ class CompanySourceSyncService:
             run.fetched_count = len(raw_jobs)
             run.upserted_count = len(normalized_jobs)
             run.finished_at = now
+            opportunity_vector_index.mark_stale()
+            opportunity_lexical_index.mark_stale()
         except Exception as exc:
             logger.exception("Company source sync failed for %s", source.id)
             run.status = SourceSyncStatus.FAILED
@@ -0,0 +1,354 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+import json
+import logging
+import os
+from pathlib import Path
+from time import monotonic
+from typing import Hashable, Iterable, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.models import EMBEDDING_DIM, Opportunity
+
+logger = logging.getLogger(__name__)
+
+# Rows are re-read this far behind the newest `updated_at` already applied.
+# `updated_at` is stamped with the writer's transaction start time, so a long
+# sync can commit rows that are older than a refresh that ran in the meantime.
+# Re-applying an unchanged row is harmless; missing one is not.
+_WATERMARK_OVERLAP = timedelta(minutes=15)
+
+
+async def apply_vector_search_settings(db: AsyncSession, recall_limit: int) -> None:
+    """Widen the HNSW candidate list for the current transaction only.
+
+    `set_config(..., true)` is the SET LOCAL form, so the value cannot leak to
+    other clients sharing a pooled connection.
+    """
+    ef_search = min(1000, max(settings.MATCH_VECTOR_EF_SEARCH, recall_limit))
+    await db.execute(
+        text("SELECT set_config('hnsw.ef_search', :value, true)"),
+        {"value": str(ef_search)},
+    )
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32, copy=False)
+
+
+def max_chunk_similarity(chunk_vectors: Sequence[Sequence[float]], matrix: np.ndarray) -> np.ndarray:
+    """Best cosine similarity of each matrix row to any of the resume chunks.
+
+    One (rows x chunks) product. Each opportunity has a single vector, so the
+    ColBERT-style sum of per-chunk maxima would collapse back to the averaged
+    resume embedding; the max keeps the one resume section that fits best.
+    """
+    if len(chunk_vectors) == 0 or len(matrix) == 0:
+        return np.zeros(len(matrix), dtype=np.float32)
+    chunks = _normalize_rows(np.asarray(chunk_vectors, dtype=np.float32))
+    rows = _normalize_rows(np.asarray(matrix, dtype=np.float32))
+    return (rows @ chunks.T).max(axis=1)
+
+
+def near_duplicate_representatives(
+    keys: Sequence[Hashable],
+    matrix: np.ndarray,
+    threshold: float,
+) -> list[int]:
+    """For each row, the first earlier row with the same key and a cosine
+    similarity of at least `threshold`, or the row itself.
+
+    Rows are only compared within their key, so the cost is quadratic in the
+    largest group rather than in the whole list.
+    """
+    rows = _normalize_rows(np.asarray(matrix, dtype=np.float32)) if len(keys) else matrix
+    representatives = list(range(len(keys)))
+    heads_by_key: dict[Hashable, list[int]] = {}
+    for row, key in enumerate(keys):
+        heads = heads_by_key.setdefault(key, [])
+        for head in heads:
+            if float(rows[row] @ rows[head]) >= threshold:
+                representatives[row] = head
+                break
+        else:
+            heads.append(row)
+    return representatives
+
+
+class OpportunityVectorIndex:
+    """All open opportunity embeddings as one contiguous, L2-normalized float32
+    matrix, so cosine recall is a single matrix-vector product.
+
+    The matrix is refreshed incrementally from `Opportunity.updated_at` and, when
+    `snapshot_dir` is set, persisted as a `.npy` file that later processes
+    memory-map instead of reloading every embedding from Postgres. Workers on
+    the same host then share one copy through the page cache.
+    """
+
+    def __init__(self, snapshot_dir: Optional[str] = None) -> None:
+        self._snapshot_dir = Path(snapshot_dir) if snapshot_dir else None
+        self._ids: list[str] = []
+        self._matrix = np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+        self._positions: dict[str, int] = {}
+        self._watermark: Optional[datetime] = None
+        self._refreshed_at: Optional[float] = None
+        self._stale = True
+        self._snapshot_checked = False
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def watermark(self) -> Optional[datetime]:
+        return self._watermark
+
+    def mark_stale(self) -> None:
+        """Force the next recall to pull recent changes before searching."""
+        self._stale = True
+
+    def needs_refresh(self) -> bool:
+        if self._stale or self._refreshed_at is None:
+            return True
+        return monotonic() - self._refreshed_at >= settings.MATCH_RECALL_REFRESH_SECONDS
+
+    async def ensure_fresh(self, db: AsyncSession) -> None:
+        if not self.needs_refresh():
+            return
+        async with self._lock:
+            if self.needs_refresh():
+                await self.refresh(db)
+
+    async def refresh(self, db: AsyncSession) -> int:
+        """Apply opportunities changed since the last refresh. Returns rows applied."""
+        if not self._snapshot_checked:
+            self._snapshot_checked = True
+            await asyncio.to_thread(self._load_snapshot)
+
+        query = select(
+            Opportunity.id,
+            Opportunity.embedding,
+            Opportunity.is_open,
+            Opportunity.updated_at,
+        )
+        if self._watermark is None:
+            # Cold start: closed rows can never be in the matrix, skip them.
+            query = query.where(Opportunity.is_open.is_(True), Opportunity.embedding.is_not(None))
+        else:
+            query = query.where(Opportunity.updated_at > self._watermark - _WATERMARK_OVERLAP)
+
+        result = await db.execute(query)
+        rows = result.all()
+        changed = self.apply_rows(rows)
+        self._refreshed_at = monotonic()
+        self._stale = False
+
+        if changed and self._snapshot_dir is not None:
+            await asyncio.to_thread(self._save_snapshot)
+        logger.info("Vector index refreshed: %s rows applied, %s open embeddings", len(rows), len(self))
+        return len(rows)
+
+    def apply_rows(self, rows: Iterable[Sequence]) -> bool:
+        """Merge `(id, embedding, is_open, updated_at)` rows into the matrix.
+
+        Returns True when the matrix content changed.
+        """
+        upserts: dict[str, np.ndarray] = {}
+        removals: set[str] = set()
+        watermark = self._watermark
+        for opportunity_id, embedding, is_open, updated_at in rows:
+            if updated_at is not None and (watermark is None or updated_at > watermark):
+                watermark = updated_at
+            if not is_open or embedding is None:
+                removals.add(opportunity_id)
+                upserts.pop(opportunity_id, None)
+                continue
+            vector = np.asarray(embedding, dtype=np.float32)
+            position = self._positions.get(opportunity_id)
+            if position is not None and np.allclose(self._matrix[position], _normalize_rows(vector[None, :])[0]):
+                continue
+            upserts[opportunity_id] = vector
+            removals.discard(opportunity_id)
+        self._watermark = watermark
+
+        removals &= self._positions.keys()
+        if not upserts and not removals:
+            return False
+
+        replaced = removals | (upserts.keys() & self._positions.keys())
+        keep = [position for opportunity_id, position in self._positions.items() if opportunity_id not in replaced]
+        keep.sort()
+        kept_ids = [self._ids[position] for position in keep]
+        new_ids = list(upserts)
+        new_rows = _normalize_rows(np.vstack(list(upserts.values()))) if new_ids else np.zeros(
+            (0, EMBEDDING_DIM), dtype=np.float32
+        )
+
+        self._set_matrix(
+            kept_ids + new_ids,
+            np.ascontiguousarray(np.vstack([self._matrix[keep], new_rows]), dtype=np.float32),
+        )
+        return True
+
+    def _set_matrix(self, ids: list[str], matrix: np.ndarray) -> None:
+        # Swapped together so a concurrent search never sees ids and rows disagree.
+        self._ids, self._matrix = ids, matrix
+        self._positions = {opportunity_id: position for position, opportunity_id in enumerate(ids)}
+
+    def vectors(self, opportunity_ids: Iterable[str]) -> tuple[list[str], np.ndarray]:
+        """Rows for the ids present in the index, in request order."""
+        matrix, positions = self._matrix, self._positions
+        found = [opportunity_id for opportunity_id in opportunity_ids if opportunity_id in positions]
+        return found, matrix[[positions[opportunity_id] for opportunity_id in found]]
+
+    def search(self, query_vector: Sequence[float], k: int) -> list[tuple[str, float]]:
+        """Top-k `(opportunity_id, cosine_distance)` pairs, nearest first."""
+        return self.search_many([query_vector], k)[0]
+
+    def search_many(
+        self,
+        query_vectors: Sequence[Sequence[float]],
+        k: int,
+        block_size: int = 256,
+    ) -> list[list[tuple[str, float]]]:
+        """Top-k hits for many queries from one (queries x opportunities) product.
+
+        Queries are processed in blocks so the similarity matrix stays bounded
+        at `block_size * len(index)` floats however many users are ranked.
+        """
+        ids, matrix = self._ids, self._matrix
+        if len(query_vectors) == 0:
+            return []
+        if not ids or k <= 0:
+            return [[] for _ in query_vectors]
+
+        queries = np.asarray(query_vectors, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1)
+        queries = _normalize_rows(queries)
+        k = min(k, len(ids))
+
+        results: list[list[tuple[str, float]]] = []
+        for start in range(0, len(queries), block_size):
+            similarities = queries[start:start + block_size] @ matrix.T
+            top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+            top_similarities = np.take_along_axis(similarities, top, axis=1)
+            order = np.argsort(-top_similarities, axis=1, kind="stable")
+            top = np.take_along_axis(top, order, axis=1)
+            top_similarities = np.take_along_axis(top_similarities, order, axis=1)
+            for offset, (positions, row_similarities) in enumerate(zip(top, top_similarities)):
+                if norms[start + offset] == 0:
+                    results.append([])
+                    continue
+                results.append([
+                    (ids[position], float(1.0 - similarity))
+                    for position, similarity in zip(positions, row_similarities)
+                ])
+        return results
+
+    def _snapshot_paths(self) -> tuple[Path, Path]:
+        assert self._snapshot_dir is not None
+        return (
+            self._snapshot_dir / "opportunity_embeddings.npy",
+            self._snapshot_dir / "opportunity_embeddings.json",
+        )
+
+    def _load_snapshot(self) -> None:
+        if self._snapshot_dir is None:
+            return
+        matrix_path, meta_path = self._snapshot_paths()
+        if not matrix_path.exists() or not meta_path.exists():
+            return
+        try:
+            meta = json.loads(meta_path.read_text())
+            matrix = np.load(matrix_path, mmap_mode="r")
+            ids = list(meta["ids"])
+            if matrix.shape != (len(ids), EMBEDDING_DIM):
+                raise ValueError(f"snapshot shape {matrix.shape} does not match {len(ids)} ids")
+        except Exception:
+            logger.exception("Ignoring unreadable vector index snapshot in %s", self._snapshot_dir)
+            return
+
+        self._set_matrix(ids, matrix)
+        watermark = meta.get("watermark")
+        self._watermark = datetime.fromisoformat(watermark) if watermark else None
+        logger.info("Loaded vector index snapshot with %s embeddings", len(ids))
+
+    def _save_snapshot(self) -> None:
+        if self._snapshot_dir is None:
+            return
+        self._snapshot_dir.mkdir(parents=True, exist_ok=True)
+        matrix_path, meta_path = self._snapshot_paths()
+        ids, matrix, watermark = self._ids, self._matrix, self._watermark
+
+        # Write-then-rename so a process mapping the old file never reads a torn one.
+        pid = os.getpid()
+        tmp_matrix = matrix_path.with_name(f"{matrix_path.stem}.{pid}.tmp.npy")
+        tmp_meta = meta_path.with_name(f"{meta_path.stem}.{pid}.tmp.json")
+        np.save(tmp_matrix, matrix)
+        tmp_meta.write_text(json.dumps({
+            "ids": ids,
+            "watermark": watermark.isoformat() if watermark else None,
+        }))
+        os.replace(tmp_matrix, matrix_path)
+        os.replace(tmp_meta, meta_path)
+
+        # Re-map the file just written so this process also drops its private copy.
+        self._set_matrix(ids, np.load(matrix_path, mmap_mode="r"))
+
+
+class PgvectorRecall:
+    """Exact or HNSW recall answered by Postgres."""
+
+    name = "pgvector"
+
+    async def recall(self, db: AsyncSession, query_vector: Sequence[float], limit: int) -> list[tuple[str, float]]:
+        await apply_vector_search_settings(db, limit)
+        distance = Opportunity.embedding.cosine_distance(list(query_vector)).label("vector_distance")
+        # ORDER BY must be the bare distance for the HNSW index to be
+        # used; any tie-break column forces an exact scan and sort. The WHERE
+        # must match the partial index predicate (migration 20261017_000015).
+        result = await db.execute(
+            select(Opportunity.id, distance)
+            .where(
+                Opportunity.is_open.is_(True),
+                Opportunity.embedding.is_not(None),
+            )
+            .order_by(distance)
+            .limit(limit)
+        )
+        return [
+            (opportunity_id, float(vector_distance))
+            for opportunity_id, vector_distance in result.all()
+            if vector_distance is not None
+        ]
+
+
+class NumpyRecall:
+    """Recall from the process-local `OpportunityVectorIndex`."""
+
+    name = "numpy"
+
+    def __init__(self, index: OpportunityVectorIndex) -> None:
+        self.index = index
+
+    async def recall(self, db: AsyncSession, query_vector: Sequence[float], limit: int) -> list[tuple[str, float]]:
+        await self.index.ensure_fresh(db)
+        return self.index.search(query_vector, limit)
+
+
+# Process-wide singleton. The sync service marks it stale after each run.
+opportunity_vector_index = OpportunityVectorIndex(settings.MATCH_RECALL_SNAPSHOT_DIR)
+
+
+def get_recall_backend() -> PgvectorRecall | NumpyRecall:
+    if settings.MATCH_RECALL_BACKEND == "numpy":
+        return NumpyRecall(opportunity_vector_index)
+    return PgvectorRecall()
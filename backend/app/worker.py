@@ -0,0 +1,32 @@
+"""Standalone match queue worker.
+
+    python -m app.worker
+
+Drains the `match_jobs` queue without serving HTTP, so the daily push can be
+spread over as many processes or replicas as needed. Scheduling stays with the
+API processes that set `ENABLE_SCHEDULER`; workers only consume.
+"""
+
+import asyncio
+import logging
+
+from app.core.config import settings
+from app.services.match_queue import match_job_queue
+from app.services.scheduler_service import scheduler_service
+
+logger = logging.getLogger(__name__)
+
+
+async def run_worker() -> None:
+    logger.info("Match queue worker %s started", match_job_queue.worker_id)
+    while True:
+        processed = await scheduler_service.drain_match_queue()
+        if processed:
+            logger.info("Match queue worker %s ran %s jobs", match_job_queue.worker_id, processed)
+            continue
+        await asyncio.sleep(max(1, settings.MATCH_QUEUE_POLL_SECONDS))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_worker())
@@ -0,0 +1,137 @@
+"""Deterministic stand-ins for the OpenAI chat model and embedder.
+
+Outputs depend only on the input text, so two benchmark runs over the same
+seed see the same scores and the same recall. Latency is simulated with
+`asyncio.sleep`, which keeps concurrency behaviour (scheduler slots, batch
+fan-out) realistic without spending tokens.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import re
+from typing import Any, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from app.core.llm_scheduler import estimate_tokens
+from app.models.models import EMBEDDING_DIM
+
+_WORD = re.compile(r"\w+")
+_JOBS_JSON = re.compile(r"JOBS JSON:\s*(\[.*\])\s*Return a JSON array", re.DOTALL)
+
+
+def _stable_int(*parts: str) -> int:
+    digest = hashlib.sha256("\x1f".join(parts).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def _score(resume: str, title: str, company: str) -> int:
+    """40-99, higher when the title shares words with the resume."""
+    resume_words = set(_WORD.findall(resume.lower()))
+    overlap = len(resume_words & set(_WORD.findall(title.lower())))
+    return min(99, 40 + 12 * overlap + _stable_int(resume[:200], title, company) % 30)
+
+
+class FakeChatModel(BaseChatModel):
+    """Answers the agent's batch, single-job and cover-letter prompts."""
+
+    latency_seconds: float = 0.0
+    calls: int = 0
+    total_tokens: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "benchmark-fake"
+
+    def _respond(self, messages: list[BaseMessage]) -> AIMessage:
+        prompt = "\n".join(str(message.content) for message in messages)
+        resume = prompt.split("RESUME", 1)[-1][:3000]
+        jobs_match = _JOBS_JSON.search(prompt)
+        if jobs_match:
+            jobs = json.loads(jobs_match.group(1))
+            content = json.dumps([
+                {
+                    "index": job["index"],
+                    "score": _score(resume, job.get("title", ""), job.get("company", "")),
+                    "reason": f"Synthetic fit for {job.get('title', '')}.",
+                    "matched_skills": [],
+                    "missing_skills": [],
+                }
+                for job in jobs
+            ])
+        elif "Write a concise cover letter" in prompt:
+            content = "Dear hiring team, this is a synthetic benchmark cover letter."
+        else:
+            title = re.search(r"Title: (.*)", prompt)
+            company = re.search(r"Company: (.*)", prompt)
+            content = json.dumps({
+                "score": _score(resume, title.group(1) if title else "", company.group(1) if company else ""),
+                "reason": "Synthetic fit.",
+                "matched_skills": [],
+                "missing_skills": [],
+            })
+
+        prompt_tokens = estimate_tokens(prompt)
+        completion_tokens = estimate_tokens(content)
+        self.calls += 1
+        self.total_tokens += prompt_tokens + completion_tokens
+        return AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        )
+
+    def _generate(self, messages: list[BaseMessage], stop: Optional[list[str]] = None, **kwargs: Any) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency_seconds > 0:
+            await asyncio.sleep(self.latency_seconds)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+
+class FakeEmbeddings(Embeddings):
+    """Hashed bag-of-words vectors: texts sharing words land close together."""
+
+    def __init__(self, latency_seconds: float = 0.0, dimensions: int = EMBEDDING_DIM) -> None:
+        self.latency_seconds = latency_seconds
+        self.dimensions = dimensions
+
+    def _embed(self, text: str) -> list[float]:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for word in _WORD.findall(text.lower()):
+            bucket = _stable_int(word)
+            vector[bucket % self.dimensions] += 1.0 if bucket & 1 else -1.0
+        norm = float(np.linalg.norm(vector))
+        return (vector / norm).tolist() if norm else vector.tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed(text)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        if self.latency_seconds > 0:
+            await asyncio.sleep(self.latency_seconds)
+        return self.embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        if self.latency_seconds > 0:
+            await asyncio.sleep(self.latency_seconds)
+        return self.embed_query(text)
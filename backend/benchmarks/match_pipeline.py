@@ -0,0 +1,305 @@
+"""End-to-end benchmark for `JobMatchingAgent.run()` and the daily push, offline.
+
+Seeds synthetic users, resumes, preferences and opportunities, swaps the
+OpenAI chat model for `benchmarks.fakes.FakeChatModel` (deterministic scores,
+configurable latency), and reports per-stage latency, SQL statement counts
+and throughput. Embeddings come from `FakeEmbeddings`, so recall still has
+structure to find.
+
+Writes to the configured database: point `DATABASE_URL` at a disposable
+Postgres with pgvector and the migrations applied. Seeded rows are tagged and
+removed afterwards unless `--keep` is given. `--push` runs `daily_job_push`,
+which covers every user in the database, not only the seeded ones.
+
+    cd backend
+    python -m benchmarks.match_pipeline --opportunities 5000 --users 20 --llm-latency-ms 400
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import defaultdict
+from dataclasses import dataclass, field
+import random
+from statistics import mean, quantiles
+from time import perf_counter
+from types import SimpleNamespace
+from uuid import uuid4
+
+from sqlalchemy import delete, event, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core.config import settings
+from app.core.database import async_session_maker, engine
+from app.core.enums import SourceType
+from app.core.llm_scheduler import llm_scheduler
+from app.core.text import opportunity_attributes
+from app.models.models import CompanySource, JobPreference, Opportunity, Resume, User
+from app.services import scheduler_service as scheduler_module
+from app.services.agent_service import JobMatchingAgent, agent_runtime
+from app.services.source_sync_service import OpportunityEmbeddingService
+from benchmarks.fakes import FakeChatModel, FakeEmbeddings
+
+ROLES = [
+    "Backend Engineer", "Frontend Engineer", "Data Engineer", "Machine Learning Engineer",
+    "Site Reliability Engineer", "Product Designer", "Data Analyst", "Platform Engineer",
+    "Mobile Engineer", "Security Engineer", "Software Engineer Intern", "Engineering Manager",
+]
+SENIORITY = ["", "Senior ", "Staff ", "Junior ", "Lead "]
+SKILLS = [
+    "python", "go", "java", "typescript", "react", "postgres", "kubernetes", "aws", "spark",
+    "pytorch", "terraform", "kafka", "graphql", "rust", "swift", "figma", "sql", "airflow",
+]
+LOCATIONS = ["Remote", "New York, NY", "San Francisco, CA", "Austin, TX", "Seattle, WA", "Remote - US", "Boston, MA"]
+COMPANIES = [f"Company {letter}" for letter in "ABCDEFGHIJKLMNOPQRSTUVWXYZ"]
+BATCH_SIZE = 1000
+
+
+@dataclass
+class StageSamples:
+    milliseconds: dict[str, list[float]] = field(default_factory=lambda: defaultdict(list))
+    queries: dict[str, list[int]] = field(default_factory=lambda: defaultdict(list))
+
+
+class QueryCounter:
+    """Counts statements sent to Postgres through the app engine."""
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    def _on_execute(self, *_args) -> None:
+        self.count += 1
+
+    def __enter__(self) -> "QueryCounter":
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        event.remove(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+
+def _percentile(values: list[float], pct: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return quantiles(values, n=100, method="inclusive")[pct - 1]
+
+
+def _synthetic_job(rng: random.Random, tag: str, number: int) -> dict:
+    title = f"{rng.choice(SENIORITY)}{rng.choice(ROLES)}".strip()
+    skills = rng.sample(SKILLS, 5)
+    company = rng.choice(COMPANIES)
+    location = rng.choice(LOCATIONS)
+    paragraphs = rng.randint(2, 8)
+    description = " ".join(
+        f"You will build systems with {', '.join(skills[:3])} and partner with teams using {skills[3]} and {skills[4]}."
+        for _ in range(paragraphs)
+    )
+    return {
+        "source_type": SourceType.GREENHOUSE,
+        "source_job_id": f"{tag}:{number}",
+        "title": title,
+        "company": company,
+        "location": location,
+        "description": description,
+        "url": f"https://example.invalid/{tag}/{number}",
+        **opportunity_attributes(title, company, location),
+    }
+
+
+async def seed(tag: str, opportunities: int, users: int, embedder: FakeEmbeddings, rng: random.Random) -> tuple[str, list[str]]:
+    """Insert the synthetic catalog and users. Returns (company source id, user ids)."""
+    source_id = str(uuid4())
+    async with async_session_maker() as db:
+        db.add(CompanySource(
+            id=source_id,
+            source_type=SourceType.GREENHOUSE,
+            company_name="Benchmark",
+            board_token=f"benchmark-{tag}",
+        ))
+        await db.flush()
+
+        for start in range(0, opportunities, BATCH_SIZE):
+            jobs = [_synthetic_job(rng, tag, number) for number in range(start, min(opportunities, start + BATCH_SIZE))]
+            vectors = await embedder.aembed_documents([OpportunityEmbeddingService.build_text(job) for job in jobs])
+            await db.execute(pg_insert(Opportunity).values([
+                {**job, "id": str(uuid4()), "company_source_id": source_id, "embedding": vector, "is_open": True}
+                for job, vector in zip(jobs, vectors)
+            ]))
+
+        user_ids = []
+        for number in range(users):
+            user_id = str(uuid4())
+            user_ids.append(user_id)
+            role = rng.choice(ROLES)
+            skills = rng.sample(SKILLS, 6)
+            resume_text = f"{role} ({tag}-{number}). Experience with {', '.join(skills)}. " * 6
+            keywords = [role.lower(), *skills[:2]]
+            db.add(User(id=user_id, email=f"bench-{tag}-{number}@benchmark.invalid", name=f"Bench {number}"))
+            db.add(Resume(
+                user_id=user_id,
+                file_name="resume.txt",
+                content=resume_text,
+                embedding=await embedder.aembed_query(resume_text),
+            ))
+            fields = {
+                "keywords": keywords,
+                "locations": [rng.choice(LOCATIONS)],
+                "is_intern": "Intern" in role,
+                "remote_preference": rng.choice(["remote", "any"]),
+                "excluded_companies": [rng.choice(COMPANIES)],
+            }
+            db.add(JobPreference(
+                user_id=user_id,
+                raw_text=f"Looking for {role} roles using {', '.join(skills[:3])}.",
+                extracted_fields=fields,
+                effective_fields=fields,
+            ))
+        await db.commit()
+    return source_id, user_ids
+
+
+async def cleanup(source_id: str, user_ids: list[str]) -> None:
+    async with async_session_maker() as db:
+        # Cascades remove resumes, preferences, matches and daily tasks.
+        await db.execute(delete(User).where(User.id.in_(user_ids)))
+        await db.execute(delete(Opportunity).where(Opportunity.company_source_id == source_id))
+        await db.execute(delete(CompanySource).where(CompanySource.id == source_id))
+        await db.commit()
+
+
+async def bench_agent(user_ids: list[str], runs: int, counter: QueryCounter) -> tuple[StageSamples, list[float], list[dict]]:
+    samples = StageSamples()
+    totals: list[float] = []
+    stats: list[dict] = []
+    for _ in range(runs):
+        for user_id in user_ids:
+            clock = {"at": perf_counter(), "queries": counter.count}
+            stage_ms: dict[str, float] = defaultdict(float)
+            stage_queries: dict[str, int] = defaultdict(int)
+
+            def on_progress(event_name: str, data: dict) -> None:
+                if event_name != "stage":
+                    return
+                now, queries = perf_counter(), counter.count
+                # Repeated nodes (threshold retries) accumulate into one sample.
+                stage_ms[data["stage"]] += (now - clock["at"]) * 1000
+                stage_queries[data["stage"]] += queries - clock["queries"]
+                clock["at"], clock["queries"] = now, queries
+
+            started = perf_counter()
+            result = await JobMatchingAgent(user_id=user_id, progress=on_progress).run()
+            totals.append((perf_counter() - started) * 1000)
+            if not result.get("success"):
+                print(f"run failed for {user_id}: {result.get('error')}")
+                continue
+            stats.append(result.get("candidate_stats", {}))
+            for stage, elapsed in stage_ms.items():
+                samples.milliseconds[stage].append(elapsed)
+                samples.queries[stage].append(stage_queries[stage])
+    return samples, totals, stats
+
+
+async def bench_push(counter: QueryCounter) -> tuple[float, int]:
+    async def no_digest(*_args, **_kwargs):
+        return None
+
+    original = scheduler_module.notification_service
+    scheduler_module.notification_service = SimpleNamespace(send_daily_digest=no_digest)
+    try:
+        before = counter.count
+        started = perf_counter()
+        await scheduler_module.SchedulerService().daily_job_push(batch_key=f"benchmark:{uuid4().hex}")
+        return perf_counter() - started, counter.count - before
+    finally:
+        scheduler_module.notification_service = original
+
+
+def _print_stages(samples: StageSamples, totals: list[float]) -> None:
+    header = f"{'stage':<26}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}{'queries':>10}"
+    print(header)
+    print("-" * len(header))
+    for stage, values in samples.milliseconds.items():
+        queries = samples.queries[stage]
+        print(
+            f"{stage:<26}{_percentile(values, 50):>10.1f}{_percentile(values, 95):>10.1f}"
+            f"{mean(values):>10.1f}{mean(queries):>10.1f}"
+        )
+    print(
+        f"{'run total':<26}{_percentile(totals, 50):>10.1f}{_percentile(totals, 95):>10.1f}"
+        f"{mean(totals):>10.1f}{sum(mean(q) for q in samples.queries.values()):>10.1f}"
+    )
+
+
+async def run(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    tag = uuid4().hex[:8]
+    fake_llm = FakeChatModel(latency_seconds=args.llm_latency_ms / 1000)
+    embedder = FakeEmbeddings(latency_seconds=args.embed_latency_ms / 1000)
+    agent_runtime.reset()
+    agent_runtime._llm = fake_llm
+    llm_scheduler.reset()
+    if args.full:
+        settings.MATCH_INCREMENTAL = False
+
+    started = perf_counter()
+    source_id, user_ids = await seed(tag, args.opportunities, args.users, embedder, rng)
+    print(f"seeded {args.opportunities} opportunities and {args.users} users in {perf_counter() - started:.1f}s")
+    print(
+        f"llm latency {args.llm_latency_ms}ms  incremental={settings.MATCH_INCREMENTAL}  "
+        f"recall={settings.MATCH_RECALL_BACKEND}"
+    )
+    print()
+
+    try:
+        with QueryCounter() as counter:
+            wall_started = perf_counter()
+            samples, totals, stats = await bench_agent(user_ids, args.runs, counter)
+            wall = perf_counter() - wall_started
+            _print_stages(samples, totals)
+            print()
+            print(
+                f"agent runs: {len(totals)}  wall {wall:.1f}s  throughput {len(totals) / wall:.2f} runs/s  "
+                f"llm calls {fake_llm.calls}  llm tokens {fake_llm.total_tokens}"
+            )
+            if stats:
+                for key in ("open_opportunities", "scored_candidates", "llm_scored_candidates", "llm_cache_hits"):
+                    values = [stat[key] for stat in stats if isinstance(stat.get(key), (int, float))]
+                    if values:
+                        print(f"  mean {key}: {mean(values):.1f}")
+
+            if args.push:
+                push_calls = fake_llm.calls
+                push_seconds, push_queries = await bench_push(counter)
+                async with async_session_maker() as db:
+                    pushed_users = len((await db.execute(
+                        select(User.id).join(Resume, Resume.user_id == User.id).distinct()
+                    )).all())
+                print()
+                print(
+                    f"daily_job_push: {pushed_users} users in {push_seconds:.1f}s "
+                    f"({pushed_users / push_seconds if push_seconds else 0:.2f} users/s), "
+                    f"{push_queries} queries, {fake_llm.calls - push_calls} llm calls"
+                )
+    finally:
+        if not args.keep:
+            await cleanup(source_id, user_ids)
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--opportunities", type=int, default=2000, help="synthetic open opportunities to seed")
+    parser.add_argument("--users", type=int, default=10, help="synthetic users with resume and preferences")
+    parser.add_argument("--runs", type=int, default=2, help="agent runs per user; later runs are incremental")
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0, help="simulated latency per chat call")
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0, help="simulated latency per embedding call")
+    parser.add_argument("--seed", type=int, default=7, help="random seed for the synthetic catalog")
+    parser.add_argument("--full", action="store_true", help="disable incremental matching for every run")
+    parser.add_argument("--push", action="store_true", help="also time daily_job_push over all users")
+    parser.add_argument("--keep", action="store_true", help="leave the seeded rows in place")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Recall-vs-latency benchmark for opportunity vector recall.
+
+Compares the exact cosine scan against the HNSW index at several `ef_search`
+values, using the same query shape as `JobMatchingAgent`. Query vectors are
+sampled from stored resume embeddings, falling back to opportunity embeddings
+when no resumes exist. Read-only; safe to point at a staging database.
+
+    cd backend
+    python -m benchmarks.vector_recall --queries 50 --k 80 --ef-search 40,100,200
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from statistics import mean, quantiles
+from time import perf_counter
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import async_session_maker, engine
+from app.models.models import Opportunity, Resume
+
+
+async def _sample_query_vectors(db: AsyncSession, count: int) -> list[list[float]]:
+    for column in (Resume.embedding, Opportunity.embedding):
+        result = await db.execute(
+            select(column).where(column.is_not(None)).order_by(func.random()).limit(count)
+        )
+        vectors = [list(vector) for vector in result.scalars().all()]
+        if vectors:
+            return vectors
+    return []
+
+
+def _recall_statement(query_vector: list[float], k: int):
+    distance = Opportunity.embedding.cosine_distance(query_vector)
+    return (
+        select(Opportunity.id)
+        .where(Opportunity.is_open.is_(True), Opportunity.embedding.is_not(None))
+        .order_by(distance)
+        .limit(k)
+    )
+
+
+async def _timed_recall(query_vector: list[float], k: int, ef_search: int | None) -> tuple[list[str], float]:
+    """Run one recall in its own transaction. `ef_search=None` means exact scan."""
+    async with async_session_maker() as db:
+        if ef_search is None:
+            await db.execute(text("SET LOCAL enable_indexscan = off"))
+        else:
+            await db.execute(
+                text("SELECT set_config('hnsw.ef_search', :value, true)"),
+                {"value": str(ef_search)},
+            )
+        started = perf_counter()
+        result = await db.execute(_recall_statement(query_vector, k))
+        ids = list(result.scalars().all())
+        elapsed_ms = (perf_counter() - started) * 1000
+        await db.rollback()
+    return ids, elapsed_ms
+
+
+async def _uses_index(query_vector: list[float], k: int, ef_search: int | None) -> bool:
+    async with async_session_maker() as db:
+        if ef_search is None:
+            await db.execute(text("SET LOCAL enable_indexscan = off"))
+        plan = await db.execute(
+            text(
+                "EXPLAIN SELECT id FROM opportunities "
+                "WHERE is_open IS true AND embedding IS NOT NULL "
+                "ORDER BY embedding <=> CAST(:query AS vector) LIMIT :k"
+            ),
+            {"query": str(list(query_vector)), "k": k},
+        )
+        rows = plan.all()
+        await db.rollback()
+    return any("ix_opportunities_embedding_hnsw" in row[0] for row in rows)
+
+
+def _percentile(values: list[float], pct: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return quantiles(values, n=100, method="inclusive")[pct - 1]
+
+
+async def run(queries: int, k: int, ef_values: list[int]) -> None:
+    async with async_session_maker() as db:
+        open_count = (
+            await db.execute(
+                select(func.count())
+                .select_from(Opportunity)
+                .where(Opportunity.is_open.is_(True), Opportunity.embedding.is_not(None))
+            )
+        ).scalar_one()
+        query_vectors = await _sample_query_vectors(db, queries)
+
+    if not query_vectors:
+        print("No embeddings found; sync some company sources first.")
+        return
+
+    print(f"open opportunities with embeddings: {open_count}")
+    print(f"queries: {len(query_vectors)}  k: {k}")
+    print()
+
+    exact_results: list[list[str]] = []
+    exact_latencies: list[float] = []
+    for vector in query_vectors:
+        ids, elapsed_ms = await _timed_recall(vector, k, None)
+        exact_results.append(ids)
+        exact_latencies.append(elapsed_ms)
+
+    header = f"{'mode':<12}{'ef_search':>10}{'recall@k':>10}{'p50 ms':>10}{'p95 ms':>10}  index"
+    print(header)
+    print("-" * len(header))
+    exact_index = await _uses_index(query_vectors[0], k, None)
+    print(
+        f"{'exact':<12}{'-':>10}{1.0:>10.3f}"
+        f"{_percentile(exact_latencies, 50):>10.2f}{_percentile(exact_latencies, 95):>10.2f}"
+        f"  {'yes' if exact_index else 'no'}"
+    )
+
+    for ef_search in ef_values:
+        recalls: list[float] = []
+        latencies: list[float] = []
+        for vector, expected in zip(query_vectors, exact_results):
+            ids, elapsed_ms = await _timed_recall(vector, k, ef_search)
+            latencies.append(elapsed_ms)
+            if expected:
+                recalls.append(len(set(ids) & set(expected)) / len(expected))
+        used_index = await _uses_index(query_vectors[0], k, ef_search)
+        print(
+            f"{'hnsw':<12}{ef_search:>10}{mean(recalls) if recalls else 0.0:>10.3f}"
+            f"{_percentile(latencies, 50):>10.2f}{_percentile(latencies, 95):>10.2f}"
+            f"  {'yes' if used_index else 'no'}"
+        )
+
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=50, help="number of sampled query vectors")
+    parser.add_argument("--k", type=int, default=80, help="rows recalled per query")
+    parser.add_argument(
+        "--ef-search",
+        default="40,80,100,200,400",
+        help="comma-separated hnsw.ef_search values to compare",
+    )
+    args = parser.parse_args()
+    ef_values = [int(value) for value in args.ef_search.split(",") if value.strip()]
+    asyncio.run(run(args.queries, args.k, ef_values))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,54 @@
+from datetime import datetime, timezone
+from time import monotonic
+from types import SimpleNamespace
+
+import numpy as np
 import pytest
+from langchain_core.messages import AIMessageChunk
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
 
 from app.core.config import settings
-from app.services.agent_service import JobMatchingAgent, _extract_json_payload
+from app.models.models import Opportunity, UserJobMatch
+from app.services import agent_service
+from app.services.agent_service import (
+    INCREMENTAL_OVERLAP,
+    JobMatchingAgent,
+    _extract_json_payload,
+    _pack_batches,
+    _salvage_score_items,
+    _structured_prefilter,
+)
+from app.services.lexical_index import OpportunityLexicalIndex
+from app.services.match_run_service import RunMetrics
+from app.services.match_score_cache import opportunity_content_hash
+
+
+class FakeScoreCache:
+    def __init__(self, cached=None):
+        self.cached = cached or {}
+        self.stored = {}
+
+    async def lookup(self, _resume_hash, _profile_hash, _version, opportunity_hashes):
+        return {job_hash: self.cached[job_hash] for job_hash in opportunity_hashes if job_hash in self.cached}
+
+    async def store(self, _resume_hash, _profile_hash, _version, scores_by_hash):
+        self.stored.update(scores_by_hash)
+
+
+class FakeMatchRunService:
+    def __init__(self):
+        self.recorded = []
+
+    async def record(self, **run):
+        self.recorded.append(run)
+
+
+@pytest.fixture(autouse=True)
+def match_runs(monkeypatch):
+    service = FakeMatchRunService()
+    monkeypatch.setattr(agent_service, "match_run_service", service)
+    return service
 
 
 def test_extract_json_payload_from_markdown_array():
@@ -33,8 +80,10 @@ async def test_analyze_matches_batches_llm_rerank(monkeypatch):
     monkeypatch.setattr(settings, "TARGET_JOBS", 2)
     monkeypatch.setattr(settings, "MATCH_LLM_RERANK_LIMIT", 3)
     monkeypatch.setattr(settings, "MATCH_LLM_BATCH_SIZE", 2)
+    monkeypatch.setattr(settings, "MATCH_LLM_BATCH_TOKEN_BUDGET", 0)
 
     agent = object.__new__(JobMatchingAgent)
+    agent.score_cache = FakeScoreCache()
     seen_batches = []
 
     async def fake_score_job_batch(_resume, _profile_text, batch):
@@ -73,3 +122,783 @@ async def test_analyze_matches_batches_llm_rerank(monkeypatch):
     assert [job["title"] for job in result["scored_jobs"]] == ["B", "A", "C"]
     assert result["candidate_stats"]["llm_scored_candidates"] == 3
     assert result["candidate_stats"]["llm_batches"] == 2
+
+
+@pytest.mark.asyncio
+async def test_analyze_matches_only_sends_cache_misses_to_llm(monkeypatch):
+    monkeypatch.setattr(settings, "TARGET_JOBS", 2)
+    monkeypatch.setattr(settings, "MATCH_LLM_RERANK_LIMIT", 3)
+    monkeypatch.setattr(settings, "MATCH_LLM_BATCH_SIZE", 5)
+
+    cached_job = {"title": "A", "company": "Acme", "description": "Build APIs"}
+    fresh_job = {"title": "B", "company": "Beta", "description": "Build systems"}
+    unparsed_job = {"title": "C", "company": "Core", "description": "Build platform"}
+    cache = FakeScoreCache({
+        opportunity_content_hash(cached_job): {
+            "score": 88,
+            "reason": "cached fit",
+            "matched_skills": ["Python"],
+            "missing_skills": [],
+        }
+    })
+    agent = object.__new__(JobMatchingAgent)
+    agent.score_cache = cache
+    events = []
+    agent.progress = lambda event, data: events.append((event, data))
+    seen_batches = []
+
+    async def fake_score_job_batch(_resume, _profile_text, batch):
+        seen_batches.append([job["title"] for job in batch])
+        return [
+            {"score": 75, "reason": "fresh fit", "matched_skills": [], "missing_skills": []},
+            {"score": 0, "reason": "Unable to analyze", "matched_skills": [], "missing_skills": []},
+        ]
+
+    agent._score_job_batch = fake_score_job_batch
+    state = {
+        "resume_text": "Python backend resume",
+        "preferences": {"profile_text": "Backend roles"},
+        "raw_jobs": [cached_job, fresh_job, unparsed_job],
+        "candidate_stats": {},
+        "error": None,
+    }
+
+    result = await JobMatchingAgent._analyze_matches(agent, state)
+
+    assert seen_batches == [["B", "C"]]
+    assert [(job["title"], job["match_score"]) for job in result["scored_jobs"]] == [
+        ("A", 88),
+        ("B", 75),
+        ("C", 0),
+    ]
+    assert list(cache.stored) == [opportunity_content_hash(fresh_job)]
+    assert result["candidate_stats"]["llm_cache_hits"] == 1
+    assert result["candidate_stats"]["llm_scored_candidates"] == 2
+    assert [(data["cached"], [job["title"] for job in data["jobs"]]) for _, data in events] == [
+        (True, ["A"]),
+        (False, ["B", "C"]),
+    ]
+
+
+class FakeRowsResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+
+class FakeRowsSession:
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_exc):
+        return False
+
+    async def execute(self, _statement):
+        return FakeRowsResult(self.rows)
+
+
+@pytest.mark.asyncio
+async def test_merge_previous_matches_keeps_unchanged_scores_next_to_fresh_delta(monkeypatch):
+    monkeypatch.setattr(settings, "TARGET_JOBS", 1)
+    monkeypatch.setattr(settings, "MATCH_LLM_RERANK_LIMIT", 3)
+
+    def previous_match(opportunity_id, score):
+        opportunity = Opportunity(
+            id=opportunity_id,
+            source_type="greenhouse",
+            source_job_id=opportunity_id,
+            title=f"Role {opportunity_id}",
+            company="Acme",
+        )
+        return UserJobMatch(opportunity_id=opportunity_id, match_score=score, matched_skills="[]"), opportunity
+
+    rows = [previous_match("kept", 90), previous_match("rescored", 85), previous_match("low", 40)]
+    monkeypatch.setattr(agent_service, "async_session_maker", lambda: FakeRowsSession(rows))
+    agent = object.__new__(JobMatchingAgent)
+    agent.user_id = "user-1"
+    previous_run_at = datetime(2026, 10, 16, 7, tzinfo=timezone.utc)
+    state = {
+        "scored_jobs": [
+            {"opportunity_id": "rescored", "title": "Role rescored", "match_score": 60},
+            {"opportunity_id": "new", "title": "New role", "match_score": 75},
+        ],
+        "candidate_stats": {"incremental": True},
+        "previous_run_at": previous_run_at,
+        "incremental_since": previous_run_at - INCREMENTAL_OVERLAP,
+        "error": None,
+    }
+
+    result = await JobMatchingAgent._merge_previous_matches(agent, state)
+
+    assert [(job["opportunity_id"], job["match_score"]) for job in result["scored_jobs"]] == [
+        ("kept", 90),
+        ("new", 75),
+        ("rescored", 60),
+    ]
+    assert result["candidate_stats"]["previous_matches_merged"] == 1
+
+
+@pytest.mark.asyncio
+async def test_merge_previous_matches_is_a_no_op_for_full_runs():
+    agent = object.__new__(JobMatchingAgent)
+    state = {"scored_jobs": [{"title": "A", "match_score": 80}], "incremental_since": None, "error": None}
+
+    assert await JobMatchingAgent._merge_previous_matches(agent, state) is state
+
+
+def test_structured_prefilter_reads_derived_columns():
+    filters, rank, has_keywords = _structured_prefilter(
+        {
+            "excluded_companies": ["  Big   Corp "],
+            "keywords": "python, distributed systems",
+            "locations": ["New York, NY"],
+            "remote_preference": "remote",
+            "is_intern": True,
+        },
+    )
+
+    compiled = select(Opportunity.id, rank).where(*filters).compile(dialect=postgresql.dialect())
+    sql = str(compiled)
+
+    assert has_keywords is True
+    assert "opportunities.company_normalized" in sql
+    assert "opportunities.is_intern IS true" in sql
+    assert "opportunities.search_vector @@ (plainto_tsquery(" in sql
+    assert ") || plainto_tsquery(" in sql
+    assert "opportunities.location_tokens @>" in sql
+    assert "opportunities.is_remote IS true" in sql
+    assert "lower(" not in sql
+    assert "big corp" in compiled.params.values()
+    assert ["new", "york", "ny"] in compiled.params.values()
+
+
+class FakeQueueResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+    def scalars(self):
+        return self
+
+
+class FakeQueueSession:
+    def __init__(self, *results):
+        self.results = list(results)
+        self.statements = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_exc):
+        return False
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return FakeQueueResult(self.results.pop(0))
+
+    async def commit(self):
+        self.committed = True
+
+
+class FakeRecallBackend:
+    name = "fake"
+
+    async def recall(self, _db, _query_vector, _limit):
+        return [("opp-1", 0.1), ("opp-2", 0.3)]
+
+
+@pytest.mark.asyncio
+async def test_load_synced_opportunities_hydrates_only_the_selected_ids(monkeypatch):
+    selected = Opportunity(id="opp-2", source_type="greenhouse", source_job_id="acme:2", title="Backend", company="Acme")
+    session = FakeQueueSession(
+        ["opp-4"],
+        ["opp-3"],
+        [("opp-2", 9), ("opp-1", 4), ("opp-3", 1), ("opp-4", 1)],
+        [selected],
+    )
+    monkeypatch.setattr(agent_service, "async_session_maker", lambda: session)
+    agent = object.__new__(JobMatchingAgent)
+    agent.user_id = "user-1"
+    agent.candidate_pool = None
+    agent.recall_backend = FakeRecallBackend()
+
+    jobs, stats = await JobMatchingAgent._load_synced_opportunities(
+        agent,
+        {"keywords": "python"},
+        [0.1] * 3,
+        limit=1,
+    )
+
+    keyword_sql = str(session.statements[0].compile(dialect=postgresql.dialect()))
+    rank_sql = str(session.statements[2].compile(dialect=postgresql.dialect()))
+    hydrate_sql = str(session.statements[3].compile(dialect=postgresql.dialect()))
+    assert "opportunities.search_vector @@ plainto_tsquery" in keyword_sql
+    assert "ts_rank_cd" in keyword_sql
+    assert set(session.statements[2].compile().params["id_1"]) == {"opp-1", "opp-2", "opp-3", "opp-4"}
+    assert rank_sql.startswith("SELECT opportunities.id, ")
+    assert "opportunities.description" not in rank_sql
+    assert "raw_payload" not in hydrate_sql
+    assert [job["opportunity_id"] for job in jobs] == ["opp-2"]
+    assert stats["after_hard_filters"] == 4
+    assert stats["keyword_candidates"] == 1
+    assert stats["scored_candidates"] == 1
+
+
+@pytest.mark.asyncio
+async def test_load_synced_opportunities_preranks_by_bm25_and_vector_similarity(monkeypatch):
+    opportunities = [
+        Opportunity(id=f"opp-{n}", source_type="greenhouse", source_job_id=f"acme:{n}", title=title, company="Acme")
+        for n, title in ((1, "Data Analyst"), (2, "Backend"), (3, "Platform"))
+    ]
+    session = FakeQueueSession(
+        ["opp-3"],
+        [("opp-1", 9), ("opp-2", 9), ("opp-3", 1)],
+        opportunities,
+    )
+    monkeypatch.setattr(agent_service, "async_session_maker", lambda: session)
+    index = OpportunityLexicalIndex()
+    index.apply_rows([
+        ("opp-1", "Data Analyst", "Excel reporting", True, None),
+        ("opp-2", "Backend Engineer", "Python APIs", True, None),
+        ("opp-3", "Platform Engineer", "Python Kubernetes", True, None),
+    ])
+    index._stale, index._refreshed_at = False, monotonic()
+    monkeypatch.setattr(agent_service, "opportunity_lexical_index", index)
+    agent = object.__new__(JobMatchingAgent)
+    agent.user_id = "user-1"
+    agent.candidate_pool = None
+    agent.recall_backend = FakeRecallBackend()
+
+    jobs, stats = await JobMatchingAgent._load_synced_opportunities(
+        agent,
+        {"keywords": ""},
+        [0.1] * 3,
+        limit=3,
+        query_text="Python backend engineer",
+    )
+
+    assert [job["opportunity_id"] for job in jobs] == ["opp-2", "opp-1", "opp-3"]
+    assert stats["prerank"] == "bm25"
+
+
+@pytest.mark.asyncio
+async def test_load_synced_opportunities_skips_prerank_while_lexical_index_is_cold(monkeypatch):
+    opportunities = [
+        Opportunity(id=f"opp-{n}", source_type="greenhouse", source_job_id=f"acme:{n}", title=title, company="Acme")
+        for n, title in ((1, "Data Analyst"), (2, "Backend"), (3, "Platform"))
+    ]
+    session = FakeQueueSession(
+        ["opp-3"],
+        [("opp-1", 9), ("opp-2", 9), ("opp-3", 1)],
+        opportunities,
+    )
+    monkeypatch.setattr(agent_service, "async_session_maker", lambda: session)
+    index = OpportunityLexicalIndex()
+    background_refreshes = []
+    monkeypatch.setattr(index, "refresh_in_background", lambda: background_refreshes.append(True))
+    monkeypatch.setattr(agent_service, "opportunity_lexical_index", index)
+    agent = object.__new__(JobMatchingAgent)
+    agent.user_id = "user-1"
+    agent.candidate_pool = None
+    agent.recall_backend = FakeRecallBackend()
+
+    jobs, stats = await JobMatchingAgent._load_synced_opportunities(
+        agent,
+        {"keywords": ""},
+        [0.1] * 3,
+        limit=3,
+        query_text="Python backend engineer",
+    )
+
+    # Only the three recall statements ran: the catalog is never read inline.
+    assert len(session.statements) == 3
+    assert background_refreshes == [True]
+    assert len(jobs) == 3
+    assert stats["prerank"] != "bm25"
+
+
+@pytest.mark.asyncio
+async def test_load_synced_opportunities_fuses_vector_lexical_and_recent_ranks(monkeypatch):
+    monkeypatch.setattr(settings, "MATCH_LEXICAL_PRERANK", False)
+    monkeypatch.setattr(settings, "MATCH_RRF_RECENT_WEIGHT", 0.25)
+    opportunities = [
+        Opportunity(id=f"opp-{n}", source_type="greenhouse", source_job_id=f"acme:{n}", title="Role", company="Acme")
+        for n in (1, 2, 3, 9)
+    ]
+    session = FakeQueueSession(
+        ["opp-2", "opp-9"],
+        ["opp-3", "opp-9"],
+        # Same preference rank for all, newest first.
+        [("opp-3", 4), ("opp-9", 4), ("opp-1", 4), ("opp-2", 4)],
+        opportunities,
+    )
+    monkeypatch.setattr(agent_service, "async_session_maker", lambda: session)
+    agent = object.__new__(JobMatchingAgent)
+    agent.user_id = "user-1"
+    agent.candidate_pool = None
+    agent.recall_backend = FakeRecallBackend()
+
+    jobs, stats = await JobMatchingAgent._load_synced_opportunities(
+        agent,
+        {"keywords": "python"},
+        [0.1] * 3,
+        limit=3,
+    )
+
+    # Agreeing lists win: vector + lexical, then lexical + recent, then
+    # vector alone. The newest row, only in the recency pool, drops out.
+    assert [job["opportunity_id"] for job in jobs] == ["opp-2", "opp-9", "opp-1"]
+    assert stats["vector_candidates"] == 2
+    assert stats["keyword_candidates"] == 2
+    assert stats["recent_candidates"] == 2
+    assert stats["fusion"] == "rrf"
+
+
+def test_salvage_score_items_reads_complete_entries_of_a_truncated_reply():
+    reply = '```json\n[{"index": 0, "score": 81, "reason": "ok"}, {"index": 1, "score": 64}, {"index": 2, "sco'
+
+    assert _salvage_score_items(reply) == [
+        {"index": 0, "score": 81, "reason": "ok"},
+        {"index": 1, "score": 64},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_bisected_and_only_leaves_fall_back_to_single_calls(monkeypatch):
+    monkeypatch.setattr(settings, "TARGET_JOBS", 4)
+    monkeypatch.setattr(settings, "MATCH_LLM_RERANK_LIMIT", 5)
+    monkeypatch.setattr(settings, "MATCH_LLM_BATCH_SIZE", 5)
+    monkeypatch.setattr(settings, "MATCH_LLM_BATCH_TOKEN_BUDGET", 0)
+    agent = object.__new__(JobMatchingAgent)
+    agent.score_cache = FakeScoreCache()
+    batch_calls = []
+    single_calls = []
+
+    def fit(job):
+        return {"score": 70 + ord(job["title"]) - ord("A"), "reason": "fit", "matched_skills": [], "missing_skills": []}
+
+    async def fake_score_job_batch(_resume, _profile_text, batch):
+        titles = [job["title"] for job in batch]
+        batch_calls.append(titles)
+        if len(batch) == 5:
+            # Cut off after the first entry.
+            return [fit(batch[0]), None, None, None, None]
+        if titles == ["B", "C"]:
+            raise ValueError("malformed JSON")
+        return [None if job["title"] == "E" else fit(job) for job in batch]
+
+    async def fake_score_job(_resume, _profile_text, job):
+        single_calls.append(job["title"])
+        return fit(job)
+
+    agent._score_job_batch = fake_score_job_batch
+    agent._score_job = fake_score_job
+    state = {
+        "resume_text": "Python backend resume",
+        "preferences": {"profile_text": "Backend roles"},
+        "raw_jobs": [{"title": title, "company": "Acme"} for title in "ABCDE"],
+        "candidate_stats": {},
+        "error": None,
+    }
+
+    result = await JobMatchingAgent._analyze_matches(agent, state)
+
+    assert batch_calls == [["A", "B", "C", "D", "E"], ["B", "C"], ["D", "E"]]
+    assert sorted(single_calls) == ["B", "C", "E"]
+    assert [job["title"] for job in result["scored_jobs"]] == ["E", "D", "C", "B", "A"]
+    stats = result["candidate_stats"]
+    assert stats["llm_failed_batches"] == 1
+    assert stats["llm_retry_batches"] == 2
+    assert stats["llm_single_fallbacks"] == 3
+    assert stats["llm_salvaged_jobs"] == 1
+    assert stats["llm_recovered_fraction"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_load_synced_opportunities_ranks_by_best_resume_chunk(monkeypatch):
+    monkeypatch.setattr(settings, "MATCH_LEXICAL_PRERANK", False)
+    monkeypatch.setattr(settings, "MATCH_RRF_RECENT_WEIGHT", 0)
+    monkeypatch.setattr(settings, "MATCH_RRF_CHUNK_WEIGHT", 2.0)
+    opportunities = [
+        Opportunity(id=f"opp-{n}", source_type="greenhouse", source_job_id=f"acme:{n}", title="Role", company="Acme")
+        for n in (1, 2)
+    ]
+    session = FakeQueueSession(
+        [("opp-1", 0), ("opp-2", 0)],
+        # pgvector returns each candidate's best chunk similarity, not its vector.
+        [("opp-1", 0.61), ("opp-2", 0.99)],
+        opportunities,
+    )
+    monkeypatch.setattr(agent_service, "async_session_maker", lambda: session)
+    agent = object.__new__(JobMatchingAgent)
+    agent.user_id = "user-1"
+    agent.candidate_pool = None
+    agent.recall_backend = FakeRecallBackend()
+
+    jobs, stats = await JobMatchingAgent._load_synced_opportunities(
+        agent,
+        {"keywords": ""},
+        [0.1] * 3,
+        limit=2,
+        chunk_embeddings=[[1.0, 0.0, 0.0], [0.0, 0.0, 1.0]],
+    )
+
+    # Vector recall prefers opp-1, but opp-2 matches one resume chunk almost exactly.
+    assert [job["opportunity_id"] for job in jobs] == ["opp-2", "opp-1"]
+    assert stats["resume_chunks"] == 2
+    assert stats["chunk_scored_candidates"] == 2
+    chunk_sql = str(session.statements[1].compile(dialect=postgresql.dialect()))
+    assert "- least(opportunities.embedding <=> " in chunk_sql
+    assert "opportunities.embedding," not in chunk_sql
+
+
+@pytest.mark.asyncio
+async def test_run_reports_each_stage_and_returns_final_state(monkeypatch, match_runs):
+    monkeypatch.setattr(settings, "TARGET_JOBS", 1)
+    events = []
+    agent = object.__new__(JobMatchingAgent)
+    agent.user_id = "user-1"
+    agent.progress = lambda event, data: events.append((event, data))
+
+    async def fetch_context(state):
+        return {**state, "preferences": {"keywords": "python"}}
+
+    async def search_jobs(state):
+        return {**state, "raw_jobs": [{"title": "A"}], "candidate_stats": {"scored_candidates": 1}}
+
+    async def analyze_matches(state):
+        agent._track_usage(SimpleNamespace(usage_metadata={"input_tokens": 120, "output_tokens": 30}))
+        return {**state, "scored_jobs": [{"title": "A", "source_type": "greenhouse", "match_score": 90}]}
+
+    async def passthrough(state):
+        return state
+
+    agent._fetch_context = fetch_context
+    agent._search_jobs = search_jobs
+    agent._analyze_matches = analyze_matches
+    agent._merge_previous_matches = passthrough
+    agent._save_results = passthrough
+
+    result = await JobMatchingAgent.run(agent)
+
+    assert result["success"] is True
+    assert result["jobs_found"] == 1
+    assert result["candidate_stats"] == {"scored_candidates": 1}
+    assert [data["stage"] for event, data in events if event == "stage"] == [
+        "fetch_context",
+        "search_jobs",
+        "analyze_matches",
+        "merge_previous_matches",
+        "filter_and_adjust",
+        "save_results",
+    ]
+    assert events[-1][1]["matched"] == 1
+
+    [recorded] = match_runs.recorded
+    assert recorded["user_id"] == "user-1"
+    assert recorded["trigger"] == "refresh"
+    assert recorded["result"] is result
+    metrics = recorded["metrics"]
+    assert (metrics.llm_requests, metrics.prompt_tokens, metrics.completion_tokens) == (1, 120, 30)
+    assert list(metrics.stages) == [data["stage"] for event, data in events if event == "stage"]
+    assert all(stage["calls"] == 1 for stage in metrics.stages.values())
+
+
+@pytest.mark.asyncio
+async def test_runs_share_one_compiled_workflow_and_route_to_their_own_agent(monkeypatch):
+    monkeypatch.setattr(settings, "TARGET_JOBS", 1)
+    monkeypatch.setattr(agent_service, "agent_runtime", agent_service.AgentRuntime())
+    built = []
+    real_build = agent_service._build_workflow
+
+    def counting_build():
+        built.append(1)
+        return real_build()
+
+    monkeypatch.setattr(agent_service, "_build_workflow", counting_build)
+
+    def make_agent(user_id):
+        agent = JobMatchingAgent(user_id=user_id)
+        seen = agent.seen = []
+
+        async def fetch_context(state):
+            seen.append(agent.user_id)
+            return state
+
+        async def analyze_matches(state):
+            return {**state, "scored_jobs": [{"title": user_id, "match_score": 90}]}
+
+        async def passthrough(state):
+            return state
+
+        agent._fetch_context = fetch_context
+        agent._search_jobs = passthrough
+        agent._analyze_matches = analyze_matches
+        agent._merge_previous_matches = passthrough
+        agent._save_results = passthrough
+        return agent
+
+    first, second = make_agent("user-1"), make_agent("user-2")
+    results = [await first.run(), await second.run()]
+
+    assert built == [1]
+    assert agent_service.agent_runtime._llm is None
+    assert first.seen == ["user-1"] and second.seen == ["user-2"]
+    assert [result["jobs_found"] for result in results] == [1, 1]
+
+
+def test_pack_batches_fills_up_to_the_token_budget():
+    batches = _pack_batches([300, 300, 50, 50, 50, 900, 50], shared_tokens=100, token_budget=700, max_jobs=3)
+
+    assert batches == [
+        ([0, 1], 700),
+        ([2, 3, 4], 250),
+        ([5], 1000),
+        ([6], 150),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_analyze_matches_packs_long_postings_into_smaller_batches(monkeypatch):
+    monkeypatch.setattr(settings, "MATCH_LLM_RERANK_LIMIT", 6)
+    monkeypatch.setattr(settings, "MATCH_LLM_BATCH_SIZE", 10)
+    monkeypatch.setattr(settings, "MATCH_LLM_BATCH_TOKEN_BUDGET", 1200)
+
+    agent = object.__new__(JobMatchingAgent)
+    agent.score_cache = FakeScoreCache()
+    seen_batches = []
+
+    async def fake_score_job_batch(_resume, _profile_text, batch):
+        seen_batches.append([job["title"] for job in batch])
+        return [{"score": 80, "reason": "fit", "matched_skills": [], "missing_skills": []} for _ in batch]
+
+    agent._score_job_batch = fake_score_job_batch
+    raw_jobs = [
+        {"title": "Long 1", "company": "Acme", "description": "x" * 1200},
+        {"title": "Long 2", "company": "Acme", "description": "x" * 1200},
+        {"title": "Long 3", "company": "Acme", "description": "x" * 1200},
+        {"title": "Short 1", "company": "Beta", "description": "APIs"},
+        {"title": "Short 2", "company": "Beta", "description": "APIs"},
+        {"title": "Short 3", "company": "Beta", "description": "APIs"},
+    ]
+    state = {
+        "resume_text": "Python backend resume",
+        "resume_embedding": None,
+        "preferences": {"profile_text": "Backend roles"},
+        "raw_jobs": raw_jobs,
+        "scored_jobs": [],
+        "matched_jobs": [],
+        "threshold": 70,
+        "candidate_stats": {},
+        "error": None,
+    }
+
+    result = await JobMatchingAgent._analyze_matches(agent, state)
+
+    assert seen_batches == [["Long 1", "Long 2"], ["Long 3", "Short 1", "Short 2", "Short 3"]]
+    stats = result["candidate_stats"]
+    assert stats["llm_batches"] == 2
+    assert stats["llm_batch_token_budget"] == 1200
+    assert 0 < stats["llm_batch_tokens_avg"] <= stats["llm_batch_tokens_max"] <= 1200
+
+
+@pytest.mark.asyncio
+async def test_analyze_matches_scores_one_copy_of_near_duplicate_postings(monkeypatch):
+    monkeypatch.setattr(settings, "MATCH_LLM_RERANK_LIMIT", 10)
+    monkeypatch.setattr(settings, "MATCH_LLM_BATCH_TOKEN_BUDGET", 0)
+    monkeypatch.setattr(settings, "MATCH_DEDUP_SIMILARITY", 0.97)
+    vectors = {
+        "opp-nyc": [1.0, 0.0, 0.0],
+        "opp-sf": [0.99, 0.05, 0.0],
+        "opp-ml": [0.98, 0.1, 0.0],
+        "opp-other": [0.0, 1.0, 0.0],
+    }
+
+    class FakeIndex:
+        def vectors(self, ids):
+            found = [opportunity_id for opportunity_id in ids if opportunity_id in vectors]
+            return found, np.asarray([vectors[opportunity_id] for opportunity_id in found], dtype=np.float32)
+
+    agent = object.__new__(JobMatchingAgent)
+    agent.score_cache = FakeScoreCache()
+    agent.candidate_pool = SimpleNamespace(index=FakeIndex())
+    seen_batches = []
+
+    async def fake_score_job_batch(_resume, _profile_text, batch):
+        seen_batches.append([job["opportunity_id"] for job in batch])
+        return [
+            {"score": 90 - index, "reason": f"fit {job['location']}", "matched_skills": [], "missing_skills": []}
+            for index, job in enumerate(batch)
+        ]
+
+    agent._score_job_batch = fake_score_job_batch
+    state = {
+        "resume_text": "Python backend resume",
+        "resume_embedding": None,
+        "preferences": {"profile_text": "Backend roles"},
+        "raw_jobs": [
+            {"opportunity_id": "opp-nyc", "title": "Backend Engineer", "company": "Acme", "location": "NYC"},
+            {"opportunity_id": "opp-sf", "title": "Backend Engineer.", "company": "ACME", "location": "SF"},
+            {"opportunity_id": "opp-ml", "title": "ML Engineer", "company": "Acme", "location": "NYC"},
+            {"opportunity_id": "opp-other", "title": "Backend Engineer", "company": "Acme", "location": "Remote"},
+        ],
+        "scored_jobs": [],
+        "matched_jobs": [],
+        "threshold": 70,
+        "candidate_stats": {},
+        "error": None,
+    }
+
+    result = await JobMatchingAgent._analyze_matches(agent, state)
+
+    # Same company and title with a near-identical embedding collapses; a close
+    # vector under another title, or the same title far apart, does not.
+    assert seen_batches == [["opp-nyc", "opp-ml", "opp-other"]]
+    scores = {job["opportunity_id"]: job["match_score"] for job in result["scored_jobs"]}
+    assert scores == {"opp-nyc": 90, "opp-sf": 90, "opp-ml": 89, "opp-other": 88}
+    stats = result["candidate_stats"]
+    assert stats["dedup_clusters"] == 1
+    assert stats["dedup_collapsed_jobs"] == 1
+    assert stats["llm_scored_candidates"] == 3
+    assert stats["llm_cache_hits"] == 0
+    # Only what the model scored is cached; the SF copy is left out.
+    assert set(agent.score_cache.stored) == {
+        opportunity_content_hash(job) for job in state["raw_jobs"] if job["opportunity_id"] != "opp-sf"
+    }
+
+
+@pytest.mark.asyncio
+async def test_save_results_uses_a_fixed_number_of_set_based_statements(monkeypatch):
+    session = FakeQueueSession(
+        [("opp-legacy", "legacy", "https://example.com/a")],
+        [("match-1", "opp-synced", True), ("match-2", "opp-legacy", True)],
+        [],
+        [],
+        [],
+    )
+    monkeypatch.setattr(agent_service, "async_session_maker", lambda: session)
+    agent = object.__new__(JobMatchingAgent)
+    agent.user_id = "user-1"
+    job = {"title": "Engineer", "company": "Acme", "match_score": 90, "match_reason": "fit"}
+    state = {
+        "matched_jobs": [
+            {**job, "opportunity_id": "opp-synced", "source_type": "greenhouse"},
+            {**job, "url": "https://example.com/a"},
+            # Same legacy key again; ON CONFLICT cannot update a row twice.
+            {**job, "url": "https://example.com/a", "match_score": 80},
+        ],
+    }
+
+    await JobMatchingAgent._save_results(agent, state)
+
+    sql = [str(statement.compile(dialect=postgresql.dialect())) for statement in session.statements]
+    assert len(sql) == 5
+    assert sql[0].startswith("INSERT INTO opportunities")
+    assert "ON CONFLICT ON CONSTRAINT uq_opportunities_source_job DO UPDATE" in sql[0]
+    assert "IS DISTINCT FROM" in sql[0].split("DO UPDATE", 1)[1]
+    assert "RETURNING opportunities.id" in sql[0]
+    assert sql[1].startswith("INSERT INTO user_job_matches")
+    assert "ON CONFLICT ON CONSTRAINT uq_user_job_matches_user_opportunity DO UPDATE" in sql[1]
+    assert sql[2].startswith("UPDATE daily_tasks SET task_order=current_tasks.task_order FROM")
+    assert sql[3].startswith("INSERT INTO daily_tasks (id, user_job_match_id, task_order, is_completed) SELECT")
+    assert "NOT (EXISTS" in sql[3]
+    assert sql[4].startswith("DELETE FROM daily_tasks")
+    assert "NOT IN" in sql[4]
+    assert session.committed is True
+
+    legacy_params = session.statements[0].compile(dialect=postgresql.dialect()).params
+    assert sum(1 for key in legacy_params if key.startswith("source_job_id")) == 1
+    assert "last_scored_at" in sql[1] and "RETURNING user_job_matches.id" in sql[1]
+    assert "IS DISTINCT FROM" in sql[2]
+
+
+@pytest.mark.asyncio
+async def test_save_results_skips_unchanged_rows_and_counts_them(monkeypatch):
+    session = FakeQueueSession(
+        # The WHERE skipped the unchanged legacy row, so RETURNING is empty.
+        [],
+        [("opp-legacy", "legacy", "https://example.com/a")],
+        # The unchanged synced match is skipped too, then only restamped.
+        [("match-2", "opp-legacy", True)],
+        [("match-1", "opp-synced")],
+        [],
+        [],
+        [],
+    )
+    monkeypatch.setattr(agent_service, "async_session_maker", lambda: session)
+    agent = object.__new__(JobMatchingAgent)
+    agent.user_id = "user-1"
+    job = {"title": "Engineer", "company": "Acme", "match_score": 90, "match_reason": "fit"}
+    state = {
+        "matched_jobs": [
+            {**job, "opportunity_id": "opp-synced", "source_type": "greenhouse"},
+            {**job, "url": "https://example.com/a"},
+        ],
+        "candidate_stats": {"scored_candidates": 2},
+    }
+
+    result = await JobMatchingAgent._save_results(agent, state)
+
+    sql = [str(statement.compile(dialect=postgresql.dialect())) for statement in session.statements]
+    assert sql[1].startswith("SELECT opportunities.id")
+    assert "(opportunities.source_type, opportunities.source_job_id) IN" in sql[1]
+    match_params = session.statements[2].compile(dialect=postgresql.dialect()).params
+    assert {value for key, value in match_params.items() if key.startswith("opportunity_id")} == {
+        "opp-synced",
+        "opp-legacy",
+    }
+    upsert_where = sql[2].split("DO UPDATE", 1)[1]
+    assert "IS DISTINCT FROM" in upsert_where
+    assert "user_job_matches.last_scored_at <" not in upsert_where
+    assert sql[3].startswith("UPDATE user_job_matches SET last_scored_at=")
+    assert "RETURNING user_job_matches.id, user_job_matches.opportunity_id" in sql[3]
+    task_params = session.statements[4].compile().params
+    assert {value for key, value in task_params.items() if isinstance(value, str)} >= {"match-1", "match-2"}
+    assert result["candidate_stats"] == {
+        "scored_candidates": 2,
+        "saved_opportunities_skipped": 1,
+        "saved_matches_unchanged": 1,
+        "saved_matches_skipped": 1,
+    }
+
+
+@pytest.mark.asyncio
+async def test_stream_cover_letter_yields_text_and_tracks_total_usage(monkeypatch):
+    seen_inputs = []
+
+    class FakeChain:
+        async def astream(self, inputs):
+            seen_inputs.append(inputs)
+            yield AIMessageChunk(content="Dear")
+            yield AIMessageChunk(content=" Acme")
+            yield AIMessageChunk(
+                content="",
+                usage_metadata={"input_tokens": 300, "output_tokens": 20, "total_tokens": 320},
+            )
+
+    monkeypatch.setattr(agent_service, "agent_runtime", SimpleNamespace(chain=lambda _prompt: FakeChain()))
+    agent = object.__new__(JobMatchingAgent)
+    agent.metrics = RunMetrics()
+    user_match = UserJobMatch(
+        match_reason="Python fit",
+        opportunity=Opportunity(title="Backend Engineer", company="Acme"),
+    )
+
+    parts = [text async for text in agent.stream_cover_letter_for_job("Python resume", user_match)]
+
+    assert parts == ["Dear", " Acme"]
+    assert seen_inputs == [{
+        "resume": "Python resume",
+        "title": "Backend Engineer",
+        "company": "Acme",
+        "reason": "Python fit",
+    }]
+    assert agent.metrics.llm_requests == 1
+    assert (agent.metrics.prompt_tokens, agent.metrics.completion_tokens) == (300, 20)
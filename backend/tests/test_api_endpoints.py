@@ -1,9 +1,11 @@
 from collections import deque
+import time
 from types import SimpleNamespace
 
 import pytest
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
 
 from app.api import auth as auth_api
 from app.api import jobs as jobs_api
@@ -13,6 +15,7 @@ from app.core.config import settings
 from app.core.database import get_db
 from app.core.rate_limit import rate_limiter
 from app.models.models import JobPreference, Resume, User
+from app.services.refresh_job_service import RefreshJob, refresh_job_service
 from app.services.preference_extractor import (
     PreferenceAnalysisResult,
     PreferenceFieldOverrides,
@@ -66,6 +69,13 @@ def reset_auth_rate_limiter():
     rate_limiter.reset()
 
 
+@pytest.fixture(autouse=True)
+def reset_refresh_jobs():
+    refresh_job_service.reset()
+    yield
+    refresh_job_service.reset()
+
+
 def test_google_login_sets_state_cookie_and_redirects(monkeypatch):
     app = build_app(("/api/auth", auth_api.router))
 
@@ -326,7 +336,7 @@ def test_preferences_analyze_returns_preview(monkeypatch):
     assert body["used_fallback"] is True
 
 
-def test_jobs_refresh_runs_synchronously(monkeypatch):
+def test_jobs_refresh_runs_in_background_and_reports_result(monkeypatch):
     session = FakeJobsRefreshSession(
         Resume(user_id="user-1", file_name="resume.pdf"),
         JobPreference(user_id="user-1", effective_fields={"keywords": ["Backend"]}),
@@ -340,8 +350,9 @@ def test_jobs_refresh_runs_synchronously(monkeypatch):
     async def override_user():
         return user
 
-    async def fake_run_job_search(user_id: str):
+    async def fake_run_job_search(user_id: str, progress):
         assert user_id == "user-1"
+        progress("stage", {"stage": "search_jobs", "candidate_stats": {"scored_candidates": 12}})
         return {
             "success": True,
             "jobs_found": 4,
@@ -355,16 +366,104 @@ def test_jobs_refresh_runs_synchronously(monkeypatch):
     app.dependency_overrides[get_current_user] = override_user
     monkeypatch.setattr(jobs_api, "run_job_search", fake_run_job_search)
 
-    client = TestClient(app)
-    response = client.post("/api/jobs/refresh")
-
-    assert response.status_code == 200
-    assert response.json() == {
+    with TestClient(app) as client:
+        response = client.post("/api/jobs/refresh")
+        assert response.status_code == 202
+        started = response.json()
+        assert started["status"] in {"queued", "running", "completed"}
+        refresh_id = started["refresh_id"]
+
+        for _ in range(50):
+            status_response = client.get(f"/api/jobs/refresh/{refresh_id}")
+            if status_response.json()["status"] == "completed":
+                break
+            time.sleep(0.01)
+
+        events_response = client.get(f"/api/jobs/refresh/{refresh_id}/events")
+
+    assert events_response.headers["content-type"].startswith("text/event-stream")
+    assert [line for line in events_response.text.splitlines() if line.startswith("event: ")] == [
+        "event: status",
+        "event: status",
+        "event: stage",
+        "event: status",
+    ]
+    assert 'data: {"status": "completed", "jobs_found": 4}' in events_response.text
+
+    assert status_response.status_code == 200
+    assert status_response.json() == {
         "message": "Job search completed with 4 matched jobs.",
         "status": "completed",
+        "refresh_id": refresh_id,
+        "error": None,
         "jobs_found": 4,
         "final_threshold": 65,
         "used_synced_opportunities": True,
         "source_counts": {"greenhouse": 4},
         "candidate_stats": {"scored_candidates": 12},
     }
+
+
+def test_jobs_search_uses_full_text_index_over_open_opportunities():
+    statements = []
+
+    class RowsResult:
+        def all(self):
+            return [
+                (
+                    SimpleNamespace(
+                        id="opp-1",
+                        source_type="greenhouse",
+                        title="Backend Engineer",
+                        company="Acme",
+                        location="Remote",
+                        salary=None,
+                        url="https://example.com/1",
+                        posted_at=None,
+                    ),
+                    0.6,
+                )
+            ]
+
+    class SearchSession:
+        async def execute(self, statement):
+            statements.append(statement)
+            return RowsResult()
+
+    app = build_app(("/api/jobs", jobs_api.router))
+    app.dependency_overrides[get_current_user] = lambda: User(id="user-1", email="u@example.com")
+
+    async def override_db():
+        yield SearchSession()
+
+    app.dependency_overrides[get_db] = override_db
+
+    with TestClient(app) as client:
+        response = client.get("/api/jobs/search", params={"q": '"backend engineer" -intern', "limit": 5})
+        too_short = client.get("/api/jobs/search", params={"q": "a"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["limit"] == 5
+    assert [(result["id"], result["relevance"]) for result in body["results"]] == [("opp-1", 0.6)]
+    sql = str(statements[0].compile(dialect=postgresql.dialect()))
+    assert "opportunities.search_vector @@ websearch_to_tsquery" in sql
+    assert "opportunities.is_open IS true" in sql
+    assert "opportunities.description" not in sql
+    assert too_short.status_code == 422
+
+
+def test_jobs_refresh_status_hides_other_users_jobs():
+    job = RefreshJob(id="refresh-1", user_id="someone-else")
+    refresh_job_service._jobs[job.id] = job
+    user = User(id="user-1", email="user@example.com", role="user", is_disabled=False)
+    app = build_app(("/api/jobs", jobs_api.router))
+
+    async def override_user():
+        return user
+
+    app.dependency_overrides[get_current_user] = override_user
+
+    response = TestClient(app).get(f"/api/jobs/refresh/{job.id}")
+
+    assert response.status_code == 404
@@ -1,4 +1,5 @@
 from collections import deque
+import json
 from datetime import datetime, timedelta, timezone
 from types import SimpleNamespace
 
@@ -22,6 +23,7 @@ from app.models.models import (
     DailyTask,
     InterviewExperience,
     JobPreference,
+    MatchRun,
     Opportunity,
     Resume,
     SourceSyncRun,
@@ -32,9 +34,10 @@ from app.services.storage_service import StoredFile
 
 
 class FakeResult:
-    def __init__(self, value=None, items=None):
+    def __init__(self, value=None, items=None, rowcount=None):
         self.value = value
         self.items = items
+        self.rowcount = rowcount
 
     def scalar_one_or_none(self):
         return self.value
@@ -84,6 +87,12 @@ class QueueSession:
             obj.uploaded_at = datetime.now(timezone.utc)
         self.refreshed.append(obj)
 
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_exc):
+        return False
+
 
 class FakeStorageService:
     def __init__(self):
@@ -356,6 +365,90 @@ def test_admin_company_source_crud_sync_and_logs(monkeypatch):
     assert source.is_active is False
 
 
+def test_admin_match_runs_list_and_summary():
+    admin_user = User(id="admin-1", email="admin@example.com", role="admin", is_disabled=False)
+    run = MatchRun(
+        id="match-run-1",
+        user_id="user-1",
+        trigger="refresh",
+        status="success",
+        started_at=datetime.now(timezone.utc),
+        duration_ms=5200,
+        db_ms=310,
+        db_queries=14,
+        stage_timings={"analyze_matches": {"calls": 1, "ms": 4700.0, "db_ms": 20.0, "db_queries": 2}},
+        llm_requests=2,
+        prompt_tokens=3100,
+        completion_tokens=400,
+        llm_cache_hits=3,
+        open_opportunities=800,
+        scored_candidates=20,
+        llm_scored_candidates=17,
+        jobs_found=6,
+        candidate_stats={"open_opportunities": 800},
+    )
+    trigger_row = SimpleNamespace(_mapping={
+        "trigger": "refresh",
+        "runs": 1,
+        "failed": 0,
+        "avg_duration_ms": 5200.0,
+        "p95_duration_ms": 5200.0,
+        "avg_db_ms": 310.0,
+        "avg_db_queries": 14.0,
+        "llm_requests": 2,
+        "prompt_tokens": 3100,
+        "completion_tokens": 400,
+        "llm_cache_hits": 3,
+        "avg_open_opportunities": 800.0,
+        "avg_llm_scored_candidates": 17.0,
+        "avg_jobs_found": 6.0,
+    })
+    stage_row = SimpleNamespace(_mapping={
+        "stage": "analyze_matches",
+        "runs": 1,
+        "avg_ms": 4700.0,
+        "p95_ms": 4700.0,
+        "avg_db_ms": 20.0,
+        "avg_db_queries": None,
+    })
+    session = QueueSession(
+        FakeResult(items=[run]),
+        FakeResult(items=[trigger_row]),
+        FakeResult(items=[stage_row]),
+    )
+    app = build_app(("/api/admin", admin_api.router))
+
+    async def override_db():
+        yield session
+
+    async def override_admin():
+        return admin_user
+
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[require_admin] = override_admin
+    client = TestClient(app)
+
+    list_response = client.get("/api/admin/match-runs?status=success&user_id=user-1")
+    assert list_response.status_code == 200
+    assert list_response.json()[0]["stage_timings"]["analyze_matches"]["ms"] == 4700.0
+    assert list_response.json()[0]["prompt_tokens"] == 3100
+
+    assert client.get("/api/admin/match-runs?status=done").status_code == 400
+
+    summary_response = client.get("/api/admin/match-runs/summary?hours=6")
+    assert summary_response.status_code == 200
+    summary = summary_response.json()
+    assert summary["triggers"][0]["p95_duration_ms"] == 5200.0
+    assert summary["stages"] == [{
+        "stage": "analyze_matches",
+        "runs": 1,
+        "avg_ms": 4700.0,
+        "p95_ms": 4700.0,
+        "avg_db_ms": 20.0,
+        "avg_db_queries": 0.0,
+    }]
+
+
 def test_resume_upload_get_and_delete(monkeypatch):
     user = User(id="user-1", email="user@example.com", role="user", is_disabled=False)
     existing_resume = Resume(
@@ -566,6 +659,115 @@ def test_jobs_generate_cover_letter_on_demand(monkeypatch):
     assert session.committed is True
 
 
+def test_jobs_stream_cover_letter_sends_tokens_then_saves(monkeypatch):
+    user = User(id="user-1", email="user@example.com", role="user", is_disabled=False)
+    resume = Resume(user_id="user-1", file_name="resume.pdf", content="Python backend resume")
+    opportunity = Opportunity(id="opp-1", source_type="greenhouse", source_job_id="gh-1", title="Backend Engineer", company="Airbnb")
+    user_match = UserJobMatch(
+        id="match-1",
+        user_id="user-1",
+        opportunity_id="opp-1",
+        opportunity=opportunity,
+        match_score=91,
+    )
+    session = QueueSession(FakeResult(value=user_match), FakeResult(value=resume))
+    save_session = QueueSession(FakeResult(rowcount=1))
+    app = build_app(("/api/jobs", jobs_api.router))
+
+    async def override_db():
+        yield session
+
+    async def override_user():
+        return user
+
+    class FakeAgent:
+        def __init__(self, user_id: str):
+            assert user_id == "user-1"
+
+        async def stream_cover_letter_for_job(self, resume_text: str, match: UserJobMatch):
+            assert resume_text == "Python backend resume"
+            for text in ("Dear", " Airbnb", " team"):
+                yield text
+
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_current_user] = override_user
+    monkeypatch.setattr(jobs_api, "JobMatchingAgent", FakeAgent)
+    monkeypatch.setattr(jobs_api, "async_session_maker", lambda: save_session)
+
+    client = TestClient(app)
+    response = client.post("/api/jobs/match-1/cover-letter/stream")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [block.split("\n") for block in response.text.strip().split("\n\n")]
+    assert [lines[0] for lines in events] == ["event: token"] * 3 + ["event: done"]
+    assert json.loads(events[-1][1][len("data: "):]) == {"job_id": "match-1", "cover_letter": "Dear Airbnb team"}
+    assert save_session.committed is True
+    assert not save_session.results
+
+
+def test_jobs_stream_cover_letter_sends_the_stored_letter_when_another_request_saved_first(monkeypatch):
+    user = User(id="user-1", email="user@example.com", role="user", is_disabled=False)
+    resume = Resume(user_id="user-1", file_name="resume.pdf", content="Python backend resume")
+    user_match = UserJobMatch(id="match-1", user_id="user-1", opportunity_id="opp-1", match_score=91)
+    session = QueueSession(FakeResult(value=user_match), FakeResult(value=resume))
+    # The conditional UPDATE matched no row, so the stored letter is read back.
+    save_session = QueueSession(FakeResult(rowcount=0), FakeResult(value="Letter saved first"))
+    app = build_app(("/api/jobs", jobs_api.router))
+
+    async def override_db():
+        yield session
+
+    async def override_user():
+        return user
+
+    class FakeAgent:
+        def __init__(self, user_id: str):
+            pass
+
+        async def stream_cover_letter_for_job(self, resume_text: str, match: UserJobMatch):
+            yield "Losing letter"
+
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_current_user] = override_user
+    monkeypatch.setattr(jobs_api, "JobMatchingAgent", FakeAgent)
+    monkeypatch.setattr(jobs_api, "async_session_maker", lambda: save_session)
+
+    response = TestClient(app).post("/api/jobs/match-1/cover-letter/stream")
+
+    events = [block.split("\n") for block in response.text.strip().split("\n\n")]
+    assert json.loads(events[-1][1][len("data: "):]) == {"job_id": "match-1", "cover_letter": "Letter saved first"}
+    assert not save_session.results
+
+
+def test_jobs_stream_cover_letter_returns_a_saved_letter_at_once(monkeypatch):
+    user = User(id="user-1", email="user@example.com", role="user", is_disabled=False)
+    user_match = UserJobMatch(id="match-1", user_id="user-1", opportunity_id="opp-1", cover_letter="Saved letter")
+    session = QueueSession(FakeResult(value=user_match))
+    app = build_app(("/api/jobs", jobs_api.router))
+
+    async def override_db():
+        yield session
+
+    async def override_user():
+        return user
+
+    class FailingAgent:
+        def __init__(self, user_id: str):
+            raise AssertionError("a saved letter must not reach the model")
+
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_current_user] = override_user
+    monkeypatch.setattr(jobs_api, "JobMatchingAgent", FailingAgent)
+
+    response = TestClient(app).post("/api/jobs/match-1/cover-letter/stream")
+
+    assert response.status_code == 200
+    assert response.text == (
+        'event: done\ndata: {"job_id": "match-1", "cover_letter": "Saved letter"}\n\n'
+    )
+
+
 def test_tasks_list_complete_uncomplete_and_stats():
     user = User(id="user-1", email="user@example.com", role="user", is_disabled=False)
     opportunity = Opportunity(
@@ -0,0 +1,132 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core.config import settings
+from app.models.models import EMBEDDING_DIM
+from app.services import candidate_pool
+from app.services.candidate_pool import build_candidate_pool, rank_positions, reciprocal_rank_fusion
+from app.services.vector_recall import OpportunityVectorIndex
+
+NOW = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+
+def _vector(*leading: float) -> list[float]:
+    values = [0.0] * EMBEDDING_DIM
+    values[: len(leading)] = leading
+    return values
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+    def scalars(self):
+        return self
+
+
+class FakeSession:
+    def __init__(self, *results):
+        self.results = list(results)
+        self.statements = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_exc):
+        return False
+
+    async def execute(self, _statement, _params=None):
+        self.statements += 1
+        return FakeResult(self.results.pop(0))
+
+
+@pytest.mark.asyncio
+async def test_build_candidate_pool_recalls_all_users_from_one_pool_load():
+    session = FakeSession(
+        [
+            ("opp-backend", _vector(1.0, 0.0), True, NOW),
+            ("opp-frontend", _vector(0.0, 1.0), True, NOW),
+        ],
+        ["opp-frontend", "opp-backend"],
+        [("user-1", _vector(0.9, 0.1)), ("user-2", _vector(0.1, 0.9)), ("user-3", None)],
+    )
+
+    pool = await build_candidate_pool(
+        ["user-1", "user-2", "user-3"],
+        index=OpportunityVectorIndex(),
+        session_factory=lambda: session,
+    )
+
+    assert session.statements == 3
+    assert pool.open_opportunities == 2
+    assert pool.recent_ids == ["opp-frontend", "opp-backend"]
+    assert [hit[0] for hit in pool.hits_for("user-1")] == ["opp-backend", "opp-frontend"]
+    assert [hit[0] for hit in pool.hits_for("user-2")] == ["opp-frontend", "opp-backend"]
+    assert pool.hits_for("user-3") == []
+
+
+@pytest.mark.asyncio
+async def test_later_pools_reuse_the_warm_process_index(monkeypatch):
+    monkeypatch.setattr(settings, "MATCH_RECALL_BACKEND", "numpy")
+    monkeypatch.setattr(settings, "MATCH_RECALL_REFRESH_SECONDS", 3600)
+    index = OpportunityVectorIndex()
+    monkeypatch.setattr(candidate_pool, "opportunity_vector_index", index)
+    first = FakeSession(
+        [("opp-backend", _vector(1.0, 0.0), True, NOW)],
+        ["opp-backend"],
+        [("user-1", _vector(1.0, 0.0))],
+    )
+    second = FakeSession(["opp-backend"], [("user-2", _vector(0.9, 0.1))])
+
+    await build_candidate_pool(["user-1"], session_factory=lambda: first)
+    pool = await build_candidate_pool(["user-2"], session_factory=lambda: second)
+
+    # Only the first claim read embeddings; the next ran recency, resumes and search.
+    assert (first.statements, second.statements) == (3, 2)
+    assert pool.index is index
+    assert [hit[0] for hit in pool.hits_for("user-2")] == ["opp-backend"]
+
+
+@pytest.mark.asyncio
+async def test_pgvector_pools_ask_postgres_and_hold_no_matrix(monkeypatch):
+    monkeypatch.setattr(settings, "MATCH_RECALL_BACKEND", "pgvector")
+    index = OpportunityVectorIndex()
+    monkeypatch.setattr(candidate_pool, "opportunity_vector_index", index)
+    session = FakeSession(
+        ["opp-backend"],
+        [("user-1", _vector(1.0, 0.0)), ("user-2", _vector(0.0, 1.0))],
+        # One search-settings statement and one HNSW query per user.
+        [],
+        [("opp-backend", 0.1)],
+        [],
+        [("opp-frontend", 0.2)],
+    )
+
+    pool = await build_candidate_pool(["user-1", "user-2"], session_factory=lambda: session)
+
+    assert pool.index is None
+    assert len(index) == 0
+    assert pool.hits_for("user-1") == [("opp-backend", 0.1)]
+    assert pool.hits_for("user-2") == [("opp-frontend", 0.2)]
+
+
+def test_reciprocal_rank_fusion_rewards_agreement_and_skips_zero_weights():
+    fused = reciprocal_rank_fusion(
+        {
+            "vector": rank_positions(["a", "b", "c"]),
+            "lexical": rank_positions(["c", "b", "a", "b"]),
+            "recent": rank_positions(["d"]),
+        },
+        {"vector": 1.0, "lexical": 3.0, "recent": 0.0},
+        k=1,
+    )
+
+    assert set(fused) == {"a", "b", "c"}
+    assert fused["a"] == pytest.approx(1 / 2 + 3 / 4)
+    assert fused["b"] == pytest.approx(1 / 3 + 3 / 3)
+    assert fused["c"] == pytest.approx(1 / 4 + 3 / 2)
+    assert sorted(fused, key=fused.get, reverse=True) == ["c", "b", "a"]
@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.services.lexical_index import OpportunityLexicalIndex, prerank
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    def __init__(self, *row_sets):
+        self.row_sets = list(row_sets)
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return FakeResult(self.row_sets.pop(0))
+
+
+NOW = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+
+def test_score_prefers_rare_terms_and_title_matches():
+    index = OpportunityLexicalIndex()
+    index.apply_rows([
+        ("a", "Backend Engineer", "Python services and Kubernetes", True, NOW),
+        ("b", "Kubernetes Engineer", "Operate clusters", True, NOW),
+        ("c", "Frontend Engineer", "React and TypeScript", True, NOW),
+    ])
+
+    scores = index.score("kubernetes engineer", ["a", "b", "c", "unknown"])
+
+    assert scores["b"] > scores["a"] > scores["c"] > 0
+    assert scores["unknown"] == 0.0
+
+
+def test_apply_rows_replaces_changed_documents_and_drops_closed_ones():
+    index = OpportunityLexicalIndex()
+    index.apply_rows([
+        ("a", "Python Developer", "Django", True, NOW),
+        ("b", "Go Developer", "gRPC", True, NOW),
+    ])
+
+    index.apply_rows([
+        ("a", "Rust Developer", "Tokio", True, NOW + timedelta(minutes=1)),
+        ("b", "Go Developer", "gRPC", False, NOW + timedelta(minutes=2)),
+    ])
+
+    assert len(index) == 1
+    assert index.watermark == NOW + timedelta(minutes=2)
+    assert index.score("python django", ["a"]) == {"a": 0.0}
+    assert index.score("rust", ["a"])["a"] > 0
+    assert "grpc" not in index._postings
+
+
+@pytest.mark.asyncio
+async def test_refresh_reads_only_rows_changed_since_the_watermark():
+    index = OpportunityLexicalIndex()
+    session = FakeSession(
+        [("a", "Data Engineer", "Spark", True, NOW)],
+        [("b", "Data Analyst", "SQL", True, NOW + timedelta(hours=1))],
+    )
+
+    await index.ensure_fresh(session)
+    assert not index.needs_refresh()
+    index.mark_stale()
+    await index.ensure_fresh(session)
+
+    assert "updated_at >" in str(session.statements[1])
+    assert "updated_at >" not in str(session.statements[0])
+    assert len(index) == 2
+
+
+def test_prerank_blends_lexical_and_vector_signals_and_keeps_ties_in_order():
+    ids = ["a", "b", "c", "d"]
+    lexical = {"a": 0.0, "b": 4.0, "c": 2.0, "d": 0.0}
+    distances = {"a": 0.1, "c": 0.2}
+
+    assert prerank(ids, lexical, distances, lexical_weight=0.5) == ["c", "b", "a", "d"]
+    assert prerank(ids, lexical, distances, lexical_weight=1.0) == ["b", "c", "a", "d"]
+    assert prerank(ids, {}, {}, lexical_weight=0.5) == ids
+
+
+@pytest.mark.asyncio
+async def test_refresh_in_background_warms_the_index_once():
+    session = FakeSession([("a", "Python Developer", "Django", True, NOW)])
+
+    class SessionContext:
+        async def __aenter__(self):
+            return session
+
+        async def __aexit__(self, *_exc):
+            return False
+
+    index = OpportunityLexicalIndex()
+    assert not index.is_warm
+
+    index.refresh_in_background(SessionContext)
+    index.refresh_in_background(SessionContext)
+    await index._refresh_task
+
+    assert index.is_warm
+    assert len(session.statements) == 1
+    assert index.score("python", ["a"])["a"] > 0
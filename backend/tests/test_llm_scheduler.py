@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+
+from app.core import llm_scheduler as scheduler_module
+from app.core.enums import LLMPriority
+from app.core.llm_scheduler import LLMScheduler, estimate_tokens
+
+
+class FakeResponse:
+    def __init__(self, total_tokens):
+        self.usage_metadata = {"total_tokens": total_tokens}
+
+
+@pytest.mark.asyncio
+async def test_run_caps_concurrency():
+    scheduler = LLMScheduler(max_concurrency=2, tokens_per_minute=0, requests_per_minute=0)
+    running = 0
+    peak = 0
+
+    async def call():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return "ok"
+
+    results = await asyncio.gather(*(scheduler.run(call, estimated_tokens=10) for _ in range(5)))
+
+    assert results == ["ok"] * 5
+    assert peak == 2
+    assert scheduler.active == 0
+
+
+@pytest.mark.asyncio
+async def test_interactive_calls_overtake_queued_batch_calls():
+    scheduler = LLMScheduler(max_concurrency=1, tokens_per_minute=0, requests_per_minute=0)
+    release = asyncio.Event()
+    order = []
+
+    async def blocker():
+        await release.wait()
+        return "blocker"
+
+    def recorder(name):
+        async def call():
+            order.append(name)
+            return name
+        return call
+
+    first = asyncio.create_task(scheduler.run(blocker, estimated_tokens=1))
+    await asyncio.sleep(0)
+    batch = asyncio.create_task(scheduler.run(recorder("batch"), estimated_tokens=1, priority=LLMPriority.BATCH))
+    interactive = asyncio.create_task(
+        scheduler.run(recorder("interactive"), estimated_tokens=1, priority=LLMPriority.INTERACTIVE)
+    )
+    await asyncio.sleep(0)
+    assert scheduler.queued == 2
+
+    release.set()
+    await asyncio.gather(first, batch, interactive)
+
+    assert order == ["interactive", "batch"]
+
+
+@pytest.mark.asyncio
+async def test_token_budget_delays_until_window_frees(monkeypatch):
+    monkeypatch.setattr(scheduler_module, "_WINDOW_SECONDS", 0.05)
+    scheduler = LLMScheduler(max_concurrency=0, tokens_per_minute=100, requests_per_minute=0)
+    loop = asyncio.get_running_loop()
+
+    async def call():
+        return loop.time()
+
+    first_at = await scheduler.run(call, estimated_tokens=80)
+    second_at = await scheduler.run(call, estimated_tokens=80)
+
+    assert second_at - first_at >= 0.04
+
+
+@pytest.mark.asyncio
+async def test_reported_usage_replaces_the_estimate():
+    scheduler = LLMScheduler(max_concurrency=0, tokens_per_minute=1000, requests_per_minute=0)
+
+    async def call():
+        return FakeResponse(total_tokens=30)
+
+    await scheduler.run(call, estimated_tokens=500)
+
+    assert scheduler._window_tokens == 30
+
+
+@pytest.mark.asyncio
+async def test_failed_call_releases_its_slot():
+    scheduler = LLMScheduler(max_concurrency=1, tokens_per_minute=0, requests_per_minute=0)
+
+    async def failing():
+        raise RuntimeError("429")
+
+    with pytest.raises(RuntimeError):
+        await scheduler.run(failing, estimated_tokens=1)
+
+    assert scheduler.active == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_holds_its_slot_until_the_consumer_stops():
+    scheduler = LLMScheduler(max_concurrency=1, tokens_per_minute=1000, requests_per_minute=0)
+
+    async def chunks():
+        yield "Dear"
+        yield " team"
+        yield FakeResponse(total_tokens=40)
+
+    stream = scheduler.stream(chunks, estimated_tokens=500, priority=LLMPriority.INTERACTIVE)
+    assert await stream.__anext__() == "Dear"
+    assert scheduler.active == 1
+    await stream.aclose()
+    assert scheduler.active == 0
+    # Stopped before the usage chunk, so the estimate stands.
+    assert scheduler._window_tokens == 500
+
+    received = [chunk async for chunk in scheduler.stream(chunks, estimated_tokens=500)]
+
+    assert received[:2] == ["Dear", " team"]
+    assert scheduler.active == 0
+    assert scheduler._window_tokens == 540
+
+
+def test_estimate_tokens_adds_completion_budget():
+    assert estimate_tokens("a" * 40, None, "b" * 8, completion_tokens=5) == 17
@@ -0,0 +1,276 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.core.config import settings
+from app.services import scheduler_service as scheduler_module
+from app.services.match_queue import ClaimedJob, MatchJobQueue
+
+
+class FakeResult:
+    def __init__(self, rows=None):
+        self.rows = rows or []
+
+    def all(self):
+        return self.rows
+
+    def scalars(self):
+        return self
+
+    def scalar_one_or_none(self):
+        return self.rows[0] if self.rows else None
+
+
+class FakeQueueSession:
+    def __init__(self, results):
+        self.results = list(results)
+        self.statements = []
+        self.committed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_exc):
+        return False
+
+    async def execute(self, statement):
+        self.statements.append(str(statement.compile(dialect=postgresql.dialect())))
+        return self.results.pop(0)
+
+    async def commit(self):
+        self.committed = True
+
+
+@pytest.mark.asyncio
+async def test_claim_leases_rows_with_skip_locked():
+    scored_since = datetime(2026, 10, 17, 11, tzinfo=timezone.utc)
+    session = FakeQueueSession([
+        FakeResult(),
+        FakeResult([SimpleNamespace(id="job-1", user_id="user-1", scored_since=scored_since, attempts=1)]),
+    ])
+    queue = MatchJobQueue(session_factory=lambda: session, worker_id="worker-a")
+
+    jobs = await queue.claim(limit=3)
+
+    assert jobs == [ClaimedJob(id="job-1", user_id="user-1", scored_since=scored_since, attempts=1)]
+    reap, claim = session.statements
+    assert "lease_expires_at < now()" in reap and "attempts >=" in reap
+    assert "FOR UPDATE SKIP LOCKED" in claim
+    assert "attempts=(match_jobs.attempts +" in claim
+    assert session.committed
+
+
+@pytest.mark.asyncio
+async def test_fail_backs_off_and_only_touches_own_lease():
+    session = FakeQueueSession([FakeResult()])
+    queue = MatchJobQueue(session_factory=lambda: session, worker_id="worker-a")
+
+    released = await queue.fail("job-1", "boom")
+
+    assert released is False
+    statement = session.statements[0]
+    assert "match_jobs.leased_by = " in statement
+    assert "CASE WHEN (match_jobs.attempts >=" in statement
+    assert "available_at=(now() +" in statement
+
+
+@pytest.mark.asyncio
+async def test_drain_completes_retries_and_skips_digest_for_lost_leases(monkeypatch):
+    scored_since = datetime(2026, 10, 17, 11, tzinfo=timezone.utc)
+    batches = [
+        [ClaimedJob(id="job-ok", user_id="user-ok", scored_since=scored_since, attempts=1)],
+        [ClaimedJob(id="job-bad", user_id="user-bad", scored_since=scored_since, attempts=2)],
+        [ClaimedJob(id="job-lost", user_id="user-lost", scored_since=scored_since, attempts=1)],
+    ]
+    claim_limits = []
+    events = []
+
+    class FakeQueue:
+        worker_id = "worker-a"
+
+        def lease_heartbeat(self):
+            return FakeHeartbeat()
+
+        async def claim(self, limit):
+            claim_limits.append(limit)
+            return batches.pop(0) if batches else []
+
+        async def complete(self, job_id):
+            events.append(("complete", job_id))
+            return job_id != "job-lost"
+
+        async def fail(self, job_id, error):
+            events.append(("fail", job_id, error))
+            return True
+
+    class FakeHeartbeat:
+        async def __aenter__(self):
+            return None
+
+        async def __aexit__(self, *_exc):
+            return False
+
+    class FakeAgent:
+        def __init__(self, user_id, **_kwargs):
+            self.user_id = user_id
+
+        async def run(self):
+            if self.user_id == "user-bad":
+                return {"success": False, "error": "llm down"}
+            return {"success": True, "jobs_found": 2}
+
+    async def fake_pool(user_ids):
+        return SimpleNamespace(user_ids=user_ids)
+
+    async def fake_digest(user_id, scored_since):
+        events.append(("digest", user_id, scored_since))
+
+    monkeypatch.setattr(settings, "MATCH_PUSH_CONCURRENCY", 1)
+    monkeypatch.setattr(scheduler_module, "match_job_queue", FakeQueue())
+    monkeypatch.setattr(scheduler_module, "JobMatchingAgent", FakeAgent)
+    monkeypatch.setattr(scheduler_module, "build_candidate_pool", fake_pool)
+    monkeypatch.setattr(
+        scheduler_module,
+        "notification_service",
+        SimpleNamespace(send_daily_digest=fake_digest),
+    )
+
+    processed = await scheduler_module.SchedulerService().drain_match_queue()
+
+    assert processed == 3
+    assert events == [
+        ("complete", "job-ok"),
+        ("digest", "user-ok", scored_since),
+        ("fail", "job-bad", "llm down"),
+        ("complete", "job-lost"),
+    ]
+    # With one slot, never more than one lease at a time.
+    assert set(claim_limits) == {1}
+
+
+@pytest.mark.asyncio
+async def test_drain_overlaps_users_and_isolates_their_errors(monkeypatch):
+    scored_since = datetime(2026, 10, 17, 11, tzinfo=timezone.utc)
+    batches = [
+        [ClaimedJob(id="job-1", user_id="user-1", scored_since=scored_since, attempts=1)],
+        [ClaimedJob(id="job-2", user_id="user-2", scored_since=scored_since, attempts=1)],
+    ]
+    started = []
+    both_started = asyncio.Event()
+    claim_limits = []
+
+    class FakeHeartbeat:
+        async def __aenter__(self):
+            return None
+
+        async def __aexit__(self, *_exc):
+            return False
+
+    class FakeQueue:
+        def lease_heartbeat(self):
+            return FakeHeartbeat()
+
+        async def claim(self, limit):
+            claim_limits.append(limit)
+            return batches.pop(0) if batches else []
+
+        async def complete(self, job_id):
+            if job_id == "job-2":
+                raise RuntimeError("connection reset")
+            return False
+
+        async def fail(self, job_id, error):
+            return True
+
+    class FakeAgent:
+        def __init__(self, user_id, **_kwargs):
+            self.user_id = user_id
+
+        async def run(self):
+            started.append(self.user_id)
+            if len(started) == 2:
+                both_started.set()
+            # Only returns once the other user's pipeline is in flight too.
+            await asyncio.wait_for(both_started.wait(), timeout=1)
+            return {"success": True, "jobs_found": 1}
+
+    pools = []
+
+    async def fake_pool(user_ids):
+        pools.append(user_ids)
+        return None
+
+    monkeypatch.setattr(settings, "MATCH_PUSH_CONCURRENCY", 2)
+    monkeypatch.setattr(scheduler_module, "match_job_queue", FakeQueue())
+    monkeypatch.setattr(scheduler_module, "JobMatchingAgent", FakeAgent)
+    monkeypatch.setattr(scheduler_module, "build_candidate_pool", fake_pool)
+
+    processed = await scheduler_module.SchedulerService().drain_match_queue()
+
+    assert processed == 2
+    assert sorted(started) == ["user-1", "user-2"]
+    # Claims ask for the free slots only: two, then the one left.
+    assert claim_limits[:2] == [2, 1]
+    # One recall pass per claim, never one per slot.
+    assert pools == [["user-1"], ["user-2"]]
+
+
+@pytest.mark.asyncio
+async def test_overlapping_drains_share_the_process_concurrency_cap(monkeypatch):
+    scored_since = datetime(2026, 10, 17, 11, tzinfo=timezone.utc)
+    batches = [
+        [ClaimedJob(id=f"job-{n}", user_id=f"user-{n}", scored_since=scored_since, attempts=1)]
+        for n in range(4)
+    ]
+    in_flight = 0
+    peak = 0
+
+    class FakeHeartbeat:
+        async def __aenter__(self):
+            return None
+
+        async def __aexit__(self, *_exc):
+            return False
+
+    class FakeQueue:
+        def lease_heartbeat(self):
+            return FakeHeartbeat()
+
+        async def claim(self, limit):
+            return batches.pop(0) if batches else []
+
+        async def complete(self, job_id):
+            return False
+
+        async def fail(self, job_id, error):
+            return True
+
+    class FakeAgent:
+        def __init__(self, user_id, **_kwargs):
+            pass
+
+        async def run(self):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return {"success": True, "jobs_found": 1}
+
+    async def fake_pool(user_ids):
+        return None
+
+    monkeypatch.setattr(settings, "MATCH_PUSH_CONCURRENCY", 2)
+    monkeypatch.setattr(scheduler_module, "match_job_queue", FakeQueue())
+    monkeypatch.setattr(scheduler_module, "JobMatchingAgent", FakeAgent)
+    monkeypatch.setattr(scheduler_module, "build_candidate_pool", fake_pool)
+    service = scheduler_module.SchedulerService()
+
+    # The interval drain and the daily push drain at the same time.
+    processed = await asyncio.gather(service.drain_match_queue(), service.drain_match_queue())
+
+    assert sum(processed) == 4
+    assert peak == 2
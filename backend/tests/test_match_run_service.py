@@ -0,0 +1,105 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import settings
+from app.services import scheduler_service as scheduler_module
+from app.services.match_run_service import MatchRunService, RunMetrics
+
+
+class FakeSession:
+    def __init__(self):
+        self.added = []
+        self.executed = []
+        self.committed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_exc):
+        return False
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    async def execute(self, statement):
+        self.executed.append(statement)
+
+    async def commit(self):
+        self.committed = True
+
+
+def test_end_stage_sums_repeated_nodes():
+    metrics = RunMetrics()
+    metrics.end_stage("filter_and_adjust")
+    metrics.db_seconds, metrics.db_queries = 0.25, 3
+    metrics.end_stage("filter_and_adjust")
+    metrics.end_stage("save_results")
+
+    assert metrics.stages["filter_and_adjust"]["calls"] == 2
+    assert metrics.stages["filter_and_adjust"]["db_ms"] == 250.0
+    assert metrics.stages["filter_and_adjust"]["db_queries"] == 3
+    assert metrics.stages["save_results"]["db_queries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_record_writes_timings_tokens_and_funnel():
+    session = FakeSession()
+    service = MatchRunService(session_factory=lambda: session)
+    metrics = RunMetrics(db_seconds=0.4, db_queries=12)
+    metrics.add_usage(SimpleNamespace(usage_metadata={"input_tokens": 900, "output_tokens": 150}))
+    metrics.add_usage(SimpleNamespace(usage_metadata=None))
+    metrics.end_stage("search_jobs")
+
+    run = await service.record(
+        user_id="user-1",
+        trigger="daily_push",
+        metrics=metrics,
+        result={
+            "success": True,
+            "jobs_found": 4,
+            "candidate_stats": {
+                "open_opportunities": 300,
+                "scored_candidates": 20,
+                "llm_scored_candidates": 15,
+                "llm_cache_hits": 5,
+            },
+        },
+    )
+
+    assert session.added == [run] and session.committed
+    assert run.status == "success"
+    assert run.db_ms == 400 and run.db_queries == 12
+    assert (run.llm_requests, run.prompt_tokens, run.completion_tokens) == (2, 900, 150)
+    assert (run.open_opportunities, run.llm_scored_candidates, run.llm_cache_hits, run.jobs_found) == (300, 15, 5, 4)
+    assert set(run.stage_timings) == {"search_jobs"}
+
+
+@pytest.mark.asyncio
+async def test_record_failure_does_not_raise(monkeypatch):
+    def broken_factory():
+        raise RuntimeError("database unavailable")
+
+    service = MatchRunService(session_factory=broken_factory)
+
+    assert await service.record(user_id="user-1", trigger="refresh", metrics=RunMetrics(), result={"success": False}) is None
+
+    monkeypatch.setattr(settings, "MATCH_RUN_RECORDING", False)
+    session = FakeSession()
+    service = MatchRunService(session_factory=lambda: session)
+    assert await service.record(user_id="user-1", trigger="refresh", metrics=RunMetrics(), result={"success": True}) is None
+    assert session.added == []
+
+
+@pytest.mark.asyncio
+async def test_cleanup_prunes_match_runs_past_retention(monkeypatch):
+    session = FakeSession()
+    monkeypatch.setattr(scheduler_module, "async_session_maker", lambda: session)
+
+    await scheduler_module.SchedulerService().cleanup_old_data()
+
+    tables = [statement.table.name for statement in session.executed]
+    assert "match_runs" in tables
+    runs_delete = session.executed[tables.index("match_runs")]
+    assert "match_runs.started_at <" in str(runs_delete.whereclause)
+    assert session.committed
@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from app.core.enums import RefreshJobStatus
+from app.services.refresh_job_service import RefreshJobService
+
+
+@pytest.mark.asyncio
+async def test_second_request_joins_the_active_job():
+    service = RefreshJobService()
+    release = asyncio.Event()
+    calls = []
+
+    async def runner(user_id, _progress):
+        calls.append(user_id)
+        await release.wait()
+        return {"success": True, "jobs_found": 3}
+
+    first, first_created = service.submit("user-1", runner)
+    second, second_created = service.submit("user-1", runner)
+    other, other_created = service.submit("user-2", runner)
+    await asyncio.sleep(0)
+
+    assert first_created is True and other_created is True
+    assert second_created is False
+    assert second is first
+    assert first.status == RefreshJobStatus.RUNNING
+
+    release.set()
+    await asyncio.sleep(0.01)
+
+    assert calls == ["user-1", "user-2"]
+    assert first.status == RefreshJobStatus.COMPLETED
+    assert first.result["jobs_found"] == 3
+    third, third_created = service.submit("user-1", runner)
+    assert third_created is True and third is not first
+    service.reset()
+
+
+@pytest.mark.asyncio
+async def test_failed_runs_are_reported_and_free_the_user(monkeypatch):
+    service = RefreshJobService()
+
+    async def failing(_user_id, _progress):
+        return {"success": False, "error": "Missing resume or preferences"}
+
+    async def crashing(_user_id, _progress):
+        raise RuntimeError("boom")
+
+    failed, _ = service.submit("user-1", failing)
+    await asyncio.sleep(0.01)
+    crashed, created = service.submit("user-1", crashing)
+    await asyncio.sleep(0.01)
+
+    assert failed.status == RefreshJobStatus.FAILED
+    assert failed.error == "Missing resume or preferences"
+    assert created is True
+    assert crashed.status == RefreshJobStatus.FAILED
+    assert crashed.error == "boom"
+    assert service.get(crashed.id) is crashed
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_keeps_extra_jobs_queued(monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.MATCH_REFRESH_MAX_CONCURRENCY", 1)
+    service = RefreshJobService()
+    release = asyncio.Event()
+
+    async def runner(_user_id, _progress):
+        await release.wait()
+        return {"success": True}
+
+    running, _ = service.submit("user-1", runner)
+    waiting, _ = service.submit("user-2", runner)
+    await asyncio.sleep(0)
+
+    assert running.status == RefreshJobStatus.RUNNING
+    assert waiting.status == RefreshJobStatus.QUEUED
+
+    release.set()
+    await asyncio.sleep(0.01)
+    assert waiting.status == RefreshJobStatus.COMPLETED
+
+
+@pytest.mark.asyncio
+async def test_follow_replays_then_streams_until_finished():
+    service = RefreshJobService()
+    release = asyncio.Event()
+
+    async def runner(_user_id, progress):
+        progress("stage", {"stage": "fetch_context"})
+        await release.wait()
+        progress("batch", {"cached": False, "jobs": []})
+        return {"success": True, "jobs_found": 0}
+
+    job, _ = service.submit("user-1", runner)
+    await asyncio.sleep(0)
+
+    async def collect():
+        return [item async for item in service.follow(job, keepalive_seconds=0.005)]
+
+    follower = asyncio.create_task(collect())
+    await asyncio.sleep(0.02)
+    release.set()
+    items = await follower
+
+    events = [item[0] if item else None for item in items]
+    assert events[:3] == ["status", "status", "stage"]
+    assert None in events
+    assert [event for event in events if event][-2:] == ["batch", "status"]
+    assert items[-1][1] == {"status": "completed", "jobs_found": 0}
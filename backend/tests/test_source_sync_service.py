@@ -23,12 +23,14 @@ class FakeSession:
     def __init__(self, *results):
         self.results = deque(results)
         self.added = []
+        self.statements = []
         self.flushes = 0
 
     def add(self, obj):
         self.added.append(obj)
 
-    async def execute(self, _statement):
+    async def execute(self, statement):
+        self.statements.append(statement)
         if not self.results:
             raise AssertionError("No fake result queued for execute()")
         return self.results.popleft()
@@ -106,4 +108,45 @@ async def test_greenhouse_sync_upserts_jobs_and_closes_missing_opportunities():
     assert created_opportunity.location == "Remote"
     assert created_opportunity.description == "Build Python services."
     assert created_opportunity.embedding == [0.1] * 1536
+    assert created_opportunity.company_normalized == "acme"
+    assert created_opportunity.is_remote is True
+    assert created_opportunity.is_intern is False
+    assert created_opportunity.location_tokens == ["remote"]
     assert embedding_service.jobs[0]["source_job_id"] == "acme:123"
+
+
+@pytest.mark.asyncio
+async def test_greenhouse_sync_leaves_updated_at_alone_for_unchanged_jobs():
+    source = CompanySource(
+        id="source-1",
+        source_type=SourceType.GREENHOUSE,
+        company_name="Acme",
+        board_token="acme",
+        is_active=True,
+    )
+    first_sync = FakeSession(FakeResult(items=[]), FakeResult(items=[]))
+    service = CompanySourceSyncService(
+        greenhouse_client=FakeGreenhouseClient(),
+        embedding_service=FakeEmbeddingService(),
+    )
+    await service.sync_company_source(first_sync, source)
+    synced = next(item for item in first_sync.added if isinstance(item, Opportunity))
+    synced.id = "opp-1"
+    synced.company_source_id = source.id
+
+    second_sync = FakeSession(
+        FakeResult(items=[synced]),
+        FakeResult(),
+        FakeResult(items=[synced]),
+    )
+    embedding_service = FakeEmbeddingService()
+    service.embedding_service = embedding_service
+
+    run = await service.sync_company_source(second_sync, source)
+
+    assert run.status == SourceSyncStatus.SUCCESS
+    assert embedding_service.jobs == []
+    bulk_update = second_sync.statements[1]
+    assert bulk_update.is_update
+    assert set(bulk_update.compile().params) >= {"last_seen_at"}
+    assert "updated_at" in str(bulk_update)
@@ -0,0 +1,161 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.models.models import EMBEDDING_DIM
+from app.services.vector_recall import (
+    NumpyRecall,
+    OpportunityVectorIndex,
+    max_chunk_similarity,
+    near_duplicate_representatives,
+)
+
+
+def _vector(*leading: float) -> list[float]:
+    values = [0.0] * EMBEDDING_DIM
+    values[: len(leading)] = leading
+    return values
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    def __init__(self, *row_sets):
+        self.row_sets = list(row_sets)
+        self.executed = 0
+
+    async def execute(self, _statement):
+        self.executed += 1
+        return FakeResult(self.row_sets.pop(0))
+
+
+NOW = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+
+def test_search_returns_nearest_first_with_cosine_distance():
+    index = OpportunityVectorIndex()
+    index.apply_rows([
+        ("a", _vector(1.0, 0.0), True, NOW),
+        ("b", _vector(0.0, 1.0), True, NOW),
+        ("c", _vector(1.0, 1.0), True, NOW),
+    ])
+
+    hits = index.search(_vector(2.0, 0.1), k=2)
+
+    assert [opportunity_id for opportunity_id, _ in hits] == ["a", "c"]
+    assert hits[0][1] == pytest.approx(1 - 2.0 / np.hypot(2.0, 0.1), abs=1e-5)
+
+
+def test_max_chunk_similarity_scores_the_best_matching_resume_chunk():
+    index = OpportunityVectorIndex()
+    index.apply_rows([
+        ("a", _vector(1.0, 0.0), True, NOW),
+        ("c", _vector(1.0, 1.0), True, NOW),
+    ])
+
+    found, matrix = index.vectors(["c", "missing", "a"])
+    similarities = max_chunk_similarity([_vector(1.0, 0.0), _vector(0.0, 1.0)], matrix)
+
+    # The averaged resume (1, 1) would prefer "c"; chunk-wise "a" fits one section exactly.
+    assert found == ["c", "a"]
+    assert similarities == pytest.approx([np.sqrt(0.5), 1.0], abs=1e-5)
+
+
+def test_near_duplicates_need_the_same_key_and_a_close_vector():
+    matrix = np.asarray([
+        [1.0, 0.0, 0.0],
+        [0.99, 0.05, 0.0],
+        [1.0, 0.0, 0.0],
+        [0.0, 1.0, 0.0],
+    ])
+    keys = ["acme|engineer", "acme|engineer", "beta|engineer", "acme|engineer"]
+
+    # Row 2 is identical but at another company; row 3 shares the key only.
+    assert near_duplicate_representatives(keys, matrix, 0.97) == [0, 0, 2, 3]
+    assert near_duplicate_representatives([], np.zeros((0, 3)), 0.97) == []
+
+
+def test_apply_rows_replaces_changed_and_drops_closed_embeddings():
+    index = OpportunityVectorIndex()
+    index.apply_rows([
+        ("a", _vector(1.0, 0.0), True, NOW),
+        ("b", _vector(0.0, 1.0), True, NOW),
+    ])
+
+    changed = index.apply_rows([
+        ("a", _vector(0.0, 1.0), True, NOW + timedelta(minutes=1)),
+        ("b", _vector(0.0, 1.0), False, NOW + timedelta(minutes=2)),
+    ])
+
+    assert changed is True
+    assert len(index) == 1
+    assert index.search(_vector(0.0, 1.0), k=5) == [("a", pytest.approx(0.0, abs=1e-6))]
+    assert index.watermark == NOW + timedelta(minutes=2)
+
+
+def test_apply_rows_reports_no_change_for_identical_rows():
+    index = OpportunityVectorIndex()
+    index.apply_rows([("a", _vector(1.0, 0.0), True, NOW)])
+
+    assert index.apply_rows([("a", _vector(1.0, 0.0), True, NOW)]) is False
+
+
+def test_snapshot_round_trip_is_memory_mapped(tmp_path):
+    index = OpportunityVectorIndex(str(tmp_path))
+    index.apply_rows([
+        ("a", _vector(1.0, 0.0), True, NOW),
+        ("b", _vector(0.0, 1.0), True, NOW),
+    ])
+    index._save_snapshot()
+
+    restored = OpportunityVectorIndex(str(tmp_path))
+    restored._load_snapshot()
+
+    assert isinstance(restored._matrix, np.memmap)
+    assert restored.watermark == NOW
+    assert [opportunity_id for opportunity_id, _ in restored.search(_vector(0.0, 1.0), k=1)] == ["b"]
+
+
+@pytest.mark.asyncio
+async def test_numpy_recall_refreshes_only_when_stale(monkeypatch):
+    monkeypatch.setattr(settings, "MATCH_RECALL_REFRESH_SECONDS", 3600)
+    index = OpportunityVectorIndex()
+    recall = NumpyRecall(index)
+    session = FakeSession(
+        [("a", _vector(1.0, 0.0), True, NOW)],
+        [("b", _vector(0.0, 1.0), True, NOW + timedelta(minutes=5))],
+    )
+
+    first = await recall.recall(session, _vector(0.0, 1.0), 5)
+    again = await recall.recall(session, _vector(0.0, 1.0), 5)
+    index.mark_stale()
+    after_sync = await recall.recall(session, _vector(0.0, 1.0), 5)
+
+    assert [hit[0] for hit in first] == ["a"]
+    assert again == first
+    assert [hit[0] for hit in after_sync] == ["b", "a"]
+    assert session.executed == 2
+
+
+def test_search_many_matches_single_query_search():
+    index = OpportunityVectorIndex()
+    index.apply_rows([
+        ("a", _vector(1.0, 0.0, 0.0), True, NOW),
+        ("b", _vector(0.0, 1.0, 0.0), True, NOW),
+        ("c", _vector(0.0, 0.0, 1.0), True, NOW),
+    ])
+    queries = [_vector(0.1, 0.9, 0.0), _vector(0.0, 0.0, 0.0), _vector(0.0, 0.2, 1.0)]
+
+    batched = index.search_many(queries, k=2, block_size=2)
+
+    assert batched[1] == []
+    assert [[hit[0] for hit in hits] for hits in batched] == [["b", "a"], [], ["c", "b"]]
+    assert batched[0] == index.search(queries[0], k=2)
@@ -239,11 +239,91 @@ export const jobsApi = {
 
   get: (id: string) => fetchApi<JobResponse>(`/api/jobs/${id}`),
 
+  search: (q: string, limit = 20, offset = 0) => {
+    const query = new URLSearchParams({ q, limit: String(limit), offset: String(offset) })
+    return fetchApi<OpportunitySearchResponse>(`/api/jobs/search?${query.toString()}`)
+  },
+
   refresh: () => fetchApi<JobRefreshResponse>('/api/jobs/refresh', { method: 'POST' }),
 
+  refreshStatus: (refreshId: string) =>
+    fetchApi<JobRefreshResponse>(`/api/jobs/refresh/${refreshId}`),
+
+  refreshEventsUrl: (refreshId: string) => `${API_BASE}/api/jobs/refresh/${refreshId}/events`,
+
+  // Starts a background refresh (or joins the one in progress) and polls it to the end.
+  // With `onProgress`, stage and batch events stream in over SSE meanwhile.
+  runRefresh: async (
+    onProgress?: (event: RefreshProgressEvent) => void,
+    pollMs = 1500,
+  ): Promise<ApiResponse<JobRefreshResponse>> => {
+    let result = await jobsApi.refresh()
+    let source: EventSource | null = null
+    if (onProgress && result.data && typeof EventSource !== 'undefined') {
+      source = new EventSource(jobsApi.refreshEventsUrl(result.data.refresh_id), { withCredentials: true })
+      for (const type of ['status', 'stage', 'batch'] as const) {
+        source.addEventListener(type, (message) => {
+          onProgress({ type, data: JSON.parse((message as MessageEvent).data) } as RefreshProgressEvent)
+        })
+      }
+    }
+    try {
+      while (result.data && (result.data.status === 'queued' || result.data.status === 'running')) {
+        await new Promise((resolve) => setTimeout(resolve, pollMs))
+        result = await jobsApi.refreshStatus(result.data.refresh_id)
+      }
+    } finally {
+      source?.close()
+    }
+    if (result.data?.status === 'failed') {
+      return { error: result.data.error || 'Job search failed', status: result.status }
+    }
+    return result
+  },
+
   generateCoverLetter: (id: string) =>
     fetchApi<CoverLetterResponse>(`/api/jobs/${id}/cover-letter`, { method: 'POST' }),
 
+  // Streams the letter over SSE, calling `onText` with each piece as the model
+  // writes it. Resolves with the saved letter once the stream ends.
+  streamCoverLetter: async (
+    id: string,
+    onText: (text: string) => void,
+  ): Promise<ApiResponse<CoverLetterResponse>> => {
+    try {
+      const response = await request(`/api/jobs/${id}/cover-letter/stream`, { method: 'POST' })
+      if (!response.ok || !response.body) {
+        const error = await response.json().catch(() => ({ detail: 'Request failed' }))
+        return { error: error.detail || 'Request failed', status: response.status }
+      }
+
+      const reader = response.body.getReader()
+      const decoder = new TextDecoder()
+      let buffer = ''
+      for (;;) {
+        const { done, value } = await reader.read()
+        if (done) break
+        buffer += decoder.decode(value, { stream: true })
+        let boundary = buffer.indexOf('\n\n')
+        while (boundary !== -1) {
+          const block = buffer.slice(0, boundary)
+          buffer = buffer.slice(boundary + 2)
+          boundary = buffer.indexOf('\n\n')
+          const event = block.match(/^event: (.*)$/m)?.[1]
+          const data = block.match(/^data: (.*)$/m)?.[1]
+          if (!event || data === undefined) continue
+          const payload = JSON.parse(data)
+          if (event === 'token') onText(payload.text)
+          if (event === 'done') return { data: payload as CoverLetterResponse, status: response.status }
+          if (event === 'error') return { error: payload.detail, status: response.status }
+        }
+      }
+      return { error: 'Cover letter stream ended early', status: response.status }
+    } catch {
+      return { error: 'Network error', status: 0 }
+    }
+  },
+
   markApplied: (id: string) =>
     fetchApi(`/api/jobs/${id}/apply`, { method: 'PUT' }),
 }
@@ -637,9 +717,29 @@ export interface JobListResponse {
   last_search?: string;
 }
 
+export interface OpportunitySearchResult {
+  id: string;
+  source_type?: string | null;
+  title: string;
+  company: string;
+  location?: string | null;
+  salary?: string | null;
+  url?: string | null;
+  posted_at?: string | null;
+  relevance: number;
+}
+
+export interface OpportunitySearchResponse {
+  results: OpportunitySearchResult[];
+  limit: number;
+  offset: number;
+}
+
 export interface JobRefreshResponse {
   message: string;
-  status: 'completed';
+  status: 'queued' | 'running' | 'completed' | 'failed';
+  refresh_id: string;
+  error?: string | null;
   jobs_found: number;
   final_threshold?: number;
   used_synced_opportunities: boolean;
@@ -647,6 +747,30 @@ export interface JobRefreshResponse {
   candidate_stats: Record<string, number | string | boolean>;
 }
 
+export interface RefreshProgressJob {
+  opportunity_id?: string | null;
+  title: string;
+  company: string;
+  location?: string | null;
+  url?: string | null;
+  match_score: number;
+  match_reason?: string;
+}
+
+export type RefreshProgressEvent =
+  | { type: 'status'; data: { status: JobRefreshResponse['status']; jobs_found?: number; error?: string } }
+  | {
+      type: 'stage';
+      data: {
+        stage: string;
+        candidate_stats: Record<string, number | string | boolean>;
+        scored: number;
+        matched: number;
+        threshold?: number;
+      };
+    }
+  | { type: 'batch'; data: { cached: boolean; jobs: RefreshProgressJob[] } }
+
 export interface CoverLetterResponse {
   job_id: string;
   cover_letter: string;
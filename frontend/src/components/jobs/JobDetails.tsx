@@ -32,14 +32,18 @@ export function JobDetails({ job, onCoverLetterGenerated, onApplicationTracked }
   const generateCoverLetter = async () => {
     setIsGenerating(true)
     setError('')
+    setCoverLetter('')
     try {
-      const result = await jobsApi.generateCoverLetter(job.id)
+      const result = await jobsApi.streamCoverLetter(job.id, (text) => {
+        setCoverLetter((current) => current + text)
+      })
       if (result.error || !result.data) {
         throw new Error(result.error || 'Unable to generate cover letter')
       }
       setCoverLetter(result.data.cover_letter)
       onCoverLetterGenerated?.(job.id, result.data.cover_letter)
     } catch (err: any) {
+      setCoverLetter('')
       setError(err.message || 'Unable to generate cover letter')
     } finally {
       setIsGenerating(false)
@@ -236,7 +240,7 @@ export function JobDetails({ job, onCoverLetterGenerated, onApplicationTracked }
         <div className="space-y-3">
           <div className="flex flex-col gap-3 sm:flex-row sm:items-center sm:justify-between">
             <h4 className="font-semibold text-slate-800 text-sm">AI Generated Cover Letter</h4>
-            {coverLetter ? (
+            {coverLetter && !isGenerating ? (
               <button
                 onClick={copyToClipboard}
                 className="inline-flex items-center justify-center gap-1.5 rounded-full bg-primary/10 px-3 py-1.5 text-xs font-medium text-primary transition-colors hover:bg-primary/15"
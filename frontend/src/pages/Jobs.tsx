@@ -2,13 +2,22 @@ import { useState } from 'react'
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query'
 import { RefreshCw, Search } from 'lucide-react'
 import { motion, AnimatePresence } from 'framer-motion'
-import { jobsApi } from '../api/client'
+import { jobsApi, type RefreshProgressEvent } from '../api/client'
 import { JobCard } from '../components/jobs/JobCard'
 import { JobDetails } from '../components/jobs/JobDetails'
 import { Button } from '../components/ui/button'
 
+// Shown after the named workflow step finishes.
+const STAGE_LABELS: Record<string, string> = {
+  fetch_context: 'Finding candidate roles...',
+  search_jobs: 'Scoring candidates...',
+  analyze_matches: 'Ranking matches...',
+  save_results: 'Saving matches...',
+}
+
 export default function Jobs() {
   const [expandedJob, setExpandedJob] = useState<string | null>(null)
+  const [progress, setProgress] = useState<string | null>(null)
   const queryClient = useQueryClient()
 
   // Data Fetching
@@ -20,7 +29,21 @@ export default function Jobs() {
 
   // Refresh Mutation
   const refreshMutation = useMutation({
-    mutationFn: jobsApi.refresh,
+    mutationFn: () => {
+      let scoredSoFar = 0
+      setProgress('Queued...')
+      return jobsApi.runRefresh((event: RefreshProgressEvent) => {
+        if (event.type === 'stage') {
+          const label = STAGE_LABELS[event.data.stage]
+          if (label) setProgress(label)
+        } else if (event.type === 'batch') {
+          scoredSoFar += event.data.jobs.length
+          const best = Math.max(...event.data.jobs.map((job) => job.match_score), 0)
+          setProgress(`Scored ${scoredSoFar} candidate${scoredSoFar === 1 ? '' : 's'} so far (best ${best}).`)
+        }
+      })
+    },
+    onSettled: () => setProgress(null),
     onSuccess: (result) => {
       if (result.error) {
         alert(`Search failed: ${result.error}. Please try again later.`)
@@ -65,6 +88,11 @@ export default function Jobs() {
                 Last updated: {new Date(lastSearch).toLocaleString()}
               </p>
             )}
+            {progress && (
+              <p className="mt-2 text-sm font-medium text-primary" aria-live="polite">
+                {progress}
+              </p>
+            )}
           </div>
 
           <Button